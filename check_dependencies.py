@@ -25,10 +25,9 @@ def main():
         ("pandas", "pandas"),
         ("numpy", "numpy"),
         ("joblib", "joblib"),
+        ("pyarrow", "pyarrow"),
         ("streamlit", "streamlit"),
         ("requests", "requests"),
-        ("matplotlib", "matplotlib"),
-        ("seaborn", "seaborn"),
         ("plotly", "plotly"),
     ]
     
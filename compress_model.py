@@ -0,0 +1,175 @@
+# compress_model.py
+import argparse
+import os
+import tempfile
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.metrics import accuracy_score, recall_score
+
+from model_artifacts import MODEL_PATH, SCALER_PATH, predict_proba, save_bundle
+from model_bundle import BUNDLE_PATH, read_header
+from model_registry import default_registry
+from prediction_log import CSV_READ_OPTIONS
+from train_model import prepare_data
+from tree_engine import RAW_MODEL_PATH, FlatForest
+
+COMPRESSED_MODEL_PATH = "compressed_forest.npz"
+
+def candidate_tree_counts(n_estimators):
+    """Estimator counts to try, denser at the small end"""
+    counts = {n_estimators}
+    k = 5
+    while k < n_estimators:
+        counts.add(k)
+        k = int(np.ceil(k * 1.5))
+    return sorted(counts)
+
+def evaluate_candidates(flat, X, tree_counts, depth_caps, chunk_size=4096):
+    """Predicted class indices on X for every (tree count, depth cap) pair
+
+    Each depth cap is traversed once; every tree-count prefix is read off
+    running sums of the per-tree leaf distributions.
+    """
+    predictions = {}
+    for depth in depth_caps:
+        pruned = flat.prune(max_depth=depth)
+        out = np.empty((len(tree_counts), len(X)), dtype=np.int32)
+        for start in range(0, len(X), chunk_size):
+            leaves = pruned.apply(X[start:start + chunk_size])
+            totals = np.cumsum(pruned.value[leaves], axis=1)
+            for i, k in enumerate(tree_counts):
+                out[i, start:start + len(leaves)] = totals[:, k - 1].argmax(axis=1)
+        for i, k in enumerate(tree_counts):
+            predictions[(k, depth)] = out[i]
+    return predictions
+
+def find_smallest(flat, X_test, y_test, accuracy_tolerance=0.005, recall_tolerance=0.01):
+    """Smallest (tree count, depth cap) whose accuracy and per-class recall stay within tolerance"""
+    labels = np.arange(len(flat.classes_))
+    tree_counts = candidate_tree_counts(flat.n_estimators)
+    depth_caps = list(range(2, flat.max_depth + 1))
+    predictions = evaluate_candidates(flat, X_test, tree_counts, depth_caps)
+
+    def score(y_pred):
+        return accuracy_score(y_test, y_pred), recall_score(y_test, y_pred, labels=labels, average=None,
+                                                           zero_division=0)
+
+    base_accuracy, base_recall = score(predictions[(flat.n_estimators, flat.max_depth)])
+    best = None
+    for (k, depth), y_pred in predictions.items():
+        accuracy, recall = score(y_pred)
+        if accuracy < base_accuracy - accuracy_tolerance or np.any(recall < base_recall - recall_tolerance):
+            continue
+        n_nodes = flat.prune(k, depth).n_nodes
+        if best is None or (n_nodes, k) < (best['nodes'], best['n_estimators']):
+            best = {'n_estimators': k, 'max_depth': depth, 'nodes': n_nodes,
+                    'accuracy': accuracy, 'recall': recall}
+    baseline = {'n_estimators': flat.n_estimators, 'max_depth': flat.max_depth, 'nodes': flat.n_nodes,
+                'accuracy': base_accuracy, 'recall': base_recall}
+    return baseline, best
+
+def benchmark(load, path, X_raw, repeats=5, batch_rows=100_000):
+    """Size on disk, median load time, single-row p50/p99 latency and batch throughput for a saved model"""
+    load_times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        model, scaler = load(path)
+        load_times.append(time.perf_counter() - start)
+
+    predict_proba(model, scaler, X_raw[:1])
+    timings = []
+    for row in X_raw[:500]:
+        start = time.perf_counter()
+        predict_proba(model, scaler, row[None, :])
+        timings.append((time.perf_counter() - start) * 1000)
+
+    # Nightly scoring and the stream predict whole batches, which take a different code path
+    X_batch = np.resize(X_raw, (batch_rows, X_raw.shape[1]))
+    batch_times = []
+    for _ in range(3):
+        start = time.perf_counter()
+        predict_proba(model, scaler, X_batch)
+        batch_times.append(time.perf_counter() - start)
+    return {
+        'size_kb': os.path.getsize(path) / 1024,
+        'load_ms': float(np.median(load_times)) * 1000,
+        'p50_ms': float(np.percentile(timings, 50)),
+        'p99_ms': float(np.percentile(timings, 99)),
+        'batch_rows_s': batch_rows / min(batch_times),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Shrink the trained forest within an accuracy tolerance")
+    parser.add_argument("--data", default="enhanced_disaster_dataset.csv",
+                        help="Dataset saved by train_model.py; its held-out split is used for evaluation")
+    parser.add_argument("--accuracy-tolerance", type=float, default=0.005)
+    parser.add_argument("--recall-tolerance", type=float, default=0.01, help="Allowed per-class recall drop")
+    parser.add_argument("--output", default=COMPRESSED_MODEL_PATH)
+    parser.add_argument("--install", action="store_true",
+                        help=f"Also install the compressed model as {RAW_MODEL_PATH} and publish it to the registry")
+    args = parser.parse_args()
+
+    try:
+        forest = joblib.load(MODEL_PATH)
+        scaler = joblib.load(SCALER_PATH)
+        df = pd.read_csv(args.data, **CSV_READ_OPTIONS)
+    except FileNotFoundError as e:
+        print(f"❌ {e.filename} not found. Please run train_model.py first.")
+        raise SystemExit(1)
+
+    # Same split train_model evaluates on, so the tolerance is measured on unseen rows
+    _, X_test, _, y_test, _, _ = prepare_data(df)
+    X_raw = X_test.to_numpy(dtype=np.float64)
+    X_scaled = (X_raw - scaler.mean_) / scaler.scale_
+
+    flat = FlatForest.from_sklearn(forest)
+    baseline, best = find_smallest(flat, X_scaled, y_test, args.accuracy_tolerance, args.recall_tolerance)
+    if best is None:
+        print("⚠️ No compressed model stays within tolerance")
+        raise SystemExit(1)
+
+    compressed = flat.prune(best['n_estimators'], best['max_depth'])
+    raw = compressed.fold_scaler(scaler.mean_, scaler.scale_)
+    max_diff = float(np.abs(compressed.predict_proba(X_scaled) - raw.predict_proba(X_raw)).max())
+    if max_diff > 1e-9:
+        print(f"❌ Scaler folding changed probabilities by {max_diff:.2e}; not saved")
+        raise SystemExit(1)
+    raw.save(args.output)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        full_path = os.path.join(tmp, "full_forest.npz")
+        flat.fold_scaler(scaler.mean_, scaler.scale_).save(full_path)
+        rows = {
+            'sklearn pickle': benchmark(lambda p: (joblib.load(p), scaler), MODEL_PATH, X_raw),
+            'flat (full)': benchmark(lambda p: (FlatForest.load(p), None), full_path, X_raw),
+            'flat (compressed)': benchmark(lambda p: (FlatForest.load(p), None), args.output, X_raw),
+        }
+    report = pd.DataFrame(rows).T
+    report.insert(0, 'nodes', [flat.n_nodes, flat.n_nodes, compressed.n_nodes])
+    report.insert(0, 'max_depth', [flat.max_depth, flat.max_depth, compressed.max_depth])
+    report.insert(0, 'trees', [flat.n_estimators, flat.n_estimators, compressed.n_estimators])
+
+    print(f"✅ Kept {best['n_estimators']}/{flat.n_estimators} trees at depth {best['max_depth']}: "
+          f"{best['nodes']}/{baseline['nodes']} nodes")
+    print(f"🎯 Held-out accuracy {baseline['accuracy']:.4f} -> {best['accuracy']:.4f} "
+          f"on {len(y_test)} rows; worst recall drop {np.max(baseline['recall'] - best['recall']):.4f}")
+    print("\n📋 Before and after:")
+    print(report.round(3).to_string(formatters={'batch_rows_s': '{:,.0f}'.format}))
+    print(f"📁 Compressed raw-input model saved to {args.output}")
+
+    if args.install:
+        raw.save(RAW_MODEL_PATH)
+        metadata = read_header(BUNDLE_PATH)[0]['metadata'] if os.path.exists(BUNDLE_PATH) else {}
+        metadata['compression'] = {
+            'n_estimators': best['n_estimators'], 'max_depth': best['max_depth'],
+            'accuracy': round(float(best['accuracy']), 6),
+        }
+        save_bundle(metadata)
+        version = default_registry().publish()
+        print(f"✅ Installed as {RAW_MODEL_PATH} and published as version {version}")
+
+if __name__ == "__main__":
+    main()
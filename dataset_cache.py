@@ -0,0 +1,56 @@
+# dataset_cache.py
+import hashlib
+import json
+import os
+
+import pandas as pd
+
+DEFAULT_DATASET_CACHE_DIR = "dataset_cache"
+
+class StageCache:
+    """Content-addressed on-disk cache of intermediate dataset frames
+
+    A stage's key hashes its name, its parameters and the keys of the stages it
+    was built from, so changing anything upstream produces a new key.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_DATASET_CACHE_DIR):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(stage, params, inputs=()):
+        payload = json.dumps([stage, params, list(inputs)], sort_keys=True, default=str)
+        return f"{stage}-{hashlib.sha256(payload.encode()).hexdigest()[:24]}"
+
+    def path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.parquet")
+
+    def load(self, key):
+        """Cached frame for key, or None"""
+        try:
+            return pd.read_parquet(self.path(key))
+        except FileNotFoundError:
+            return None
+
+    def save(self, key, df):
+        path = self.path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+
+    def run(self, stage, params, compute, inputs=(), cacheable=True):
+        """Return (frame, key) for a stage, computing and storing it only on a miss"""
+        key = self.key(stage, params, inputs)
+        if cacheable:
+            df = self.load(key)
+            if df is not None:
+                self.hits += 1
+                return df, key
+        self.misses += 1
+        df = compute()
+        if cacheable:
+            self.save(key, df)
+        return df, key
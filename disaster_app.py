@@ -2,13 +2,16 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-import joblib
+import time
 from datetime import datetime, timedelta
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
+from model_artifacts import ModelHolder, predict_proba
+from prediction_cache import PredictionCache
+from prediction_log import get_aggregates, get_log_sink
+from risk_grid import RiskGrid
+from rule_engine import default_rule_set
+from risk_scoring import check_early_warnings, confidence_risk_codes, get_risk_level, risk_levels
+from shadow_scoring import shadow_from_env
+from spatial_index import regions_frame
 
 # Page configuration
 st.set_page_config(
@@ -329,74 +332,47 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# Reruns triggered inside a fragment re-execute only that fragment (Streamlit >= 1.33)
+fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None) or (lambda func: func)
+
+TAB_NAMES = ["🌐 Dashboard", "🔮 AI Prediction", "📊 Analytics", "🛡️ Preparedness", "⚙️ Settings"]
+ANALYSIS_VIEWS = ["📊 Disaster Distribution", "📈 Confidence Trends", "🔍 Parameter Analysis"]
+
+def plotly_express():
+    """plotly.express, imported the first time a chart is drawn rather than at startup"""
+    import plotly.express as px
+    return px
+
 @st.cache_resource
+def get_model_holder():
+    return ModelHolder()
+
 def load_model():
-    """Load the trained model and preprocessing objects"""
+    """Current model and preprocessing objects, swapping in newly published versions between reruns"""
     try:
-        model = joblib.load("enhanced_rf_model.pkl")
-        label_encoder = joblib.load("enhanced_label_encoder.pkl")
-        scaler = joblib.load("feature_scaler.pkl")
-        features = joblib.load("feature_names.pkl")
-        return model, label_encoder, scaler, features
+        return get_model_holder().current()
     except FileNotFoundError:
         st.error("❌ Model files not found. Please run train_model.py first.")
         st.stop()
 
-def safe_mode(series):
-    """Safely get the mode of a series, handling empty cases"""
-    if series.empty:
-        return "N/A"
-    mode_values = series.mode()
-    return mode_values.iloc[0] if not mode_values.empty else "N/A"
-
-def safe_mean(series):
-    """Safely get the mean of a series, handling empty cases"""
-    return series.mean() if not series.empty else 0
-
-def safe_max(series):
-    """Safely get the max of a series, handling empty cases"""
-    return series.max() if not series.empty else "N/A"
+@st.cache_resource
+def load_risk_grid(model_version):
+    """Load the precomputed risk grid if it was built for the current model"""
+    try:
+        grid = RiskGrid()
+    except FileNotFoundError:
+        return None
+    return grid if grid.artifact_hash == model_version else None
 
-def get_risk_level_from_confidence(confidence, disaster_type):
-    """Calculate risk level based only on confidence for dashboard display"""
-    if disaster_type == 'None':
-        return 'none'
-    
-    if confidence >= 80:
-        return 'high'
-    elif confidence >= 60:
-        return 'medium'
-    else:
-        return 'low'
+@st.cache_resource
+def get_shadow_scorer():
+    """Candidate model scorer when DISASTER_SHADOW_MODEL is set, otherwise None"""
+    return shadow_from_env()
 
-def get_risk_level(confidence, disaster_type, parameters):
-    """Calculate overall risk level based on multiple factors for predictions"""
-    if disaster_type == 'None':
-        return 'none'
-    
-    risk_score = 0
-    
-    # Confidence contributes to risk
-    risk_score += confidence / 100 * 40
-    
-    # Parameter severity contributes to risk (with safe access)
-    rainfall = parameters.get('rainfall', 0)
-    temperature = parameters.get('temperature', 0)
-    magnitude = parameters.get('magnitude', 0)
-    
-    if rainfall > 150 and disaster_type == 'Flood':
-        risk_score += 30
-    if temperature > 35 and disaster_type == 'Wildfire':
-        risk_score += 30
-    if magnitude > 5.0 and disaster_type == 'Earthquake':
-        risk_score += 30
-    
-    if risk_score > 70:
-        return 'high'
-    elif risk_score > 40:
-        return 'medium'
-    else:
-        return 'low'
+@st.cache_resource
+def get_prediction_cache():
+    """Prediction results cache shared by all sessions"""
+    return PredictionCache()
 
 # Emergency Preparedness Guides with Detailed Information
 EMERGENCY_GUIDES = {
@@ -599,65 +575,20 @@ EMERGENCY_GUIDES = {
     }
 }
 
-def check_early_warnings(parameters):
-    """Check parameters against safety thresholds and generate warnings"""
-    warnings = []
-    
-    # Safe parameter access
-    rainfall = parameters.get('rainfall', 0)
-    temperature = parameters.get('temperature', 0)
-    humidity = parameters.get('humidity', 50)
-    magnitude = parameters.get('magnitude', 0)
-    wind_speed = parameters.get('wind_speed', 0)
-    
-    # Flood warnings
-    if rainfall > 250:
-        warnings.append({
-            'type': '🌊 CRITICAL FLOOD RISK',
-            'message': 'Extreme rainfall detected - Immediate action required!',
-            'severity': 'critical'
-        })
-    elif rainfall > 150:
-        warnings.append({
-            'type': '⚠️ HIGH FLOOD RISK', 
-            'message': 'Heavy rainfall - Monitor water levels closely',
-            'severity': 'high'
-        })
-    
-    # Wildfire warnings
-    if temperature > 40 and humidity < 20:
-        warnings.append({
-            'type': '🔥 CRITICAL FIRE RISK',
-            'message': 'Extreme fire conditions - High alert!',
-            'severity': 'critical'
-        })
-    elif temperature > 35 and humidity < 25:
-        warnings.append({
-            'type': '⚠️ HIGH FIRE RISK',
-            'message': 'Severe fire danger - Take precautions',
-            'severity': 'high'
-        })
-    
-    # Earthquake warnings
-    if magnitude > 7.0:
-        warnings.append({
-            'type': '🔄 MAJOR EARTHQUAKE',
-            'message': 'Major seismic activity - Take cover immediately!',
-            'severity': 'critical'
-        })
-    elif magnitude > 5.5:
-        warnings.append({
-            'type': '⚠️ SIGNIFICANT QUAKE',
-            'message': 'Substantial seismic activity - Stay alert',
-            'severity': 'high'
-        })
-    
-    return warnings
-
+@fragment
 def create_dashboard_tab():
     """Create the main dashboard tab"""
     st.markdown('<div class="sub-header">📊 Live System Overview</div>', unsafe_allow_html=True)
     
+    # Running aggregates keep the count and recent predictions, so the
+    # dashboard costs the same however long the log grows
+    try:
+        stats = get_aggregates()
+        stats_error = None
+    except Exception as e:
+        stats = None
+        stats_error = e
+    
     # Create metrics cards
     col1, col2, col3, col4 = st.columns(4)
     
@@ -671,11 +602,7 @@ def create_dashboard_tab():
         """, unsafe_allow_html=True)
     
     with col2:
-        try:
-            log_df = pd.read_csv("Prediction_Log.csv")
-            total_predictions = len(log_df)
-        except:
-            total_predictions = 0
+        total_predictions = stats.count if stats is not None else 0
         
         st.markdown(f"""
         <div class="metric-card">
@@ -718,27 +645,49 @@ def create_dashboard_tab():
         """)
     
     with col2:
-        if st.button("🎯 Go to AI Prediction", use_container_width=True):
-            st.success("Navigate to the AI Prediction tab above!")
+        if st.button("🎯 Go to AI Prediction", use_container_width=True,
+                     on_click=lambda: st.session_state.update(active_tab=TAB_NAMES[1])):
+            st.rerun()
+    
+    # Regional risk from the per-region counts kept with the aggregates
+    if stats is not None and stats.regions:
+        st.markdown("---")
+        st.markdown('<div class="sub-header">🗺️ Regional Risk</div>', unsafe_allow_html=True)
+        regions = regions_frame(stats.regions)
+        # Green to red by risk score, sized by how many predictions the region has
+        regions['color'] = [
+            f"#{int(255 * score):02x}{int(200 * (1 - score)):02x}40" for score in regions['risk_score']
+        ]
+        regions['size'] = 20_000 + 60_000 * np.sqrt(regions['count'] / regions['count'].max())
+        map_col, table_col = st.columns([2, 1])
+        with map_col:
+            st.map(regions, latitude='lat', longitude='lon', color='color', size='size')
+        with table_col:
+            st.markdown("##### Highest-risk regions")
+            st.dataframe(
+                regions.head(10)[['region', 'count', 'high', 'top_disaster', 'risk_score']],
+                hide_index=True, use_container_width=True,
+                column_config={'risk_score': st.column_config.ProgressColumn("Risk", min_value=0, max_value=1)}
+            )
     
     # Recent activity
     st.markdown("---")
     st.markdown('<div class="sub-header">📋 Recent Activity</div>', unsafe_allow_html=True)
     
     try:
-        log_df = pd.read_csv("Prediction_Log.csv")
-        if not log_df.empty:
-            recent = log_df.tail(5).sort_values('Timestamp', ascending=False)
+        if stats_error is not None:
+            raise stats_error
+        if stats.count:
+            recent = stats.recent_frame().tail(5).sort_values('Timestamp', ascending=False)
+            # Simplified risk level for the dashboard (no parameters needed), scored for all rows at once
+            recent['Risk_Level'] = risk_levels(confidence_risk_codes(recent['AI_Confidence'], recent['AI_Prediction']))
             
             for _, row in recent.iterrows():
                 # Safe data access with defaults
                 disaster_type = row.get('AI_Prediction', 'Unknown')
                 confidence = row.get('AI_Confidence', 0)
                 timestamp = row.get('Timestamp', 'Unknown')
-                
-                # Use simplified risk level for dashboard (no parameters needed)
-                risk_level = get_risk_level_from_confidence(confidence, disaster_type)
-                risk_class = f"risk-{risk_level}"
+                risk_class = f"risk-{row['Risk_Level']}"
                 
                 # Safe text for display
                 display_text = str(disaster_type).upper() if disaster_type != 'Unknown' else 'UNKNOWN'
@@ -764,8 +713,15 @@ def create_dashboard_tab():
         st.error(f"Error loading recent activity: {str(e)}")
         st.info("Please make a new prediction to generate activity data.")
 
-def create_prediction_tab(model, label_encoder, scaler, FEATURES):
+@fragment
+def create_prediction_tab():
     """Create the AI prediction tab"""
+    # Resolved on every run, fragment reruns included, so a hot-swapped model is picked up
+    # instead of the one captured at the last full rerun
+    model, label_encoder, scaler, _, model_version = load_model()
+    cache = get_prediction_cache()
+    risk_grid = load_risk_grid(model_version)
+    shadow = get_shadow_scorer()
     st.markdown('<div class="sub-header">🔮 AI Disaster Prediction Engine</div>', unsafe_allow_html=True)
     
     # Create two columns for input
@@ -775,41 +731,14 @@ def create_prediction_tab(model, label_encoder, scaler, FEATURES):
         st.markdown("#### 🧠 Logical Assessment")
         st.markdown("Answer these questions for initial logical assessment:")
         
-        # Logical assessment questions
-        q1 = st.radio("**🌍 Ground shaking or tremors detected?**", 
-                      ["No", "Yes - Mild", "Yes - Strong"], key="q1")
-        
-        if "Yes" in q1:
-            q2 = st.radio("**🌋 Volcanic activity observed?**", 
-                          ["No", "Yes - Smoke/Ash", "Yes - Lava flow"], key="q2")
-            if "Yes" in q2:
-                logic_guess = "Volcano"
-                logic_confidence = "High"
-            else:
-                logic_guess = "Earthquake"
-                logic_confidence = "High" if "Strong" in q1 else "Medium"
-        else:
-            q3 = st.radio("**🌧️ Extreme rainfall conditions?**", 
-                          ["No", "Yes - Heavy rain", "Yes - Torrential rain"], key="q3")
-            
-            if "Yes" in q3:
-                q4 = st.radio("**🌊 Oceanic anomalies or coastal flooding?**", 
-                              ["No", "Yes - High waves", "Yes - Coastal flooding"], key="q4")
-                if "Yes" in q4:
-                    logic_guess = "Tsunami"
-                    logic_confidence = "High" if "Coastal flooding" in q4 else "Medium"
-                else:
-                    logic_guess = "Flood"
-                    logic_confidence = "High" if "Torrential" in q3 else "Medium"
-            else:
-                q5 = st.radio("**🔥 Fire or smoke observed?**", 
-                              ["No", "Yes - Small fire", "Yes - Large wildfire"], key="q5")
-                if "Yes" in q5:
-                    logic_guess = "Wildfire"
-                    logic_confidence = "High" if "Large" in q5 else "Medium"
-                else:
-                    logic_guess = "None"
-                    logic_confidence = "High"
+        # Logical assessment questions; which follow-ups are asked and what the
+        # answers mean come from the rule file, so they change without code changes
+        rules = default_rule_set()
+        answers = {}
+        for question in rules.questions:
+            if rules.is_asked(question['key'], answers):
+                answers[question['key']] = st.radio(question['label'], question['options'], key=question['key'])
+        logic_guess, logic_confidence = rules.assess_one(answers)
         
         # Display logical assessment
         st.markdown("---")
@@ -845,6 +774,23 @@ def create_prediction_tab(model, label_encoder, scaler, FEATURES):
             depth = st.slider("**Event Depth (km)**", 0, 100, 0,
                             help="Depth of seismic event if applicable")
         
+        # Located predictions feed the regional risk map on the dashboard
+        with st.expander("📍 Location (optional)"):
+            loc_col1, loc_col2 = st.columns(2)
+            latitude = loc_col1.number_input("**Latitude**", -90.0, 90.0, value=None, step=0.1,
+                                             key="latitude", help="Where the readings were taken")
+            longitude = loc_col2.number_input("**Longitude**", -180.0, 180.0, value=None, step=0.1,
+                                              key="longitude", help="Where the readings were taken")
+        
+        # Live preview interpolates from the precomputed risk grid without calling the model
+        if risk_grid is not None and st.toggle("⚡ Live preview", value=True,
+                                               help="Instant estimate from the precomputed risk grid"):
+            preview_disaster, preview_confidence = risk_grid.predict(
+                [rain, humidity, temp, wind, soil, magnitude, depth]
+            )
+            st.info(f"**Live estimate:** {preview_disaster} ({preview_confidence:.0f}% confidence). "
+                    "Run the AI prediction for the full model result.")
+        
         # Early warnings with safe parameter access
         parameters = {
             'rainfall': rain,
@@ -867,16 +813,28 @@ def create_prediction_tab(model, label_encoder, scaler, FEATURES):
             with st.spinner("🤖 AI is analyzing environmental parameters..."):
                 # Prepare input data
                 input_data = np.array([[rain, humidity, temp, wind, soil, magnitude, depth]])
-                input_scaled = scaler.transform(input_data)
                 
-                # Get prediction
-                probabilities = model.predict_proba(input_scaled)[0]
-                predicted_idx = np.argmax(probabilities)
-                predicted_disaster = label_encoder.inverse_transform([predicted_idx])[0]
-                confidence = probabilities[predicted_idx] * 100
+                # Slider inputs repeat often, so reuse earlier results of this same model version
+                cached = cache.get(input_data[0], model_version)
+                latency_ms = None
+                if cached is None:
+                    # Get prediction
+                    start = time.perf_counter()
+                    probabilities = predict_proba(model, scaler, input_data)[0]
+                    latency_ms = (time.perf_counter() - start) * 1000
+                    predicted_idx = np.argmax(probabilities)
+                    predicted_disaster = label_encoder.inverse_transform([predicted_idx])[0]
+                    confidence = probabilities[predicted_idx] * 100
+                    
+                    # Calculate risk level with actual parameters
+                    risk_level = get_risk_level(confidence, predicted_disaster, parameters)
+                    cached = (probabilities, predicted_disaster, confidence, risk_level)
+                    cache.put(input_data[0], model_version, cached)
+                probabilities, predicted_disaster, confidence, risk_level = cached
                 
-                # Calculate risk level with actual parameters
-                risk_level = get_risk_level(confidence, predicted_disaster, parameters)
+                # The candidate model scores the same input on its own thread
+                if shadow is not None:
+                    shadow.submit(input_data, [predicted_disaster], [confidence], latency_ms, model_version)
                 
                 # Display results
                 st.markdown("---")
@@ -921,6 +879,7 @@ def create_prediction_tab(model, label_encoder, scaler, FEATURES):
                     'Confidence': probabilities * 100
                 }).sort_values('Confidence', ascending=False)
                 
+                px = plotly_express()
                 fig = px.bar(conf_df, x='Disaster', y='Confidence', 
                             color='Confidence',
                             color_continuous_scale='RdYlGn',
@@ -961,117 +920,32 @@ def create_prediction_tab(model, label_encoder, scaler, FEATURES):
                 
                 # Log prediction
                 log_prediction(logic_guess, predicted_disaster, confidence, 
-                             rain, humidity, temp, wind, soil, magnitude, depth)
+                             rain, humidity, temp, wind, soil, magnitude, depth, latitude, longitude)
                 st.success("📝 Prediction logged successfully!")
+                
+                cache_stats = cache.stats()
+                st.caption(f"⚡ Prediction cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses "
+                           f"({cache_stats['hit_rate']:.0%} hit rate)")
+                if shadow is not None:
+                    shadow_stats = shadow.stats()
+                    agreement = shadow_stats['agreement_rate']
+                    st.caption(f"🌓 Shadow model {shadow_stats['candidate']}: {shadow_stats['scored']} scored, "
+                               f"{'n/a' if agreement is None else f'{agreement:.0%}'} agreement")
 
+@fragment
 def create_analysis_tab():
     """Create analytics and historical data tab"""
     st.markdown('<div class="sub-header">📈 Predictive Analytics & Insights</div>', unsafe_allow_html=True)
     
+    # Running aggregates are maintained as predictions are logged, so this
+    # tab never has to scan the full log history
     try:
-        log_df = pd.read_csv("Prediction_Log.csv")
-        if log_df.empty:
-            st.info("📊 Analytics data will appear here after making predictions in the AI Prediction tab.")
-            st.markdown("""
-            <div style="text-align: center; padding: 2rem; background: rgba(45,45,45,0.8); border-radius: 10px; border: 1px solid #404040;">
-                <h3 style="color: #ffffff;">No Data Available Yet</h3>
-                <p style="color: #cccccc;">Make your first prediction in the AI Prediction tab to see analytics here!</p>
-            </div>
-            """, unsafe_allow_html=True)
-            return
-            
-        log_df['Timestamp'] = pd.to_datetime(log_df['Timestamp'])
-        
-        # Overview metrics
-        col1, col2, col3, col4 = st.columns(4)
-        
-        with col1:
-            total_predictions = len(log_df)
-            st.metric("Total Predictions", total_predictions)
-        
-        with col2:
-            avg_confidence = safe_mean(log_df['AI_Confidence'])
-            st.metric("Average Confidence", f"{avg_confidence:.1f}%")
-        
-        with col3:
-            most_common = safe_mode(log_df['AI_Prediction'])
-            st.metric("Most Predicted", most_common)
-        
-        with col4:
-            recent_activity = safe_max(log_df['Timestamp'])
-            if recent_activity != "N/A":
-                st.metric("Last Activity", recent_activity.strftime('%Y-%m-%d'))
-            else:
-                st.metric("Last Activity", "N/A")
-        
-        # Create analysis tabs
-        analysis_tab1, analysis_tab2, analysis_tab3 = st.tabs(["📊 Disaster Distribution", "📈 Confidence Trends", "🔍 Parameter Analysis"])
-        
-        with analysis_tab1:
-            col1, col2 = st.columns([2, 1])
-            
-            with col1:
-                # Disaster type distribution
-                disaster_counts = log_df['AI_Prediction'].value_counts()
-                fig1 = px.pie(disaster_counts, 
-                             values=disaster_counts.values, 
-                             names=disaster_counts.index,
-                             title="Distribution of Predicted Disasters",
-                             color_discrete_sequence=px.colors.qualitative.Set3)
-                fig1.update_layout(
-                    plot_bgcolor='rgba(0,0,0,0)',
-                    paper_bgcolor='rgba(0,0,0,0)',
-                    font_color='white',
-                    title_font_color='white'
-                )
-                st.plotly_chart(fig1, use_container_width=True)
-            
-            with col2:
-                st.markdown("#### 📋 Prediction Statistics")
-                st.dataframe(disaster_counts.reset_index().rename(
-                    columns={'index': 'Disaster', 'AI_Prediction': 'Count'}
-                ), use_container_width=True, hide_index=True)
-        
-        with analysis_tab2:
-            # Confidence over time
-            fig2 = px.line(log_df, x='Timestamp', y='AI_Confidence', 
-                          color='AI_Prediction',
-                          title="Prediction Confidence Over Time",
-                          labels={'AI_Confidence': 'Confidence (%)', 'Timestamp': 'Date'},
-                          height=500)
-            fig2.update_layout(
-                plot_bgcolor='rgba(0,0,0,0)',
-                paper_bgcolor='rgba(0,0,0,0)',
-                font_color='white',
-                title_font_color='white',
-                legend_font_color='white'
-            )
-            st.plotly_chart(fig2, use_container_width=True)
-        
-        with analysis_tab3:
-            # Parameter correlations
-            numeric_cols = ['Rainfall_mm', 'Humidity_%', 'Temperature_C', 'Wind_Speed_kmph', 'AI_Confidence']
-            # Only use columns that exist in the dataframe
-            available_cols = [col for col in numeric_cols if col in log_df.columns]
-            if available_cols:
-                corr_matrix = log_df[available_cols].corr()
-                
-                fig3 = px.imshow(corr_matrix,
-                               title="Environmental Parameter Correlations",
-                               labels=dict(x="Parameters", y="Parameters", color="Correlation"),
-                               color_continuous_scale='RdBu_r',
-                               aspect="auto")
-                fig3.update_layout(
-                    plot_bgcolor='rgba(0,0,0,0)',
-                    paper_bgcolor='rgba(0,0,0,0)',
-                    font_color='white',
-                    title_font_color='white'
-                )
-                st.plotly_chart(fig3, use_container_width=True)
-            else:
-                st.info("No numeric data available for correlation analysis.")
-            
-    except FileNotFoundError:
+        stats = get_aggregates()
+    except Exception as e:
+        st.error(f"Error loading analytics data: {str(e)}")
+        st.info("Please make a new prediction to generate analytics data.")
+        return
+    if stats.count == 0:
         st.info("📊 Analytics data will appear here after making predictions in the AI Prediction tab.")
         st.markdown("""
         <div style="text-align: center; padding: 2rem; background: rgba(45,45,45,0.8); border-radius: 10px; border: 1px solid #404040;">
@@ -1079,6 +953,103 @@ def create_analysis_tab():
             <p style="color: #cccccc;">Make your first prediction in the AI Prediction tab to see analytics here!</p>
         </div>
         """, unsafe_allow_html=True)
+        return
+    
+    # Overview metrics
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        st.metric("Total Predictions", stats.count)
+    
+    with col2:
+        avg_confidence = stats.mean_of('AI_Confidence')
+        st.metric("Average Confidence", f"{avg_confidence:.1f}%")
+    
+    with col3:
+        st.metric("Most Predicted", stats.most_common())
+    
+    with col4:
+        if stats.last_timestamp:
+            st.metric("Last Activity", pd.to_datetime(stats.last_timestamp).strftime('%Y-%m-%d'))
+        else:
+            st.metric("Last Activity", "N/A")
+    
+    # Only the selected view is built, and its figure is reused until new predictions arrive
+    view = st.radio("Analysis view", ANALYSIS_VIEWS, horizontal=True, key="analysis_view",
+                    label_visibility="collapsed")
+    stats_key = (stats.count, stats.last_timestamp)
+    
+    if view == ANALYSIS_VIEWS[0]:
+        col1, col2 = st.columns([2, 1])
+        
+        with col1:
+            st.plotly_chart(build_analysis_figure(view, stats_key, stats), use_container_width=True)
+        
+        with col2:
+            st.markdown("#### 📋 Prediction Statistics")
+            disaster_counts = pd.Series(stats.class_counts, name='Count').sort_values(ascending=False)
+            st.dataframe(disaster_counts.rename_axis('Disaster').reset_index(),
+                         use_container_width=True, hide_index=True)
+    
+    elif view == ANALYSIS_VIEWS[1]:
+        st.plotly_chart(build_analysis_figure(view, stats_key, stats), use_container_width=True)
+        if stats.count > len(stats.recent):
+            st.caption(f"Showing the {len(stats.recent)} most recent of {stats.count} predictions")
+    
+    else:
+        if stats.n > 1:
+            st.plotly_chart(build_analysis_figure(view, stats_key, stats), use_container_width=True)
+        else:
+            st.info("No numeric data available for correlation analysis.")
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def build_analysis_figure(view, stats_key, _stats):
+    """Plotly figure for one analytics view; stats_key changes whenever new predictions are logged"""
+    px = plotly_express()
+    stats = _stats
+    
+    if view == ANALYSIS_VIEWS[0]:
+        # Disaster type distribution
+        disaster_counts = pd.Series(stats.class_counts, name='Count').sort_values(ascending=False)
+        fig = px.pie(disaster_counts, 
+                     values=disaster_counts.values, 
+                     names=disaster_counts.index,
+                     title="Distribution of Predicted Disasters",
+                     color_discrete_sequence=px.colors.qualitative.Set3)
+        fig.update_layout(
+            plot_bgcolor='rgba(0,0,0,0)',
+            paper_bgcolor='rgba(0,0,0,0)',
+            font_color='white',
+            title_font_color='white'
+        )
+    elif view == ANALYSIS_VIEWS[1]:
+        # Confidence over time for the most recent predictions
+        fig = px.line(stats.recent_frame(), x='Timestamp', y='AI_Confidence', 
+                      color='AI_Prediction',
+                      title="Prediction Confidence Over Time",
+                      labels={'AI_Confidence': 'Confidence (%)', 'Timestamp': 'Date'},
+                      height=500)
+        fig.update_layout(
+            plot_bgcolor='rgba(0,0,0,0)',
+            paper_bgcolor='rgba(0,0,0,0)',
+            font_color='white',
+            title_font_color='white',
+            legend_font_color='white'
+        )
+    else:
+        # Parameter correlations from the streaming covariance matrix
+        fig = px.imshow(stats.correlation(),
+                        title="Environmental Parameter Correlations",
+                        labels=dict(x="Parameters", y="Parameters", color="Correlation"),
+                        color_continuous_scale='RdBu_r',
+                        aspect="auto")
+        fig.update_layout(
+            plot_bgcolor='rgba(0,0,0,0)',
+            paper_bgcolor='rgba(0,0,0,0)',
+            font_color='white',
+            title_font_color='white'
+        )
+    return fig
 
 def create_preparedness_tab():
     """Create emergency preparedness guide tab"""
@@ -1216,9 +1187,9 @@ def create_settings_tab():
         """)
 
 def log_prediction(logic_guess, predicted_disaster, confidence, 
-                   rain, humidity, temp, wind, soil, magnitude, depth):
-    """Log prediction to CSV file"""
-    log_entry = pd.DataFrame([{
+                   rain, humidity, temp, wind, soil, magnitude, depth, latitude=None, longitude=None):
+    """Append prediction to the prediction log"""
+    get_log_sink().append({
         "Timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
         "Logic_Assessment": logic_guess,
         "AI_Prediction": predicted_disaster,
@@ -1229,47 +1200,32 @@ def log_prediction(logic_guess, predicted_disaster, confidence,
         "Wind_Speed_kmph": wind,
         "Soil_Moisture_%": soil,
         "Magnitude": magnitude,
-        "Depth_km": depth
-    }])
-    
-    try:
-        existing_log = pd.read_csv("Prediction_Log.csv")
-        updated_log = pd.concat([existing_log, log_entry], ignore_index=True)
-    except FileNotFoundError:
-        updated_log = log_entry
-    
-    updated_log.to_csv("Prediction_Log.csv", index=False)
+        "Depth_km": depth,
+        "Latitude": latitude,
+        "Longitude": longitude
+    })
 
 def main():
-    # Load model
-    model, label_encoder, scaler, FEATURES = load_model()
+    # Stop early when no model has been trained; tabs load the current version themselves
+    load_model()
     
     # Main header
     st.markdown('<h1 class="main-header">🌍 AI Disaster Prediction System</h1>', unsafe_allow_html=True)
     st.markdown("<p style='text-align: center; font-size: 1.2rem; color: #cccccc;'>Advanced AI-powered disaster prediction with real-time monitoring and emergency guidance</p>", unsafe_allow_html=True)
     
-    # Create main navigation tabs
-    tab1, tab2, tab3, tab4, tab5 = st.tabs([
-        "🌐 Dashboard", 
-        "🔮 AI Prediction", 
-        "📊 Analytics", 
-        "🛡️ Preparedness", 
-        "⚙️ Settings"
-    ])
+    # Main navigation: unlike st.tabs, only the selected tab's body runs
+    active_tab = st.radio("Navigation", TAB_NAMES, horizontal=True, key="active_tab",
+                          label_visibility="collapsed")
     
-    with tab1:
+    if active_tab == TAB_NAMES[0]:
         create_dashboard_tab()
-    
-    with tab2:
-        create_prediction_tab(model, label_encoder, scaler, FEATURES)
-    
-    with tab3:
+    elif active_tab == TAB_NAMES[1]:
+        create_prediction_tab()
+    elif active_tab == TAB_NAMES[2]:
         create_analysis_tab()
-    
-    with tab4:
+    elif active_tab == TAB_NAMES[3]:
         create_preparedness_tab()
-    
-    with tab5:
+    else:
         create_settings_tab()
     
     # Footer
@@ -0,0 +1,150 @@
+# geojson_stream.py
+import io
+import json
+import re
+
+import numpy as np
+
+CATALOG_COLUMNS = ('mag', 'depth', 'lon', 'lat', 'time')
+
+_NON_WHITESPACE = re.compile(r'[^ \t\n\r]')
+# Characters that can still extend a number, e.g. the "e-" of an exponent split from its digits
+_NUMBER_TAIL = re.compile(r'[0-9eE.+-]*\Z')
+
+class _StreamBuffer:
+    """Sliding text window over a stream that decodes one JSON value at a time"""
+
+    def __init__(self, stream, chunk_size):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.text = ''
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self):
+        chunk = self.stream.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        # Drop consumed text so memory stays bounded by the largest single value
+        self.text = self.text[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Next non-whitespace character, or '' at end of stream"""
+        while True:
+            match = _NON_WHITESPACE.search(self.text, self.pos)
+            if match:
+                self.pos = match.start()
+                return self.text[self.pos]
+            self.pos = len(self.text)
+            if not self._fill():
+                return ''
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"Expected {char!r} at offset {self.pos} in GeoJSON stream")
+        self.pos += 1
+
+    def value(self):
+        """Decode the next complete JSON value, reading more input as needed"""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.text, self.pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # A number at the very end of the buffer may continue in the next chunk
+            if (isinstance(value, (int, float)) and not self.eof and _NUMBER_TAIL.match(self.text, end)
+                    and self._fill()):
+                continue
+            self.pos = end
+            return value
+
+def iter_features(source, chunk_size=1 << 20, on_metadata=None):
+    """Yield features from a GeoJSON FeatureCollection one at a time in bounded memory
+
+    ``source`` is a path or a text/binary file object. ``on_metadata`` is called
+    with the collection's metadata object if it appears before the features,
+    as it does in USGS responses.
+    """
+    if isinstance(source, (str, bytes)) or hasattr(source, '__fspath__'):
+        with open(source, encoding='utf-8') as f:
+            yield from iter_features(f, chunk_size, on_metadata)
+        return
+    if isinstance(source.read(0), bytes):
+        source = io.TextIOWrapper(source, encoding='utf-8')
+
+    buf = _StreamBuffer(source, chunk_size)
+    buf.expect('{')
+    while buf.peek() != '}':
+        key = buf.value()
+        buf.expect(':')
+        if key == 'features':
+            buf.expect('[')
+            while buf.peek() != ']':
+                yield buf.value()
+                if buf.peek() == ',':
+                    buf.pos += 1
+            buf.pos += 1
+        else:
+            value = buf.value()
+            if key == 'metadata' and on_metadata is not None:
+                on_metadata(value)
+        if buf.peek() == ',':
+            buf.pos += 1
+        elif buf.peek() == '':
+            raise ValueError("Unexpected end of GeoJSON stream")
+
+class CatalogBuilder:
+    """Column arrays for earthquake events, grown ahead of time when counts are known"""
+
+    def __init__(self, capacity=0):
+        self.size = 0
+        self.columns = {
+            name: np.empty(capacity, dtype=np.int64 if name == 'time' else np.float64)
+            for name in CATALOG_COLUMNS
+        }
+
+    def reserve(self, extra):
+        """Make room for at least `extra` more events"""
+        needed = self.size + extra
+        capacity = len(self.columns['mag'])
+        if needed > capacity:
+            new_capacity = max(needed, capacity * 2)
+            for name, array in self.columns.items():
+                grown = np.empty(new_capacity, dtype=array.dtype)
+                grown[:self.size] = array[:self.size]
+                self.columns[name] = grown
+
+    def add_feature(self, feature):
+        if self.size == len(self.columns['mag']):
+            self.reserve(max(1024, self.size))
+        i = self.size
+        coords = feature['geometry']['coordinates']
+        props = feature['properties']
+        mag = props.get('mag')
+        self.columns['mag'][i] = np.nan if mag is None else mag
+        self.columns['lon'][i] = coords[0]
+        self.columns['lat'][i] = coords[1]
+        self.columns['depth'][i] = coords[2] if len(coords) > 2 and coords[2] is not None else np.nan
+        self.columns['time'][i] = props.get('time') or 0
+        self.size += 1
+
+    def result(self):
+        return {name: array[:self.size] for name, array in self.columns.items()}
+
+def read_catalog(sources, capacity=0, chunk_size=1 << 20):
+    """Stream one or more GeoJSON catalogs into mag/depth/lon/lat/time arrays"""
+    if isinstance(sources, (str, bytes)) or hasattr(sources, 'read'):
+        sources = [sources]
+    builder = CatalogBuilder(capacity)
+    on_metadata = lambda meta: builder.reserve(int(meta.get('count', 0)))
+    for source in sources:
+        for feature in iter_features(source, chunk_size, on_metadata):
+            builder.add_feature(feature)
+    return builder.result()
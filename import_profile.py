@@ -0,0 +1,143 @@
+# import_profile.py
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+DEFAULT_MODULE = "disaster_app"
+
+# Runs in a fresh interpreter; AppTest executes the script the way `streamlit run` does
+_RENDER_SNIPPET = """
+import json, time
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file({path!r}, default_timeout=120)
+start = time.perf_counter()
+app.run()
+print(json.dumps({{'first_render_ms': (time.perf_counter() - start) * 1000,
+                  'exceptions': [e.value for e in app.exception]}}))
+"""
+
+def parse_importtime(stderr):
+    """Top-level package -> exclusive import time (ms) from `python -X importtime` output
+
+    A package is charged for its own modules but not for other packages it
+    imports, so the values add up to the total import time.
+    """
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Nested imports are indented two spaces per level under the import that triggered them
+        name = name[1:].rstrip()
+        level = (len(name) - len(name.lstrip(" "))) // 2
+        entries.append((level, name.strip().split(".")[0], int(cumulative) / 1000))
+
+    # Parents are printed after their children, so walk backwards to see them first
+    packages = {}
+    stack = []
+    for level, root, cumulative in reversed(entries):
+        del stack[level:]
+        parent_root, owner = stack[-1] if stack else (None, None)
+        if root != parent_root:
+            packages[root] = packages.get(root, 0.0) + cumulative
+            if owner is not None:
+                packages[owner] -= cumulative
+            owner = root
+        stack.append((root, owner))
+    return packages
+
+def profile_once(module, cwd):
+    """Import `module` in a fresh interpreter; returns wall time and per-package import times"""
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          cwd=cwd, capture_output=True, text=True)
+    wall_ms = (time.perf_counter() - start) * 1000
+    if proc.returncode != 0:
+        tail = proc.stderr.strip().splitlines()[-1:] or ["unknown error"]
+        raise RuntimeError(f"Importing {module} failed: {tail[0]}")
+    packages = parse_importtime(proc.stderr)
+    return {'process_ms': wall_ms, 'import_ms': sum(packages.values()), 'packages': packages}
+
+def render_once(path, cwd):
+    """Time the first full run of a Streamlit script in a fresh interpreter"""
+    proc = subprocess.run([sys.executable, "-c", _RENDER_SNIPPET.format(path=os.path.abspath(path))],
+                          cwd=cwd, capture_output=True, text=True)
+    lines = proc.stdout.strip().splitlines()
+    if proc.returncode != 0 or not lines:
+        raise RuntimeError(f"Rendering {path} failed: {proc.stderr.strip()[-300:]}")
+    return json.loads(lines[-1])
+
+def profile(module=DEFAULT_MODULE, repeat=3, render=False, cwd=None):
+    """Median process start, import and (optionally) first-render times over `repeat` runs"""
+    runs = [profile_once(module, cwd) for _ in range(repeat)]
+    names = set().union(*(run['packages'] for run in runs))
+    result = {
+        'module': module,
+        'process_ms': statistics.median(run['process_ms'] for run in runs),
+        'import_ms': statistics.median(run['import_ms'] for run in runs),
+        'packages': {
+            name: statistics.median(run['packages'].get(name, 0.0) for run in runs) for name in names
+        },
+    }
+    if render:
+        renders = [render_once(f"{module.replace('.', os.sep)}.py", cwd) for _ in range(repeat)]
+        result['first_render_ms'] = statistics.median(r['first_render_ms'] for r in renders)
+        result['render_exceptions'] = renders[-1]['exceptions']
+    return result
+
+def compare(current, baseline, tolerance):
+    """Metrics that got slower than baseline by more than `tolerance` (a fraction)"""
+    regressions = []
+    for metric in ('process_ms', 'import_ms', 'first_render_ms'):
+        if metric in current and metric in baseline and current[metric] > baseline[metric] * (1 + tolerance):
+            regressions.append((metric, baseline[metric], current[metric]))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize `python -X importtime` for the app's cold start")
+    parser.add_argument("--module", default=DEFAULT_MODULE)
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement; medians are reported")
+    parser.add_argument("--top", type=int, default=15, help="Slowest top-level packages to list")
+    parser.add_argument("--render", action="store_true", help="Also time the first full Streamlit run")
+    parser.add_argument("--save", metavar="JSON", help="Write the results, e.g. as a new baseline")
+    parser.add_argument("--baseline", metavar="JSON", help="Fail if slower than this saved profile")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown against the baseline")
+    args = parser.parse_args()
+
+    cwd = os.path.dirname(os.path.abspath(__file__))
+    try:
+        result = profile(args.module, args.repeat, args.render, cwd)
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        raise SystemExit(1)
+
+    print(f"⚡ {args.module}: process start {result['process_ms']:.0f} ms, imports {result['import_ms']:.0f} ms")
+    if 'first_render_ms' in result:
+        print(f"⚡ First render: {result['first_render_ms']:.0f} ms")
+        if result['render_exceptions']:
+            print(f"⚠️ Render raised: {result['render_exceptions']}")
+    print("\n📋 Slowest top-level imports:")
+    for name, ms in sorted(result['packages'].items(), key=lambda item: -item[1])[:args.top]:
+        print(f"   {name:30s} {ms:8.1f} ms")
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+        print(f"📁 Saved profile to {args.save}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(result, baseline, args.tolerance)
+        for metric, before, after in regressions:
+            print(f"❌ {metric} regressed: {before:.0f} ms -> {after:.0f} ms")
+        if regressions:
+            raise SystemExit(1)
+        print(f"✅ Within {args.tolerance:.0%} of baseline")
+
+if __name__ == "__main__":
+    main()
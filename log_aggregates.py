@@ -0,0 +1,276 @@
+# log_aggregates.py
+import copy
+import json
+import os
+import threading
+import time
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from spatial_index import merge_regions, summarize_regions
+
+try:
+    import fcntl
+except ImportError:  # Windows has no fcntl; fall back to an in-process lock
+    fcntl = None
+
+STATS_COLUMNS = ['Rainfall_mm', 'Humidity_%', 'Temperature_C', 'Wind_Speed_kmph', 'AI_Confidence']
+LOCATION_COLUMNS = ['Latitude', 'Longitude']
+RECENT_LIMIT = 500
+
+class RunningStats:
+    """Mergeable running statistics over prediction log rows"""
+
+    def __init__(self, columns=STATS_COLUMNS, recent_limit=RECENT_LIMIT):
+        self.columns = list(columns)
+        self.recent_limit = recent_limit
+        self.count = 0
+        self.class_counts = Counter()
+        self.last_timestamp = None
+        # Welford/Chan state over complete numeric rows: mean vector and co-moment matrix
+        self.n = 0
+        self.mean = np.zeros(len(self.columns))
+        self.comoment = np.zeros((len(self.columns), len(self.columns)))
+        # Most recent (Timestamp, AI_Prediction, AI_Confidence) points for trend charts
+        self.recent = []
+        # Per-region prediction and risk counts for located rows (see spatial_index.py)
+        self.regions = {}
+
+    def update_frame(self, df):
+        """Fold a batch of log rows into the statistics"""
+        if df.empty:
+            return
+        batch = RunningStats(self.columns, self.recent_limit)
+        batch.count = len(df)
+        if 'AI_Prediction' in df.columns:
+            batch.class_counts = Counter(df['AI_Prediction'].dropna().astype(str).value_counts().to_dict())
+
+        if 'Timestamp' in df.columns:
+            timestamps = pd.to_datetime(df['Timestamp'], errors='coerce')
+            valid = timestamps.notna()
+            if valid.any():
+                batch.last_timestamp = timestamps[valid].max().strftime('%Y-%m-%d %H:%M:%S')
+                tail = df[valid].assign(Timestamp=timestamps[valid]).sort_values('Timestamp')
+                tail = tail.tail(self.recent_limit)
+                batch.recent = [
+                    [ts.strftime('%Y-%m-%d %H:%M:%S'), str(pred), float(conf)]
+                    for ts, pred, conf in zip(tail['Timestamp'],
+                                              tail.get('AI_Prediction', pd.Series('Unknown', index=tail.index)),
+                                              tail.get('AI_Confidence', pd.Series(0.0, index=tail.index)))
+                ]
+
+        if all(col in df.columns for col in LOCATION_COLUMNS + ['AI_Prediction']):
+            batch.regions = summarize_regions(df['Latitude'], df['Longitude'], df['AI_Prediction'],
+                                              df.get('AI_Confidence', 0))
+
+        numeric = df.reindex(columns=self.columns).apply(pd.to_numeric, errors='coerce')
+        values = numeric.dropna().to_numpy(dtype=float)
+        if len(values):
+            batch.n = len(values)
+            batch.mean = values.mean(axis=0)
+            centered = values - batch.mean
+            batch.comoment = centered.T @ centered
+
+        self.merge(batch)
+
+    def update_rows(self, rows):
+        """Fold a list of log row dicts into the statistics"""
+        if rows:
+            self.update_frame(pd.DataFrame(rows))
+
+    def merge(self, other):
+        """Combine another set of statistics into this one (Chan et al. parallel update)"""
+        self.count += other.count
+        self.class_counts.update(other.class_counts)
+        if other.last_timestamp and (self.last_timestamp is None or other.last_timestamp > self.last_timestamp):
+            self.last_timestamp = other.last_timestamp
+
+        if other.n:
+            total = self.n + other.n
+            delta = other.mean - self.mean
+            self.mean = self.mean + delta * other.n / total
+            self.comoment = self.comoment + other.comoment + np.outer(delta, delta) * self.n * other.n / total
+            self.n = total
+
+        if other.recent:
+            self.recent = sorted(self.recent + other.recent, key=lambda point: point[0])[-self.recent_limit:]
+        if other.regions:
+            merge_regions(self.regions, other.regions)
+
+    def copy(self):
+        # Region summaries are nested dicts that merge() updates in place
+        return RunningStats.from_dict(copy.deepcopy(self.to_dict()))
+
+    def mean_of(self, column):
+        """Running mean of a numeric column, 0 when there is no data"""
+        return float(self.mean[self.columns.index(column)]) if self.n else 0
+
+    def most_common(self):
+        """Most frequently predicted class, or "N/A" when empty"""
+        if not self.class_counts:
+            return "N/A"
+        top = max(self.class_counts.values())
+        return min(name for name, count in self.class_counts.items() if count == top)
+
+    def correlation(self):
+        """Pearson correlation matrix over the numeric columns"""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            std = np.sqrt(np.diag(self.comoment))
+            corr = self.comoment / np.outer(std, std)
+        return pd.DataFrame(corr, index=self.columns, columns=self.columns)
+
+    def recent_frame(self):
+        """Recent points as a DataFrame with a parsed Timestamp column"""
+        df = pd.DataFrame(self.recent, columns=['Timestamp', 'AI_Prediction', 'AI_Confidence'])
+        df['Timestamp'] = pd.to_datetime(df['Timestamp'])
+        return df
+
+    def to_dict(self):
+        return {
+            'columns': self.columns,
+            'recent_limit': self.recent_limit,
+            'count': self.count,
+            'class_counts': dict(self.class_counts),
+            'last_timestamp': self.last_timestamp,
+            'n': self.n,
+            'mean': self.mean.tolist(),
+            'comoment': self.comoment.tolist(),
+            'recent': self.recent,
+            'regions': self.regions,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls(data['columns'], data['recent_limit'])
+        stats.count = data['count']
+        stats.class_counts = Counter(data['class_counts'])
+        stats.last_timestamp = data['last_timestamp']
+        stats.n = data['n']
+        stats.mean = np.array(data['mean'], dtype=float)
+        stats.comoment = np.array(data['comoment'], dtype=float)
+        stats.recent = data['recent']
+        # Snapshots written before regions were tracked have none
+        stats.regions = data.get('regions', {})
+        return stats
+
+class AggregateStore:
+    """Materialized log aggregates persisted as a JSON snapshot shared between processes
+
+    Writers fold each flushed batch into the snapshot under a file lock, so
+    concurrent processes never overwrite each other's counts. Every write
+    re-reads and rewrites the whole snapshot (recent points and regions
+    included), so batches are coalesced in memory and written at most once
+    per ``write_interval`` seconds; this process's own pending rows are
+    folded in before it reads, other processes see them after the next write.
+    ``close()`` writes what is pending. The snapshot's ``count`` is the number
+    of log rows it covers, which create_aggregate_store checks against the
+    log to catch rows lost to a crash.
+    """
+
+    def __init__(self, path, write_interval=5.0):
+        self.path = path
+        self.write_interval = write_interval
+        self._lock = threading.Lock()
+        self._stats = RunningStats()
+        self._version = None
+        self._pending = None
+        self._last_write = 0.0
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def snapshot_count(self):
+        """Log rows the snapshot on disk covers, or None when it is missing or unreadable"""
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                return int(json.load(f)['count'])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def rebuild(self, chunks):
+        """Replace the snapshot with statistics computed from an iterable of log DataFrames"""
+        stats = RunningStats()
+        for chunk in chunks:
+            stats.update_frame(chunk)
+        with self._lock, _FileLock(f"{self.path}.lock"):
+            # The rebuild read the log, which already holds any pending rows
+            self._pending = None
+            self._write(stats)
+
+    def add_rows(self, rows):
+        """Fold freshly written log rows into the snapshot, writing it once the interval has passed"""
+        batch = RunningStats()
+        batch.update_rows(rows)
+        with self._lock:
+            if self._pending is None:
+                self._pending = batch
+            else:
+                self._pending.merge(batch)
+            due = time.monotonic() - self._last_write >= self.write_interval
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Write coalesced pending rows into the snapshot"""
+        with self._lock:
+            if self._pending is None:
+                return
+            with _FileLock(f"{self.path}.lock"):
+                merged = self._read()
+                merged.merge(self._pending)
+                self._write(merged)
+            self._pending = None
+            self._last_write = time.monotonic()
+
+    def close(self):
+        """Write pending rows; called at exit after the log's last flush"""
+        self.flush()
+
+    def current(self):
+        """Current aggregates, reloading the snapshot only when another write changed it"""
+        self.flush()
+        with self._lock:
+            version = self._stat()
+            if version != self._version:
+                self._stats = self._read()
+                self._version = version
+            return self._stats.copy()
+
+    def _stat(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size, st.st_ino
+
+    def _read(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                return RunningStats.from_dict(json.load(f))
+        except FileNotFoundError:
+            return RunningStats()
+
+    def _write(self, stats):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(stats.to_dict(), f)
+        os.replace(tmp_path, self.path)
+        self._stats = stats
+        self._version = self._stat()
+
+class _FileLock:
+    def __init__(self, path):
+        self.path = path
+
+    def __enter__(self):
+        self._file = open(self.path, 'a')
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        self._file.close()
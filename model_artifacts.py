@@ -0,0 +1,170 @@
+# model_artifacts.py
+import hashlib
+import os
+import threading
+import time
+
+import numpy as np
+
+from model_bundle import BUNDLE_PATH, ModelBundle, read_header, write_bundle
+from model_registry import default_registry
+from tree_engine import FLAT_MODEL_PATH, RAW_MODEL_PATH, FlatForest
+
+MODEL_PATH = "enhanced_rf_model.pkl"
+LABEL_ENCODER_PATH = "enhanced_label_encoder.pkl"
+SCALER_PATH = "feature_scaler.pkl"
+FEATURES_PATH = "feature_names.pkl"
+
+def save_artifacts(model, label_encoder, scaler, features):
+    """Save the trained model and preprocessing objects"""
+    import joblib
+
+    joblib.dump(model, MODEL_PATH)
+    joblib.dump(label_encoder, LABEL_ENCODER_PATH)
+    joblib.dump(scaler, SCALER_PATH)
+    joblib.dump(features, FEATURES_PATH)
+    FlatForest.from_sklearn(model).save(FLAT_MODEL_PATH)
+    # A raw-input export and bundle belong to the previous model; they are
+    # re-created by export_raw_input_model and save_bundle
+    for path in (RAW_MODEL_PATH, BUNDLE_PATH):
+        if os.path.exists(path):
+            os.remove(path)
+
+def save_bundle(metadata=None, path=BUNDLE_PATH):
+    """Package the artifacts load_artifacts would use into one memory-mappable file
+
+    Returns the bundle fingerprint. Without new metadata, an existing bundle's
+    metadata is carried over.
+    """
+    import joblib
+
+    if metadata is None and os.path.exists(path):
+        metadata = read_header(path)[0]['metadata']
+    model_path, scaler_path, label_encoder_path, features_path = _artifact_paths(include_bundle=False)
+    model = FlatForest.load(model_path) if model_path.endswith(".npz") else \
+        FlatForest.from_sklearn(joblib.load(model_path))
+    scaler = joblib.load(SCALER_PATH)
+    label_encoder = joblib.load(label_encoder_path)
+    features = joblib.load(features_path)
+    return write_bundle(path, model, label_encoder.classes_, features, scaler.mean_, scaler.scale_,
+                        raw_input=scaler_path is None, metadata=metadata)
+
+def _artifact_paths(include_bundle=True):
+    """Model, scaler (None when folded into the model), label encoder and features paths"""
+    # A bundle holds everything in one memory-mapped file; the registry's
+    # current version takes precedence over a loose one
+    if include_bundle:
+        version = default_registry().current_version()
+        if version is not None:
+            return default_registry().bundle_path(version), None, None, None
+        if os.path.exists(BUNDLE_PATH):
+            return BUNDLE_PATH, None, None, None
+    # The scaler-folded export skips scaling entirely; the flat-array export
+    # predicts identically to the pickled forest, much faster for single rows
+    # and at the same speed for batches, which reuse scikit-learn's compiled traversal
+    if os.path.exists(RAW_MODEL_PATH):
+        return RAW_MODEL_PATH, None, LABEL_ENCODER_PATH, FEATURES_PATH
+    if os.path.exists(FLAT_MODEL_PATH):
+        return FLAT_MODEL_PATH, SCALER_PATH, LABEL_ENCODER_PATH, FEATURES_PATH
+    return MODEL_PATH, SCALER_PATH, LABEL_ENCODER_PATH, FEATURES_PATH
+
+def load_artifacts():
+    """Load the trained model and preprocessing objects; raises FileNotFoundError if missing
+
+    The returned scaler is None when the model takes raw features directly.
+    """
+    model_path, scaler_path, label_encoder_path, features_path = _artifact_paths()
+    if label_encoder_path is None:
+        bundle = ModelBundle(model_path)
+        return bundle.model, bundle.label_encoder, bundle.scaler, bundle.features
+
+    # Only the separate-file formats need joblib, which is slow to import
+    import joblib
+
+    model = FlatForest.load(model_path) if model_path.endswith(".npz") else joblib.load(model_path)
+    scaler = joblib.load(scaler_path) if scaler_path else None
+    label_encoder = joblib.load(label_encoder_path)
+    features = joblib.load(features_path)
+    return model, label_encoder, scaler, features
+
+def artifact_fingerprint():
+    """Content hash of the artifact files load_artifacts would load"""
+    paths = _artifact_paths()
+    if paths[2] is None:
+        # Computed when the bundle was written, so large bundles aren't re-read
+        return read_header(paths[0])[0]['fingerprint']
+    digest = hashlib.sha256()
+    for path in paths:
+        if path is None:
+            continue
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+    return digest.hexdigest()[:16]
+
+def predict_proba(model, scaler, X):
+    """Class probabilities for rows of raw (unscaled) features"""
+    X = np.asarray(X, dtype=np.float64)
+    if scaler is not None:
+        # Same arithmetic as StandardScaler.transform without its per-call validation
+        X = (X - scaler.mean_) / scaler.scale_
+    return model.predict_proba(X)
+
+def predict_batch(model, label_encoder, scaler, X):
+    """Predicted labels, confidences (0-100) and class probabilities for a batch of rows"""
+    probabilities = predict_proba(model, scaler, X)
+    predicted_idx = probabilities.argmax(axis=1)
+    labels = label_encoder.classes_[predicted_idx]
+    confidences = probabilities[np.arange(len(probabilities)), predicted_idx] * 100
+    return labels, confidences, probabilities
+
+class ModelHolder:
+    """Serves the registry's current model and swaps in a new one when CURRENT changes
+
+    ``current()`` returns an immutable (model, label_encoder, scaler, features,
+    fingerprint) snapshot. A swap only replaces the holder's reference, so
+    callers still holding the previous snapshot finish on the old model. If
+    CURRENT names a version that can't be loaded, the loaded model keeps
+    serving and the pointer is checked again after ``check_interval``.
+    """
+
+    def __init__(self, registry=None, check_interval=1.0, clock=time.monotonic):
+        self.registry = registry or default_registry()
+        self.check_interval = check_interval
+        self.clock = clock
+        self.version = None
+        self._snapshot = None
+        self._next_check = 0.0
+        self._failed_version = None
+        self._lock = threading.Lock()
+
+    def current(self):
+        now = self.clock()
+        if self._snapshot is None or now >= self._next_check:
+            self._next_check = now + self.check_interval
+            version = self.registry.current_version()
+            if self._snapshot is None or version != self.version:
+                with self._lock:
+                    if self._snapshot is None or version != self.version:
+                        try:
+                            self._load(version)
+                        except (OSError, ValueError) as e:
+                            if self._snapshot is None:
+                                raise
+                            if version != self._failed_version:
+                                print(f"⚠️ Keeping model {self.version}; could not load {version}: {e}")
+                            self._failed_version = version
+        return self._snapshot
+
+    def _load(self, version):
+        if version is None:
+            # Nothing published yet: use the artifacts in the working directory
+            model, label_encoder, scaler, features = load_artifacts()
+            snapshot = (model, label_encoder, scaler, features, artifact_fingerprint())
+        else:
+            bundle = ModelBundle(self.registry.bundle_path(version))
+            snapshot = (bundle.model, bundle.label_encoder, bundle.scaler, bundle.features, bundle.fingerprint)
+        if self._snapshot is not None:
+            print(f"🔄 Swapped model {self.version} -> {version}")
+        self._snapshot = snapshot
+        self.version = version
@@ -0,0 +1,168 @@
+# model_bundle.py
+import argparse
+import hashlib
+import json
+import os
+import struct
+import time
+
+import numpy as np
+
+from tree_engine import FlatForest
+
+BUNDLE_PATH = "model_bundle.bin"
+BUNDLE_MAGIC = b"DPMODEL\0"
+BUNDLE_VERSION = 1
+ALIGNMENT = 64
+
+# magic, format version, reserved, header length
+_PREFIX = struct.Struct("<8sIIQ")
+
+class BundleLabelEncoder:
+    """The parts of LabelEncoder prediction code uses, without importing scikit-learn"""
+
+    def __init__(self, classes):
+        self.classes_ = np.asarray(classes)
+
+    def transform(self, labels):
+        index = {label: i for i, label in enumerate(self.classes_)}
+        return np.array([index[label] for label in labels])
+
+    def inverse_transform(self, indices):
+        return self.classes_[np.asarray(indices)]
+
+class BundleScaler:
+    """StandardScaler parameters stored in a bundle"""
+
+    def __init__(self, mean, scale):
+        self.mean_ = mean
+        self.scale_ = scale
+
+    def transform(self, X):
+        return (np.asarray(X, dtype=np.float64) - self.mean_) / self.scale_
+
+def _aligned(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+def write_bundle(path, forest, classes, features, scaler_mean, scaler_scale, raw_input, metadata=None):
+    """Write a forest and its preprocessing into one file of aligned, uncompressed arrays
+
+    ``raw_input`` says whether the scaler is already folded into the forest's
+    thresholds; the scaler parameters are stored either way.
+    """
+    arrays = {
+        name: np.ascontiguousarray(array) for name, array in forest.arrays().items()
+        if name not in ('max_depth', 'classes')
+    }
+    arrays['forest_classes'] = np.ascontiguousarray(forest.classes_)
+    arrays['children'] = np.ascontiguousarray(forest._children)
+    arrays['is_leaf'] = np.ascontiguousarray(forest._is_leaf)
+    arrays['scaler_mean'] = np.asarray(scaler_mean, dtype=np.float64)
+    arrays['scaler_scale'] = np.asarray(scaler_scale, dtype=np.float64)
+
+    layout = {}
+    offset = 0
+    digest = hashlib.sha256()
+    for name, array in arrays.items():
+        offset = _aligned(offset)
+        layout[name] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset}
+        offset += array.nbytes
+        digest.update(name.encode())
+        digest.update(array.tobytes())
+
+    header = {
+        'format_version': BUNDLE_VERSION,
+        'features': list(features),
+        'classes': [str(c) for c in classes],
+        'max_depth': int(forest.max_depth),
+        'raw_input': bool(raw_input),
+        'metadata': metadata or {},
+        'arrays': layout,
+    }
+    digest.update(json.dumps(header, sort_keys=True, default=str).encode())
+    header['fingerprint'] = digest.hexdigest()[:16]
+    header_bytes = json.dumps(header, default=str).encode()
+    data_start = _aligned(_PREFIX.size + len(header_bytes))
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(_PREFIX.pack(BUNDLE_MAGIC, BUNDLE_VERSION, 0, len(header_bytes)))
+        f.write(header_bytes)
+        for name, array in arrays.items():
+            f.write(b"\0" * (data_start + layout[name]['offset'] - f.tell()))
+            f.write(array.tobytes())
+    # Readers that already mapped the old file keep their pages until they reopen
+    os.replace(tmp_path, path)
+    return header['fingerprint']
+
+def read_header(path=BUNDLE_PATH):
+    """Bundle header and the file offset its arrays start at; raises ValueError if it isn't a bundle"""
+    with open(path, 'rb') as f:
+        prefix = f.read(_PREFIX.size)
+        if len(prefix) < _PREFIX.size:
+            raise ValueError(f"{path} is not a model bundle")
+        magic, version, _, header_len = _PREFIX.unpack(prefix)
+        if magic != BUNDLE_MAGIC:
+            raise ValueError(f"{path} is not a model bundle")
+        if version != BUNDLE_VERSION:
+            raise ValueError(f"{path} has bundle format {version}; expected {BUNDLE_VERSION}")
+        header = json.loads(f.read(header_len))
+    return header, _aligned(_PREFIX.size + header_len)
+
+class ModelBundle:
+    """Read-only view of a bundle; arrays are memory-mapped, so processes share their pages"""
+
+    def __init__(self, path=BUNDLE_PATH):
+        self.path = path
+        self.header, data_start = read_header(path)
+        self._mmap = np.memmap(path, dtype=np.uint8, mode='r')
+        self.arrays = {}
+        for name, spec in self.header['arrays'].items():
+            dtype = np.dtype(spec['dtype'])
+            start = data_start + spec['offset']
+            count = int(np.prod(spec['shape'], dtype=np.int64))
+            self.arrays[name] = self._mmap[start:start + count * dtype.itemsize].view(dtype).reshape(spec['shape'])
+
+        self.features = self.header['features']
+        self.metadata = self.header['metadata']
+        self.fingerprint = self.header['fingerprint']
+        self.label_encoder = BundleLabelEncoder(self.header['classes'])
+        self.scaler_params = BundleScaler(self.arrays['scaler_mean'], self.arrays['scaler_scale'])
+        # A raw-input forest already applies the scaler inside its thresholds
+        self.scaler = None if self.header['raw_input'] else self.scaler_params
+        self.model = FlatForest(
+            feature=self.arrays['feature'], threshold=self.arrays['threshold'],
+            left=self.arrays['left'], right=self.arrays['right'], value=self.arrays['value'],
+            roots=self.arrays['roots'], max_depth=self.header['max_depth'],
+            classes=self.arrays['forest_classes'],
+            children=self.arrays['children'], is_leaf=self.arrays['is_leaf'],
+        )
+
+def main():
+    from model_artifacts import save_bundle
+
+    parser = argparse.ArgumentParser(description="Package the current model artifacts into a single bundle file")
+    parser.add_argument("--output", default=BUNDLE_PATH)
+    parser.add_argument("--publish", action="store_true", help="Also publish the bundle to the model registry")
+    args = parser.parse_args()
+
+    try:
+        fingerprint = save_bundle(path=args.output)
+    except FileNotFoundError:
+        print("❌ Model files not found. Please run train_model.py first.")
+        raise SystemExit(1)
+
+    start = time.perf_counter()
+    bundle = ModelBundle(args.output)
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"✅ Bundle {fingerprint} written to {args.output} "
+          f"({os.path.getsize(args.output) / 1024:.0f} KB, {bundle.model.n_estimators} trees)")
+    print(f"⚡ Opened in {elapsed:.2f} ms")
+
+    if args.publish:
+        from model_registry import default_registry
+
+        print(f"🚀 Published as version {default_registry().publish(args.output)}")
+
+if __name__ == "__main__":
+    main()
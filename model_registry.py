@@ -0,0 +1,124 @@
+# model_registry.py
+import argparse
+import os
+import shutil
+from datetime import datetime, timezone
+
+from model_bundle import BUNDLE_PATH, read_header
+
+DEFAULT_REGISTRY_DIR = "model_registry"
+BUNDLE_FILENAME = "model_bundle.bin"
+
+class ModelRegistry:
+    """Versioned model bundles on the local filesystem with a CURRENT pointer
+
+    Each version is a directory under ``versions/`` that is never modified
+    after it is published. Switching versions rewrites the small CURRENT file
+    with os.replace, so readers see either the old or the new version, never
+    a partial one.
+    """
+
+    def __init__(self, root=DEFAULT_REGISTRY_DIR):
+        self.root = root
+        self.versions_dir = os.path.join(root, "versions")
+        self.pointer_path = os.path.join(root, "CURRENT")
+
+    def versions(self):
+        """Published versions, oldest first"""
+        if not os.path.isdir(self.versions_dir):
+            return []
+        return sorted(name for name in os.listdir(self.versions_dir) if not name.startswith('.'))
+
+    def bundle_path(self, version):
+        return os.path.join(self.versions_dir, version, BUNDLE_FILENAME)
+
+    def current_version(self):
+        """Active version, or None if nothing has been published"""
+        try:
+            with open(self.pointer_path, encoding='utf-8') as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def publish(self, bundle_path=BUNDLE_PATH, activate=True):
+        """Copy a bundle in as a new version (or reuse an identical one) and optionally activate it"""
+        fingerprint = read_header(bundle_path)[0]['fingerprint']
+        existing = [v for v in self.versions() if v.endswith(f"-{fingerprint}")]
+        if existing:
+            version = existing[-1]
+        else:
+            version = f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S}-{fingerprint}"
+            # Build the version directory under a hidden name and rename it into place
+            tmp_dir = os.path.join(self.versions_dir, f".{version}.{os.getpid()}.tmp")
+            os.makedirs(tmp_dir, exist_ok=True)
+            shutil.copyfile(bundle_path, os.path.join(tmp_dir, BUNDLE_FILENAME))
+            os.replace(tmp_dir, os.path.join(self.versions_dir, version))
+        if activate:
+            self.activate(version)
+        return version
+
+    def activate(self, version):
+        """Point CURRENT at a published version; also used to roll back"""
+        if not os.path.exists(self.bundle_path(version)):
+            raise ValueError(f"Unknown model version: {version}")
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = f"{self.pointer_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(version + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.pointer_path)
+
+    def prune(self, keep=5):
+        """Delete all but the newest `keep` versions, never the active one; returns removed versions"""
+        current = self.current_version()
+        removable = [v for v in self.versions() if v != current]
+        stale = removable[:max(len(removable) - max(keep - 1, 0), 0)]
+        # Processes that still have an old bundle mapped keep reading it after deletion
+        for version in stale:
+            shutil.rmtree(os.path.join(self.versions_dir, version))
+        return stale
+
+def default_registry():
+    """Registry at DISASTER_MODEL_REGISTRY, or ./model_registry"""
+    return ModelRegistry(os.environ.get("DISASTER_MODEL_REGISTRY", DEFAULT_REGISTRY_DIR))
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage published model versions")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list", help="Show published versions")
+    publish = commands.add_parser("publish", help="Publish a model bundle and make it current")
+    publish.add_argument("bundle", nargs="?", default=BUNDLE_PATH)
+    publish.add_argument("--no-activate", action="store_true")
+    activate = commands.add_parser("activate", help="Make a published version current (roll forward or back)")
+    activate.add_argument("version")
+    prune = commands.add_parser("prune", help="Delete old versions")
+    prune.add_argument("--keep", type=int, default=5)
+    args = parser.parse_args()
+
+    registry = default_registry()
+    if args.command == "list":
+        current = registry.current_version()
+        for version in registry.versions():
+            metadata = read_header(registry.bundle_path(version))[0]['metadata']
+            accuracy = metadata.get('accuracy')
+            marker = "➡️" if version == current else "  "
+            print(f"{marker} {version}" + (f"  accuracy={accuracy}" if accuracy is not None else ""))
+        if current is None:
+            print("⚠️ No current version; run train_model.py or publish a bundle")
+    elif args.command == "publish":
+        version = registry.publish(args.bundle, activate=not args.no_activate)
+        print(f"✅ Published {version}" + ("" if args.no_activate else " and made it current"))
+    elif args.command == "activate":
+        try:
+            registry.activate(args.version)
+        except ValueError as e:
+            print(f"❌ {e}")
+            raise SystemExit(1)
+        print(f"✅ {args.version} is now current")
+    elif args.command == "prune":
+        removed = registry.prune(args.keep)
+        print(f"🗑️ Removed {len(removed)} old versions")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+# out_of_core.py
+import os
+import time
+
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import accuracy_score, classification_report
+from sklearn.preprocessing import LabelEncoder, StandardScaler
+from sklearn.tree import DecisionTreeClassifier
+
+from predict import iter_input_chunks
+
+DEFAULT_WORK_DIR = "ooc_work"
+
+class DiskDataset:
+    """Float32 feature matrix and int16 class codes memory-mapped from a work directory"""
+
+    def __init__(self, work_dir, n_rows, n_features, label_encoder, scaler):
+        self.work_dir = work_dir
+        self.X = np.memmap(os.path.join(work_dir, "X.f32"), dtype=np.float32, mode='r',
+                           shape=(n_rows, n_features))
+        self.y = np.memmap(os.path.join(work_dir, "y.i16"), dtype=np.int16, mode='r', shape=(n_rows,))
+        self.label_encoder = label_encoder
+        self.scaler = scaler
+
+    def __len__(self):
+        return len(self.y)
+
+    def scaled(self, idx):
+        """Standardized float32 rows for sorted indices"""
+        X = self.X[idx]
+        return ((X - self.scaler.mean_) / self.scaler.scale_).astype(np.float32)
+
+def stream_to_disk(path, features, target, work_dir=DEFAULT_WORK_DIR, chunksize=1_000_000):
+    """Copy a CSV/Parquet dataset into memory-mapped arrays chunk by chunk, fitting the scaler on the way"""
+    os.makedirs(work_dir, exist_ok=True)
+    scaler = StandardScaler()
+    codes = {}
+    n_rows = 0
+    with open(os.path.join(work_dir, "X.f32"), 'wb') as x_file, \
+            open(os.path.join(work_dir, "y.i16"), 'wb') as y_file:
+        for chunk in iter_input_chunks(path, chunksize):
+            chunk = chunk[features + [target]].dropna()
+            if chunk.empty:
+                continue
+            X = chunk[features].to_numpy(dtype=np.float64)
+            scaler.partial_fit(X)
+            # Labels get codes in order of first appearance and are sorted once all are known
+            uniques, inverse = np.unique(chunk[target].astype(str).to_numpy(), return_inverse=True)
+            for label in uniques:
+                codes.setdefault(label, len(codes))
+            y = np.array([codes[label] for label in uniques], dtype=np.int16)[inverse]
+            x_file.write(np.ascontiguousarray(X, dtype=np.float32).tobytes())
+            y_file.write(y.tobytes())
+            n_rows += len(chunk)
+            print(f"🔄 Streamed {n_rows} rows")
+
+    if n_rows == 0:
+        raise ValueError(f"No usable rows in {path}")
+
+    label_encoder = LabelEncoder().fit(list(codes))
+    remap = label_encoder.transform(list(codes)).astype(np.int16)
+    y = np.memmap(os.path.join(work_dir, "y.i16"), dtype=np.int16, mode='r+', shape=(n_rows,))
+    for lo in range(0, n_rows, chunksize):
+        y[lo:lo + chunksize] = remap[y[lo:lo + chunksize]]
+    y.flush()
+    del y
+    return DiskDataset(work_dir, n_rows, len(features), label_encoder, scaler)
+
+def stratified_split(y, test_size=0.2, random_state=42, chunksize=1_000_000, work_dir=DEFAULT_WORK_DIR):
+    """Stratified train/test split that only materializes row indices
+
+    Returns (train_idx, test_idx, class_offsets). Train indices are grouped by
+    class, with class c at train_idx[class_offsets[c]:class_offsets[c + 1]].
+    Each chunk contributes its share of every class to the test set, so the
+    overall class proportions match train_test_split(stratify=y).
+    """
+    rng = np.random.default_rng(random_state)
+    n_classes = int(y.max()) + 1
+    class_counts = np.zeros(n_classes, dtype=np.int64)
+    for lo in range(0, len(y), chunksize):
+        class_counts += np.bincount(y[lo:lo + chunksize], minlength=n_classes)
+    test_counts = np.floor(class_counts * test_size).astype(np.int64)
+    train_counts = class_counts - test_counts
+    class_offsets = np.concatenate([[0], np.cumsum(train_counts)])
+
+    train_idx = np.lib.format.open_memmap(os.path.join(work_dir, "train_idx.npy"), mode='w+',
+                                          dtype=np.int64, shape=(int(train_counts.sum()),))
+    test_idx = np.lib.format.open_memmap(os.path.join(work_dir, "test_idx.npy"), mode='w+',
+                                         dtype=np.int64, shape=(int(test_counts.sum()),))
+    seen = np.zeros(n_classes, dtype=np.int64)
+    train_cursor = class_offsets[:-1].copy()
+    test_cursor = 0
+    for lo in range(0, len(y), chunksize):
+        y_chunk = np.asarray(y[lo:lo + chunksize])
+        chunk_test = []
+        for c in range(n_classes):
+            rows = np.flatnonzero(y_chunk == c) + lo
+            if len(rows) == 0:
+                continue
+            # Carry rounding across chunks so the class hits its exact test count
+            n_test = int(np.floor((seen[c] + len(rows)) * test_size) - np.floor(seen[c] * test_size))
+            picked = np.zeros(len(rows), dtype=bool)
+            picked[rng.choice(len(rows), size=n_test, replace=False)] = True
+            chunk_test.append(rows[picked])
+            train_rows = rows[~picked]
+            train_idx[train_cursor[c]:train_cursor[c] + len(train_rows)] = train_rows
+            train_cursor[c] += len(train_rows)
+            seen[c] += len(rows)
+        chunk_test = np.sort(np.concatenate(chunk_test)) if chunk_test else np.empty(0, dtype=np.int64)
+        test_idx[test_cursor:test_cursor + len(chunk_test)] = chunk_test
+        test_cursor += len(chunk_test)
+    return train_idx, test_idx, class_offsets
+
+def _class_subsample(train_idx, class_offsets, max_samples, rng):
+    """Bootstrap sample of train rows with the training set's class proportions"""
+    counts = np.diff(class_offsets)
+    take = np.maximum(1, np.round(counts / counts.sum() * max_samples)).astype(np.int64)
+    take[counts == 0] = 0
+    picks = [
+        train_idx[class_offsets[c] + rng.integers(0, counts[c], take[c])]
+        for c in range(len(counts)) if take[c]
+    ]
+    return np.sort(np.concatenate(picks))
+
+def _fit_tree(dataset, train_idx, class_offsets, max_samples, tree_params, seed):
+    rng = np.random.default_rng(seed)
+    idx = _class_subsample(train_idx, class_offsets, max_samples, rng)
+    tree = DecisionTreeClassifier(random_state=seed, **tree_params)
+    tree.fit(dataset.scaled(idx), dataset.y[idx])
+    return tree
+
+def fit_bagged_forest(dataset, train_idx, class_offsets, forest_params, max_samples=200_000):
+    """Random forest whose trees are each fit on their own bounded subsample of the memmap
+
+    Peak memory is about n_jobs * max_samples rows regardless of dataset size.
+    The trees are assembled into a regular RandomForestClassifier so the rest
+    of the pipeline (artifacts, flat forest, prediction) is unchanged.
+    """
+    params = dict(forest_params)
+    n_estimators = params.pop('n_estimators')
+    random_state = params.pop('random_state', None)
+    n_jobs = params.pop('n_jobs', None)
+    tree_params = {k: v for k, v in params.items() if k not in ('bootstrap', 'max_samples', 'oob_score')}
+    tree_params.setdefault('max_features', 'sqrt')
+
+    n_classes = len(class_offsets) - 1
+    max_samples = min(max_samples, len(train_idx))
+    seeds = np.random.SeedSequence(random_state).generate_state(n_estimators)
+    trees = Parallel(n_jobs=n_jobs, prefer='threads')(
+        delayed(_fit_tree)(dataset, train_idx, class_offsets, max_samples, tree_params, int(seed))
+        for seed in seeds
+    )
+
+    # Stratified subsamples give every tree every class, so their probability columns line up
+    forest = RandomForestClassifier(n_estimators=n_estimators, random_state=random_state, n_jobs=n_jobs,
+                                    **tree_params)
+    forest.estimator_ = DecisionTreeClassifier(**tree_params)
+    forest.estimators_ = trees
+    forest.classes_ = np.arange(n_classes)
+    forest.n_classes_ = n_classes
+    forest.n_outputs_ = 1
+    forest.n_features_in_ = dataset.X.shape[1]
+    return forest
+
+def evaluate(forest, dataset, test_idx, chunksize=1_000_000):
+    """Accuracy and report on the held-out indices, predicting one chunk at a time"""
+    y_true = np.empty(len(test_idx), dtype=np.int16)
+    y_pred = np.empty(len(test_idx), dtype=np.int16)
+    for lo in range(0, len(test_idx), chunksize):
+        idx = np.asarray(test_idx[lo:lo + chunksize])
+        y_true[lo:lo + len(idx)] = dataset.y[idx]
+        y_pred[lo:lo + len(idx)] = forest.predict(dataset.scaled(idx))
+    labels = np.arange(len(dataset.label_encoder.classes_))
+    report = classification_report(y_true, y_pred, labels=labels,
+                                   target_names=dataset.label_encoder.classes_, zero_division=0)
+    return accuracy_score(y_true, y_pred), report
+
+def train_out_of_core(path, features, target, forest_params, work_dir=DEFAULT_WORK_DIR,
+                      chunksize=1_000_000, max_samples=200_000, test_size=0.2):
+    """Stream, split, fit and evaluate without ever holding the full dataset in memory"""
+    start = time.perf_counter()
+    dataset = stream_to_disk(path, features, target, work_dir, chunksize)
+    train_idx, test_idx, class_offsets = stratified_split(
+        dataset.y, test_size, forest_params.get('random_state', 42), chunksize, work_dir
+    )
+    print(f"📊 {len(dataset)} rows on disk: {len(train_idx)} train / {len(test_idx)} test")
+
+    forest = fit_bagged_forest(dataset, train_idx, class_offsets, forest_params, max_samples)
+    print(f"🌲 Fit {len(forest.estimators_)} trees on {min(max_samples, len(train_idx))}-row subsamples "
+          f"in {time.perf_counter() - start:.1f}s")
+
+    accuracy, report = evaluate(forest, dataset, test_idx, chunksize)
+    print(f"🎯 Model Accuracy: {accuracy:.4f}")
+    print("\n📋 Classification Report:")
+    print(report)
+    return forest, dataset, train_idx, accuracy
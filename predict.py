@@ -0,0 +1,112 @@
+# predict.py
+import argparse
+import os
+import time
+
+import pandas as pd
+
+from model_artifacts import load_artifacts, predict_batch
+from prediction_log import CSV_READ_OPTIONS
+from risk_scoring import score_frame
+
+def iter_input_chunks(path, chunksize):
+    """Yield DataFrame chunks from a CSV or Parquet file without loading it all"""
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(path)
+        for batch in parquet_file.iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunksize, **CSV_READ_OPTIONS)
+
+class ChunkWriter:
+    """Write result chunks to a CSV or Parquet file as they are produced"""
+
+    def __init__(self, path):
+        self.path = path
+        self._parquet_writer = None
+        self._wrote_header = False
+
+    def write(self, df):
+        if self.path.endswith(".parquet"):
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._parquet_writer is None:
+                self._parquet_writer = pq.ParquetWriter(self.path, table.schema)
+            self._parquet_writer.write_table(table)
+        else:
+            df.to_csv(self.path, mode='a' if self._wrote_header else 'w',
+                      header=not self._wrote_header, index=False)
+            self._wrote_header = True
+
+    def close(self):
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+
+def score_file(input_path, output_path, chunksize=100_000, include_probabilities=False, include_risk=False,
+               n_jobs=-1):
+    """Score every row of input_path and stream the results to output_path
+
+    Chunks are scored by compiled tree traversal on n_jobs threads; the
+    NumPy flat-forest path is only used for inputs of a few rows.
+    """
+    model, label_encoder, scaler, features = load_artifacts()
+    # Flat forests and pickled RandomForestClassifiers both parallelize over trees
+    if hasattr(model, 'n_jobs'):
+        model.n_jobs = n_jobs
+    writer = ChunkWriter(output_path)
+    total = 0
+    start = time.perf_counter()
+    try:
+        for chunk in iter_input_chunks(input_path, chunksize):
+            missing = [f for f in features if f not in chunk.columns]
+            if missing:
+                raise ValueError(f"Input is missing feature columns: {missing}")
+
+            labels, confidences, probabilities = predict_batch(
+                model, label_encoder, scaler, chunk[features].to_numpy()
+            )
+            chunk['AI_Prediction'] = labels
+            chunk['AI_Confidence'] = confidences.round(2)
+            if include_probabilities:
+                for i, disaster in enumerate(label_encoder.classes_):
+                    chunk[f'Prob_{disaster}'] = probabilities[:, i]
+            if include_risk:
+                score_frame(chunk)
+
+            writer.write(chunk)
+            total += len(chunk)
+            elapsed = time.perf_counter() - start
+            print(f"🔄 Scored {total} rows ({total / elapsed:,.0f} rows/s)")
+    finally:
+        writer.close()
+    return total
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch disaster prediction for CSV/Parquet files")
+    parser.add_argument("input", help="CSV or .parquet file with the model's feature columns")
+    parser.add_argument("output", help="Destination CSV or .parquet file")
+    parser.add_argument("--chunksize", type=int, default=100_000, help="Rows scored per chunk")
+    parser.add_argument("--probabilities", action="store_true", help="Add one probability column per class")
+    parser.add_argument("--risk", action="store_true", help="Add Risk_Level and Warnings columns")
+    parser.add_argument("--n-jobs", type=int, default=-1, help="Threads per chunk (-1 uses every CPU)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.input):
+        parser.error(f"Input file not found: {args.input}")
+
+    start = time.perf_counter()
+    try:
+        total = score_file(args.input, args.output, args.chunksize, args.probabilities, args.risk, args.n_jobs)
+    except FileNotFoundError:
+        print("❌ Model files not found. Please run train_model.py first.")
+        raise SystemExit(1)
+    elapsed = time.perf_counter() - start
+    print(f"✅ Wrote {total} predictions to {args.output} in {elapsed:.1f}s "
+          f"({total / max(elapsed, 1e-9):,.0f} rows/s)")
+
+if __name__ == "__main__":
+    main()
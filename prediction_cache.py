@@ -0,0 +1,64 @@
+# prediction_cache.py
+import threading
+import time
+from collections import OrderedDict
+
+class PredictionCache:
+    """LRU cache with a TTL for prediction results, keyed on quantized inputs and model version
+
+    Callers pass the version of the model that produced each result, so a
+    result is only ever served for that version; entries of replaced models
+    simply age out of the LRU. ``clock`` returns seconds and defaults to
+    ``time.monotonic``.
+    """
+
+    def __init__(self, max_size=4096, ttl_seconds=3600, decimals=1, clock=time.monotonic):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.decimals = decimals
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def key(self, row, model_version):
+        """Cache key for a feature row scored by the given model version"""
+        return (model_version,) + tuple(round(float(v), self.decimals) for v in row)
+
+    def get(self, row, model_version):
+        """Cached result for row under model_version, or None on a miss or expired entry"""
+        key = self.key(row, model_version)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.clock() - entry[0] <= self.ttl_seconds:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, row, model_version, result):
+        key = self.key(row, model_version)
+        with self._lock:
+            self._entries[key] = (self.clock(), result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Hit/miss counters and current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._entries),
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
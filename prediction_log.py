@@ -0,0 +1,430 @@
+# prediction_log.py
+import argparse
+import atexit
+import csv
+import os
+import sqlite3
+import threading
+import uuid
+
+import pandas as pd
+
+from log_aggregates import LOCATION_COLUMNS, STATS_COLUMNS, AggregateStore
+
+try:
+    import fcntl
+except ImportError:  # Windows has no fcntl; fall back to an in-process lock
+    fcntl = None
+
+LOG_COLUMNS = ['Timestamp', 'Logic_Assessment', 'AI_Prediction', 'AI_Confidence',
+               'Rainfall_mm', 'Humidity_%', 'Temperature_C', 'Wind_Speed_kmph',
+               'Soil_Moisture_%', 'Magnitude', 'Depth_km', 'Latitude', 'Longitude']
+
+DEFAULT_CSV_PATH = "Prediction_Log.csv"
+DEFAULT_SQLITE_PATH = "Prediction_Log.db"
+DEFAULT_PARQUET_PATH = "prediction_logs"
+
+# "None" is a real class label, so only empty fields count as missing
+CSV_READ_OPTIONS = {'keep_default_na': False, 'na_values': ['']}
+
+# Rows per chunk when scanning a whole log, e.g. to rebuild its aggregates
+READ_CHUNK_ROWS = 200_000
+
+AGGREGATE_COLUMNS = ['Timestamp', 'AI_Prediction'] + STATS_COLUMNS + LOCATION_COLUMNS
+
+NUMERIC_COLUMNS = ['AI_Confidence', 'Rainfall_mm', 'Humidity_%', 'Temperature_C',
+                   'Wind_Speed_kmph', 'Soil_Moisture_%', 'Magnitude', 'Depth_km', 'Latitude', 'Longitude']
+
+class CSVLogSink:
+    """Append-only CSV log guarded by an exclusive file lock"""
+
+    def __init__(self, path=DEFAULT_CSV_PATH, columns=LOG_COLUMNS):
+        self.path = path
+        self.columns = list(columns)
+        self._lock = threading.Lock()
+
+    def write_rows(self, rows):
+        """Append rows to the end of the file without touching existing data"""
+        if not rows:
+            return
+        with self._lock, open(self.path, 'a', newline='', encoding='utf-8') as f:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                f.seek(0, os.SEEK_END)
+                # Another process may have created the file since we opened it,
+                # so decide on the header only while holding the lock
+                if f.tell() == 0:
+                    writer = csv.DictWriter(f, fieldnames=self.columns, extrasaction='ignore')
+                    writer.writeheader()
+                else:
+                    # Logs started before a column was added keep their original layout
+                    writer = csv.DictWriter(f, fieldnames=self._header(), extrasaction='ignore')
+                writer.writerows(rows)
+                f.flush()
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    def _header(self):
+        with open(self.path, newline='', encoding='utf-8') as f:
+            return next(csv.reader(f), self.columns)
+
+    def read(self, columns=None):
+        """Read the log, optionally loading only the given columns"""
+        if columns is None:
+            return pd.read_csv(self.path, **CSV_READ_OPTIONS)
+        header = pd.read_csv(self.path, nrows=0).columns
+        return pd.read_csv(self.path, usecols=[c for c in columns if c in header], **CSV_READ_OPTIONS)
+
+    def iter_chunks(self, columns=None, chunksize=READ_CHUNK_ROWS):
+        """Read the log as DataFrames of at most chunksize rows"""
+        usecols = None
+        if columns is not None:
+            header = pd.read_csv(self.path, nrows=0).columns
+            usecols = [c for c in columns if c in header]
+        yield from pd.read_csv(self.path, usecols=usecols, chunksize=chunksize, **CSV_READ_OPTIONS)
+
+    def count_rows(self):
+        """Rows in the log, counted by line breaks since logged values never contain one"""
+        lines = 0
+        last = b'\n'
+        with open(self.path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                lines += block.count(b'\n')
+                last = block[-1:]
+        # A last row missing its line break still counts; the header doesn't
+        return max(lines + (last != b'\n') - 1, 0)
+
+class SQLiteLogSink:
+    """Append-only SQLite log using WAL mode so readers never block writers"""
+
+    def __init__(self, path=DEFAULT_SQLITE_PATH, columns=LOG_COLUMNS, table="prediction_log"):
+        self.path = path
+        self.columns = list(columns)
+        self.table = table
+        self._initialized = False
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        if not self._initialized:
+            column_defs = ", ".join(f'"{c}"' for c in self.columns)
+            conn.execute(f'CREATE TABLE IF NOT EXISTS "{self.table}" ({column_defs})')
+            # Tables created before a column was added get it appended
+            existing = {row[1] for row in conn.execute(f'PRAGMA table_info("{self.table}")')}
+            for column in self.columns:
+                if column not in existing:
+                    conn.execute(f'ALTER TABLE "{self.table}" ADD COLUMN "{column}"')
+            self._initialized = True
+        return conn
+
+    def write_rows(self, rows):
+        """Insert rows in a single transaction"""
+        if not rows:
+            return
+        placeholders = ", ".join("?" for _ in self.columns)
+        column_list = ", ".join(f'"{c}"' for c in self.columns)
+        values = [tuple(row.get(c) for c in self.columns) for row in rows]
+        conn = self._connect()
+        try:
+            with conn:
+                conn.executemany(
+                    f'INSERT INTO "{self.table}" ({column_list}) VALUES ({placeholders})', values
+                )
+        finally:
+            conn.close()
+
+    def read(self, columns=None):
+        """Read the log, optionally loading only the given columns"""
+        if not os.path.exists(self.path):
+            raise FileNotFoundError(self.path)
+        selected = [c for c in (columns or self.columns) if c in self.columns]
+        column_list = ", ".join(f'"{c}"' for c in selected)
+        conn = self._connect()
+        try:
+            return pd.read_sql_query(f'SELECT {column_list} FROM "{self.table}"', conn)
+        finally:
+            conn.close()
+
+    def iter_chunks(self, columns=None, chunksize=READ_CHUNK_ROWS):
+        """Read the log as DataFrames of at most chunksize rows"""
+        if not os.path.exists(self.path):
+            raise FileNotFoundError(self.path)
+        selected = [c for c in (columns or self.columns) if c in self.columns]
+        column_list = ", ".join(f'"{c}"' for c in selected)
+        conn = self._connect()
+        try:
+            yield from pd.read_sql_query(f'SELECT {column_list} FROM "{self.table}"', conn, chunksize=chunksize)
+        finally:
+            conn.close()
+
+    def count_rows(self):
+        if not os.path.exists(self.path):
+            raise FileNotFoundError(self.path)
+        conn = self._connect()
+        try:
+            return conn.execute(f'SELECT COUNT(*) FROM "{self.table}"').fetchone()[0]
+        finally:
+            conn.close()
+
+class ParquetLogSink:
+    """Columnar log stored as one directory of Parquet part files per day"""
+
+    def __init__(self, path=DEFAULT_PARQUET_PATH, columns=LOG_COLUMNS):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise ImportError("The parquet log backend requires pyarrow (pip install pyarrow)")
+        self.path = path
+        self.columns = list(columns)
+
+    def write_rows(self, rows):
+        """Write rows as new part files, one per day they fall on"""
+        if rows:
+            self.write_frame(pd.DataFrame(rows))
+
+    def write_frame(self, df):
+        """Write a DataFrame of log rows, typed and split into daily partitions"""
+        df = df.reindex(columns=self.columns)
+        df['Timestamp'] = pd.to_datetime(df['Timestamp'])
+        for col in NUMERIC_COLUMNS:
+            if col in df.columns:
+                df[col] = pd.to_numeric(df[col], errors='coerce').astype('float64')
+        for col in df.columns.difference(NUMERIC_COLUMNS + ['Timestamp']):
+            df[col] = df[col].astype('string')
+
+        for day, part in df.groupby(df['Timestamp'].dt.strftime('%Y-%m-%d')):
+            part_dir = os.path.join(self.path, f"date={day}")
+            os.makedirs(part_dir, exist_ok=True)
+            # Write under a temporary name and rename so readers never see partial files
+            name = f"part-{uuid.uuid4().hex}.parquet"
+            tmp_path = os.path.join(part_dir, f".{name}.tmp")
+            part.to_parquet(tmp_path, engine='pyarrow', index=False)
+            os.replace(tmp_path, os.path.join(part_dir, name))
+
+    def _dataset(self):
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        if not os.path.isdir(self.path):
+            raise FileNotFoundError(self.path)
+        # In-progress ".part-*.tmp" files are skipped by pyarrow's default ignore prefixes
+        dataset = ds.dataset(self.path, format='parquet', partitioning='hive')
+        # The schema is taken from one part file, and parts written before a column
+        # was added (Latitude/Longitude) lack it; add any missing log column so it
+        # reads as nulls there instead of vanishing from every part
+        missing = [pa.field(c, pa.float64() if c in NUMERIC_COLUMNS else pa.large_string())
+                   for c in self.columns if c not in dataset.schema.names]
+        if missing:
+            dataset = ds.dataset(self.path, schema=pa.schema(list(dataset.schema) + missing),
+                                 format='parquet', partitioning='hive')
+        return dataset
+
+    def read(self, columns=None):
+        """Read the log, loading only the requested columns from disk"""
+        dataset = self._dataset()
+        available = [c for c in (columns or self.columns) if c in dataset.schema.names]
+        return dataset.to_table(columns=available).to_pandas()
+
+    def iter_chunks(self, columns=None, chunksize=READ_CHUNK_ROWS):
+        """Read the log a record batch at a time, at most chunksize rows each"""
+        dataset = self._dataset()
+        available = [c for c in (columns or self.columns) if c in dataset.schema.names]
+        for batch in dataset.to_batches(columns=available, batch_size=chunksize):
+            if batch.num_rows:
+                yield batch.to_pandas()
+
+    def count_rows(self):
+        """Rows in the log, from the part files' metadata"""
+        return self._dataset().count_rows()
+
+    def compact(self):
+        """Merge each day's small part files into a single file (run while the app is idle)"""
+        if not os.path.isdir(self.path):
+            return
+        for entry in sorted(os.listdir(self.path)):
+            part_dir = os.path.join(self.path, entry)
+            if not entry.startswith("date=") or not os.path.isdir(part_dir):
+                continue
+            parts = sorted(f for f in os.listdir(part_dir) if f.endswith(".parquet"))
+            if len(parts) < 2:
+                continue
+            paths = [os.path.join(part_dir, f) for f in parts]
+            merged = pd.concat([pd.read_parquet(p) for p in paths], ignore_index=True)
+            name = f"part-{uuid.uuid4().hex}.parquet"
+            tmp_path = os.path.join(part_dir, f".{name}.tmp")
+            merged.to_parquet(tmp_path, engine='pyarrow', index=False)
+            os.replace(tmp_path, os.path.join(part_dir, name))
+            for p in paths:
+                os.remove(p)
+
+class BufferedLogSink:
+    """Bounded in-memory write buffer in front of another sink with periodic flush"""
+
+    def __init__(self, sink, max_rows=256, flush_interval=2.0):
+        self.sink = sink
+        self.max_rows = max_rows
+        self.flush_interval = flush_interval
+        self._buffer = []
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._flush_loop, daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def add_listener(self, callback):
+        """Call callback(rows) after each batch of rows has been written"""
+        self._listeners.append(callback)
+
+    def append(self, row):
+        """Queue a row; flushes synchronously once the buffer is full"""
+        with self._lock:
+            self._buffer.append(row)
+            full = len(self._buffer) >= self.max_rows
+        if full:
+            self.flush()
+
+    def flush(self):
+        """Write all buffered rows to the underlying sink"""
+        with self._lock:
+            rows, self._buffer = self._buffer, []
+        if rows:
+            try:
+                self.sink.write_rows(rows)
+            except Exception:
+                # Put the rows back so a transient error doesn't lose them
+                with self._lock:
+                    self._buffer = rows + self._buffer
+                raise
+            for callback in self._listeners:
+                try:
+                    callback(rows)
+                except Exception as e:
+                    print(f"Error in prediction log listener: {e}")
+
+    def read(self, columns=None):
+        """Flush pending rows, then read from the underlying sink"""
+        self.flush()
+        return self.sink.read(columns)
+
+    def close(self):
+        """Stop the flush thread and write out anything still buffered"""
+        self._stop.set()
+        self.flush()
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Error flushing prediction log: {e}")
+
+_sink = None
+_aggregates = None
+_sink_lock = threading.Lock()
+
+def create_log_sink(backend=None):
+    """Create a buffered log sink for the configured backend (csv, sqlite or parquet)"""
+    backend = (backend or os.environ.get("DISASTER_LOG_BACKEND", "csv")).lower()
+    if backend == "csv":
+        sink = CSVLogSink(os.environ.get("DISASTER_LOG_PATH", DEFAULT_CSV_PATH))
+    elif backend == "sqlite":
+        sink = SQLiteLogSink(os.environ.get("DISASTER_LOG_PATH", DEFAULT_SQLITE_PATH))
+    elif backend == "parquet":
+        sink = ParquetLogSink(os.environ.get("DISASTER_LOG_PATH", DEFAULT_PARQUET_PATH))
+    else:
+        raise ValueError(f"Unknown prediction log backend: {backend}")
+    return BufferedLogSink(sink)
+
+def get_log_sink():
+    """Get the process-wide prediction log sink, with aggregates kept up to date on flush"""
+    global _sink, _aggregates
+    with _sink_lock:
+        if _sink is None:
+            sink = create_log_sink()
+            aggregates = create_aggregate_store(sink.sink)
+
+            def update_aggregates(rows):
+                try:
+                    aggregates.add_rows(rows)
+                except Exception as e:
+                    # The rows are already in the log, so rebuilding from it recovers them
+                    print(f"⚠️ Updating prediction log aggregates failed ({e}); rebuilding them from the log")
+                    aggregates.rebuild(sink.sink.iter_chunks(AGGREGATE_COLUMNS))
+
+            sink.add_listener(update_aggregates)
+            # Runs before the sink's own atexit close: write the last rows, then their coalesced aggregates
+            atexit.register(lambda: (sink.close(), aggregates.close()))
+            _sink, _aggregates = sink, aggregates
+        return _sink
+
+def create_aggregate_store(sink):
+    """Open the aggregates snapshot next to a sink's log, rebuilding it when it doesn't match the log
+
+    The snapshot's row count is checked against the log's, so rows whose
+    aggregates were lost (a crash before a coalesced write, a failed update)
+    are recovered at the next start. The rebuild reads the log in chunks.
+    """
+    path = os.environ.get("DISASTER_AGGREGATES_PATH",
+                          f"{os.path.splitext(sink.path.rstrip(os.sep))[0]}.aggregates.json")
+    store = AggregateStore(path)
+    if not os.path.exists(sink.path):
+        # A deleted log means a fresh start, so don't keep serving stale totals
+        if store.exists():
+            store.rebuild([])
+        return store
+    log_rows = sink.count_rows()
+    snapshot_rows = store.snapshot_count()
+    if snapshot_rows != log_rows:
+        print(f"🔄 Building prediction log aggregates ({snapshot_rows} of {log_rows} log rows aggregated)...")
+        store.rebuild(sink.iter_chunks(AGGREGATE_COLUMNS))
+    return store
+
+def get_aggregates():
+    """Current running statistics over the whole prediction log"""
+    sink = get_log_sink()
+    sink.flush()
+    return _aggregates.current()
+
+def read_log(columns=None):
+    """Read the prediction log; raises FileNotFoundError when nothing has been logged"""
+    return get_log_sink().read(columns)
+
+def migrate_csv_to_parquet(src=DEFAULT_CSV_PATH, dest=DEFAULT_PARQUET_PATH, chunksize=500_000):
+    """Copy an existing CSV prediction log into the partitioned Parquet store"""
+    sink = ParquetLogSink(dest)
+    total = 0
+    for chunk in pd.read_csv(src, chunksize=chunksize, **CSV_READ_OPTIONS):
+        sink.write_frame(chunk)
+        total += len(chunk)
+        print(f"🔄 Migrated {total} rows...")
+    if total:
+        sink.compact()
+    return total
+
+def main():
+    parser = argparse.ArgumentParser(description="Prediction log maintenance")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    migrate = subparsers.add_parser("migrate", help="Convert the CSV log to Parquet")
+    migrate.add_argument("--src", default=DEFAULT_CSV_PATH)
+    migrate.add_argument("--dest", default=DEFAULT_PARQUET_PATH)
+    migrate.add_argument("--chunksize", type=int, default=500_000)
+
+    compact = subparsers.add_parser("compact", help="Merge small Parquet part files")
+    compact.add_argument("--path", default=DEFAULT_PARQUET_PATH)
+
+    args = parser.parse_args()
+    if args.command == "migrate":
+        total = migrate_csv_to_parquet(args.src, args.dest, args.chunksize)
+        print(f"✅ Migrated {total} rows from {args.src} to {args.dest}")
+        print("💡 Set DISASTER_LOG_BACKEND=parquet to use the new store")
+    elif args.command == "compact":
+        ParquetLogSink(args.path).compact()
+        print(f"✅ Compacted {args.path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+# risk_grid.py
+import argparse
+import json
+import time
+
+import numpy as np
+
+from model_artifacts import artifact_fingerprint, load_artifacts, predict_proba
+
+GRID_PATH = "risk_grid.npy"
+GRID_META_PATH = "risk_grid.json"
+
+# Slider ranges from the prediction tab and the default number of grid points per feature
+GRID_SPEC = {
+    'Rainfall_mm': (0, 500, 11),
+    'Humidity_%': (0, 100, 6),
+    'Temperature_C': (-10, 60, 8),
+    'Wind_Speed_kmph': (0, 150, 6),
+    'Soil_Moisture_%': (0, 100, 6),
+    'Magnitude': (0, 10, 11),
+    'Depth_km': (0, 100, 5),
+}
+
+def build_risk_grid(spec=GRID_SPEC, chunk_size=50_000, path=GRID_PATH, meta_path=GRID_META_PATH):
+    """Evaluate the model on every grid point and store class probabilities as float16"""
+    model, label_encoder, scaler, features = load_artifacts()
+    axes = [np.linspace(*spec[f]) for f in features]
+    shape = tuple(len(axis) for axis in axes)
+    n_classes = len(label_encoder.classes_)
+    total = int(np.prod(shape))
+
+    grid = np.lib.format.open_memmap(path, mode='w+', dtype=np.float16, shape=(total, n_classes))
+    start = time.perf_counter()
+    for lo in range(0, total, chunk_size):
+        idx = np.unravel_index(np.arange(lo, min(lo + chunk_size, total)), shape)
+        X = np.column_stack([axis[i] for axis, i in zip(axes, idx)])
+        grid[lo:lo + len(X)] = predict_proba(model, scaler, X)
+        print(f"🔄 Evaluated {lo + len(X)}/{total} grid points")
+    grid.flush()
+    del grid
+
+    with open(meta_path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'features': list(features),
+            'axes': [axis.tolist() for axis in axes],
+            'classes': [str(c) for c in label_encoder.classes_],
+            'artifact_hash': artifact_fingerprint(),
+        }, f)
+    print(f"✅ Risk grid of {total} points built in {time.perf_counter() - start:.1f}s")
+    return total
+
+class RiskGrid:
+    """Memory-mapped grid of model probabilities with multilinear interpolation"""
+
+    def __init__(self, path=GRID_PATH, meta_path=GRID_META_PATH):
+        with open(meta_path, encoding='utf-8') as f:
+            meta = json.load(f)
+        self.features = meta['features']
+        self.axes = [np.asarray(axis) for axis in meta['axes']]
+        self.classes = np.asarray(meta['classes'])
+        self.artifact_hash = meta['artifact_hash']
+        shape = tuple(len(axis) for axis in self.axes) + (len(self.classes),)
+        self.grid = np.load(path, mmap_mode='r').reshape(shape)
+
+    def interpolate(self, row):
+        """Approximate class probabilities for one raw feature row"""
+        index = []
+        weights = []
+        for axis, value in zip(self.axes, row):
+            if len(axis) == 1:
+                index.append(slice(0, 1))
+                weights.append(0.0)
+                continue
+            value = min(max(float(value), axis[0]), axis[-1])
+            i = min(int(np.searchsorted(axis, value, side='right')) - 1, len(axis) - 2)
+            index.append(slice(i, i + 2))
+            weights.append((value - axis[i]) / (axis[i + 1] - axis[i]))
+
+        # Collapse the 2x2x...x2 corner block one feature at a time
+        block = np.asarray(self.grid[tuple(index)], dtype=np.float64)
+        for t in weights:
+            block = block[0] if block.shape[0] == 1 else (1 - t) * block[0] + t * block[1]
+        return block
+
+    def predict(self, row):
+        """Interpolated (predicted class, confidence %) for one raw feature row"""
+        probabilities = self.interpolate(row)
+        idx = int(np.argmax(probabilities))
+        return self.classes[idx], probabilities[idx] * 100
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute the model's risk over a feature grid")
+    parser.add_argument("--points", action="append", default=[], metavar="FEATURE=N",
+                        help="Grid points for a feature, e.g. --points Rainfall_mm=21")
+    parser.add_argument("--chunk-size", type=int, default=50_000)
+    args = parser.parse_args()
+
+    spec = dict(GRID_SPEC)
+    for item in args.points:
+        name, _, points = item.partition('=')
+        if name not in spec:
+            parser.error(f"Unknown feature: {name}")
+        low, high, _ = spec[name]
+        spec[name] = (low, high, int(points))
+
+    try:
+        build_risk_grid(spec, args.chunk_size)
+    except FileNotFoundError:
+        print("❌ Model files not found. Please run train_model.py first.")
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+# risk_scoring.py
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from rule_engine import PARAMETER_COLUMNS, PARAMETER_DEFAULTS, default_rule_set
+
+RISK_LEVELS = np.array(['none', 'low', 'medium', 'high'])
+
+# Dashboard risk from confidence alone: confidence >= threshold reaches the level
+CONFIDENCE_BANDS = [(60, 'medium'), (80, 'high')]
+
+# Prediction risk: confidence contributes up to CONFIDENCE_WEIGHT points, a severe
+# reading for the predicted disaster adds SEVERITY_BONUS, and score > threshold
+# reaches the level
+CONFIDENCE_WEIGHT = 40
+SEVERITY_BONUS = 30
+SEVERITY_RULES = {
+    'Flood': ('rainfall', 150),
+    'Wildfire': ('temperature', 35),
+    'Earthquake': ('magnitude', 5.0),
+}
+SCORE_BANDS = [(40, 'medium'), (70, 'high')]
+
+def _level_codes(levels):
+    return np.array([int(np.flatnonzero(RISK_LEVELS == level)[0]) for level in levels], dtype=np.int8)
+
+def _column(readings, name, n=None):
+    """One parameter as a float array from a DataFrame, dict of arrays or scalar dict"""
+    if name in readings:
+        values = readings[name]
+    elif PARAMETER_COLUMNS[name] in readings:
+        values = readings[PARAMETER_COLUMNS[name]]
+    else:
+        values = PARAMETER_DEFAULTS[name]
+    values = np.asarray(values, dtype=np.float64)
+    return np.broadcast_to(values, (n,)) if n is not None and values.ndim == 0 else values
+
+def _n_rows(readings):
+    if isinstance(readings, pd.DataFrame):
+        return len(readings)
+    sizes = [np.size(v) for v in readings.values() if np.ndim(v) > 0]
+    return max(sizes) if sizes else 1
+
+def warning_flags(readings, rule_set=None):
+    """Bitmask per row with bit i set when warning rule i of the rule set fires
+
+    ``readings`` is a DataFrame or a dict of arrays keyed by parameter name
+    (``rainfall``) or log column (``Rainfall_mm``). Thresholds come from the
+    rule file (see rule_engine.py), so they change without code changes.
+    """
+    rule_set = rule_set or default_rule_set()
+    n = _n_rows(readings)
+    columns = {name: _column(readings, name, n) for name in rule_set.warning_table.inputs}
+    return rule_set.warning_flags(columns, n)
+
+def warning_codes(flags, rule_set=None, sep='|'):
+    """Rule codes joined per row, e.g. 'FLOOD_HIGH|QUAKE_MAJOR'; '' when nothing fired"""
+    rules = (rule_set or default_rule_set()).warnings
+    unique, inverse = np.unique(np.asarray(flags, dtype=np.uint32), return_inverse=True)
+    names = np.array([
+        sep.join(rule['code'] for bit, rule in enumerate(rules) if int(flags_value) >> bit & 1)
+        for flags_value in unique
+    ], dtype=object)
+    return names[inverse.reshape(-1)]
+
+def decode_warnings(flags_value, rule_set=None):
+    """Warning dicts (type, message, severity) for one row's flags"""
+    return [
+        {'type': rule['type'], 'message': rule['message'], 'severity': rule['severity']}
+        for bit, rule in enumerate((rule_set or default_rule_set()).warnings) if int(flags_value) >> bit & 1
+    ]
+
+def confidence_risk_codes(confidence, disaster_type, bands=CONFIDENCE_BANDS):
+    """Risk level codes (indices into RISK_LEVELS) from confidence alone"""
+    confidence = np.asarray(confidence, dtype=np.float64)
+    thresholds = np.array([threshold for threshold, _ in bands])
+    codes = np.concatenate([_level_codes(['low']), _level_codes([level for _, level in bands])])
+    levels = codes[np.searchsorted(thresholds, confidence, side='right')]
+    # searchsorted puts NaN past every band; the original comparisons were all False, i.e. 'low'
+    levels = np.where(np.isnan(confidence), codes[0], levels)
+    return np.where(np.asarray(disaster_type, dtype=object) == 'None', np.int8(0), levels)
+
+def risk_codes(confidence, disaster_type, readings, bands=SCORE_BANDS):
+    """Risk level codes from confidence plus the severity of the predicted disaster's reading"""
+    confidence = np.asarray(confidence, dtype=np.float64)
+    disaster_type = np.asarray(disaster_type, dtype=object)
+    n = confidence.size if confidence.ndim else _n_rows(readings)
+    score = np.broadcast_to(confidence, (n,)) / 100 * CONFIDENCE_WEIGHT
+    for disaster, (name, threshold) in SEVERITY_RULES.items():
+        severe = (disaster_type == disaster) & (_column(readings, name, n) > threshold)
+        score = score + np.where(severe, SEVERITY_BONUS, 0)
+    thresholds = np.array([threshold for threshold, _ in bands])
+    codes = np.concatenate([_level_codes(['low']), _level_codes([level for _, level in bands])])
+    levels = codes[np.searchsorted(thresholds, score, side='left')]
+    levels = np.where(np.isnan(score), codes[0], levels)
+    return np.where(disaster_type == 'None', np.int8(0), levels)
+
+def risk_levels(codes):
+    """Level names for risk codes"""
+    return RISK_LEVELS[np.asarray(codes)]
+
+def check_early_warnings(parameters):
+    """Check parameters against safety thresholds and generate warnings"""
+    return decode_warnings(warning_flags(parameters)[0])
+
+def get_risk_level_from_confidence(confidence, disaster_type):
+    """Calculate risk level based only on confidence for dashboard display"""
+    return str(RISK_LEVELS[confidence_risk_codes([confidence], [disaster_type])[0]])
+
+def get_risk_level(confidence, disaster_type, parameters):
+    """Calculate overall risk level based on multiple factors for predictions"""
+    return str(RISK_LEVELS[risk_codes([confidence], [disaster_type], parameters)[0]])
+
+def score_frame(df):
+    """Add Risk_Level and Warnings columns to logged or batch-scored predictions"""
+    df['Risk_Level'] = risk_levels(risk_codes(df['AI_Confidence'], df['AI_Prediction'], df))
+    df['Warnings'] = warning_codes(warning_flags(df))
+    return df
+
+def main():
+    from predict import ChunkWriter, iter_input_chunks
+
+    parser = argparse.ArgumentParser(description="Re-score risk levels and early warnings for saved predictions")
+    parser.add_argument("input", help="CSV or .parquet file with AI_Prediction, AI_Confidence and reading columns")
+    parser.add_argument("output", help="Destination CSV or .parquet file")
+    parser.add_argument("--chunksize", type=int, default=500_000)
+    args = parser.parse_args()
+
+    if not os.path.exists(args.input):
+        parser.error(f"Input file not found: {args.input}")
+
+    writer = ChunkWriter(args.output)
+    total = 0
+    combinations = pd.Series(dtype=np.int64)
+    start = time.perf_counter()
+    try:
+        for chunk in iter_input_chunks(args.input, args.chunksize):
+            score_frame(chunk)
+            combinations = combinations.add(chunk['Warnings'].value_counts(), fill_value=0)
+            writer.write(chunk)
+            total += len(chunk)
+            print(f"🔄 Scored {total} rows ({total / (time.perf_counter() - start):,.0f} rows/s)")
+    finally:
+        writer.close()
+
+    print(f"✅ Wrote {total} scored rows to {args.output}")
+    for rule in default_rule_set().warnings:
+        count = sum(n for codes, n in combinations.items() if rule['code'] in codes.split('|'))
+        if count:
+            print(f"   {rule['type']}: {int(count)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+# rule_engine.py
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assessment_rules.json")
+
+# Reading names warning rules may test and the dataset/log columns they come from
+PARAMETER_COLUMNS = {
+    'rainfall': 'Rainfall_mm',
+    'humidity': 'Humidity_%',
+    'temperature': 'Temperature_C',
+    'wind_speed': 'Wind_Speed_kmph',
+    'magnitude': 'Magnitude',
+}
+
+# Value assumed when a reading is missing
+PARAMETER_DEFAULTS = {'rainfall': 0, 'humidity': 50, 'temperature': 0, 'wind_speed': 0, 'magnitude': 0}
+
+# Compiled tables hold one entry per combination of cells; refuse rule sets that explode
+MAX_TABLE_CELLS = 1_000_000
+
+_OPERATORS = {
+    '>': np.greater, '>=': np.greater_equal, '<': np.less, '<=': np.less_equal,
+    '==': lambda values, x: values == x, '!=': lambda values, x: values != x,
+    'in': lambda values, x: np.isin(values, x), 'not in': lambda values, x: ~np.isin(values, x),
+}
+
+def load_rules(path=None):
+    """Rule set dict from JSON, or YAML when PyYAML is installed"""
+    path = path or os.environ.get("DISASTER_RULES", RULES_PATH)
+    with open(path, encoding='utf-8') as f:
+        if path.endswith((".yaml", ".yml")):
+            try:
+                import yaml
+            except ImportError:
+                raise ValueError(f"{path} is YAML but PyYAML is not installed; pip install pyyaml or use JSON")
+            return yaml.safe_load(f)
+        return json.load(f)
+
+class _OptionAxis:
+    """Categorical input: one cell per option plus one for unknown answers"""
+
+    def __init__(self, options):
+        self.options = list(options)
+        self.n_cells = len(self.options) + 1
+        self.representatives = np.array(self.options + [None], dtype=object)
+
+    def cells(self, values):
+        values = np.atleast_1d(values)
+        if values.dtype.kind in 'iu':
+            return np.where((values >= 0) & (values < len(self.options)), values, len(self.options))
+        # Answers repeat heavily, so map each distinct label once
+        codes, labels = pd.factorize(values.astype(object))
+        cells = pd.Index(self.options).get_indexer(labels)
+        cells = np.where(cells < 0, len(self.options), cells)
+        return np.where(codes < 0, len(self.options), cells[codes] if len(cells) else codes)
+
+class _IntervalAxis:
+    """Numeric input split at every threshold the rules mention
+
+    Cell 2i holds values just below threshold i, cell 2i+1 the threshold itself,
+    cell 2k everything above the last one and cell 2k+1 NaN, so each condition
+    is constant within a cell whatever its operator.
+    """
+
+    def __init__(self, thresholds):
+        self.thresholds = np.array(sorted(set(thresholds)), dtype=np.float64)
+        t = self.thresholds
+        k = len(t)
+        self.n_cells = 2 * k + 2
+        reps = np.empty(self.n_cells)
+        for i in range(k + 1):
+            if k == 0:
+                reps[0] = 0.0
+            elif i == 0:
+                reps[0] = t[0] - 1
+            elif i == k:
+                reps[2 * k] = t[-1] + 1
+            else:
+                reps[2 * i] = (t[i - 1] + t[i]) / 2
+            if i < k:
+                reps[2 * i + 1] = t[i]
+        reps[-1] = np.nan
+        self.representatives = reps
+
+    def cells(self, values):
+        values = np.atleast_1d(np.asarray(values, dtype=np.float64))
+        if len(self.thresholds) <= 8:
+            # A few vectorized comparisons beat a binary search for short threshold lists
+            cells = np.zeros(values.shape, dtype=np.intp)
+            for threshold in self.thresholds:
+                cells += values >= threshold
+                cells += values > threshold
+        else:
+            cells = (np.searchsorted(self.thresholds, values, side='left')
+                     + np.searchsorted(self.thresholds, values, side='right'))
+        nan = np.isnan(values)
+        if nan.any():
+            cells[nan] = self.n_cells - 1
+        return cells
+
+def _values(rules, name):
+    return [v for rule in rules for n, _, value in rule if n == name
+            for v in (value if isinstance(value, list) else [value])]
+
+class _CompiledTable:
+    """Lookup table over the cells of every input the rules mention"""
+
+    def __init__(self, rules, options=None):
+        options = options or {}
+        self.rules = [list(rule) for rule in rules]
+        self.inputs = list(dict.fromkeys(name for rule in self.rules for name, _, _ in rule))
+        for rule in self.rules:
+            for name, op, _ in rule:
+                if op not in _OPERATORS:
+                    raise ValueError(f"Unknown operator {op!r} in condition on {name}")
+
+        self.axes = []
+        for name in self.inputs:
+            if name in options:
+                unknown = [v for v in _values(self.rules, name) if v not in options[name]]
+                if unknown:
+                    raise ValueError(f"{name} has no option(s) {unknown}")
+                self.axes.append(_OptionAxis(options[name]))
+            else:
+                self.axes.append(_IntervalAxis([float(v) for v in _values(self.rules, name)]))
+
+        self.shape = tuple(axis.n_cells for axis in self.axes)
+        self.size = int(np.prod(self.shape, dtype=np.int64))
+        if self.size > MAX_TABLE_CELLS:
+            raise ValueError(f"Rules over {self.inputs} need a {self.size}-cell table (limit {MAX_TABLE_CELLS})")
+        grid = np.meshgrid(*[axis.representatives for axis in self.axes], indexing='ij')
+        self._grid = {name: values.ravel() for name, values in zip(self.inputs, grid)}
+
+    def _matches(self, index):
+        """Whether rule `index` holds in each cell"""
+        match = np.ones(self.size, dtype=bool)
+        with np.errstate(invalid='ignore'):
+            for name, op, value in self.rules[index]:
+                match &= _OPERATORS[op](self._grid[name], value)
+        return match
+
+    def _finish(self, table):
+        self.table = table.reshape(self.shape)
+        del self._grid
+
+    def lookup(self, columns, n=None):
+        """Table entry per row; ``columns`` maps each input name to an array or scalar"""
+        if not self.inputs:
+            return np.full(n or 1, self.table[()], dtype=self.table.dtype)
+        cells = np.broadcast_arrays(*[axis.cells(columns[name]) for name, axis in zip(self.inputs, self.axes)])
+        result = self.table[tuple(cells)]
+        return np.broadcast_to(result, (n,)) if n is not None and result.shape != (n,) else result
+
+class DecisionTable(_CompiledTable):
+    """First-match rules compiled into a lookup table over the cells of their inputs
+
+    Each rule is a list of ``[input, operator, value]`` conditions that must
+    all hold. ``lookup`` returns the index of the first matching rule, or -1,
+    with one table read per row however many rules there are.
+    """
+
+    def __init__(self, rules, options=None):
+        super().__init__(rules, options)
+        table = np.full(self.size, -1, dtype=np.int32)
+        # Later rules are written first so earlier ones overwrite them
+        for index in reversed(range(len(self.rules))):
+            table[self._matches(index)] = index
+        self._finish(table)
+
+class FlagTable(_CompiledTable):
+    """Grouped rules compiled into one table of bitmasks
+
+    Bit i is set when rule i is the first matching rule of its group, so all
+    groups are evaluated with a single table read per row.
+    """
+
+    def __init__(self, rules, groups, options=None):
+        if len(rules) > 32:
+            raise ValueError("At most 32 rules fit in the flag bitmask")
+        super().__init__(rules, options)
+        table = np.zeros(self.size, dtype=np.uint32)
+        for group in dict.fromkeys(groups):
+            fired = np.zeros(self.size, dtype=bool)
+            for index in (i for i, g in enumerate(groups) if g == group):
+                match = self._matches(index) & ~fired
+                table[match] |= np.uint32(1 << index)
+                fired |= match
+        self._finish(table)
+
+class RuleSet:
+    """Logical assessment questions, assessment rules and early warnings compiled from a rule file"""
+
+    def __init__(self, spec):
+        self.spec = spec
+        self.questions = spec.get('questions', [])
+        self.options = {q['key']: q['options'] for q in self.questions}
+        self._ask_if = {q['key']: DecisionTable([q['ask_if']], self.options)
+                        for q in self.questions if q.get('ask_if')}
+
+        assessment = spec.get('assessment', {'rules': [], 'default': {'guess': 'None', 'confidence': 'High'}})
+        rules = assessment['rules']
+        self.assessment = DecisionTable([rule['when'] for rule in rules], self.options)
+        # Index -1 (no rule matched) picks the default at the end
+        self._guesses = np.array([rule['guess'] for rule in rules] + [assessment['default']['guess']], dtype=object)
+        self._confidences = np.array([rule['confidence'] for rule in rules] + [assessment['default']['confidence']],
+                                     dtype=object)
+
+        self.warnings = spec.get('warnings', [])
+        unknown = sorted({name for rule in self.warnings for name, _, _ in rule['when']} - set(PARAMETER_COLUMNS))
+        if unknown:
+            raise ValueError(f"Warning rules test unknown reading(s) {unknown}; "
+                             f"known readings are {sorted(PARAMETER_COLUMNS)}")
+        self.warning_table = FlagTable([rule['when'] for rule in self.warnings],
+                                       [rule['group'] for rule in self.warnings])
+
+    def _answers(self, answers):
+        # Unanswered questions count as their first option ("No")
+        n = max([np.size(v) for v in answers.values() if np.ndim(v) > 0], default=1)
+        return {key: answers.get(key, 0) for key in self.options}, n
+
+    def is_asked(self, key, answers):
+        """Whether question `key` is shown given the answers so far"""
+        if key not in self._ask_if:
+            return True
+        columns, n = self._answers(answers)
+        return bool(self._ask_if[key].lookup(columns, n)[0] == 0)
+
+    def assess(self, answers):
+        """(guess, confidence) arrays for batches of answers given as option labels or indices"""
+        columns, n = self._answers(answers)
+        index = self.assessment.lookup(columns, n)
+        return self._guesses[index], self._confidences[index]
+
+    def assess_one(self, answers):
+        guesses, confidences = self.assess(answers)
+        return str(guesses[0]), str(confidences[0])
+
+    def warning_flags(self, columns, n):
+        """Bitmask per row with bit i set when warning i fires; ``columns`` holds each warning input"""
+        return self.warning_table.lookup(columns, n)
+
+_cached = {}
+
+def default_rule_set(path=None):
+    """Compiled rule set for DISASTER_RULES or the bundled file, recompiled when the file changes"""
+    path = path or os.environ.get("DISASTER_RULES", RULES_PATH)
+    mtime = os.stat(path).st_mtime_ns
+    cached = _cached.get(path)
+    if cached is None or cached[0] != mtime:
+        cached = (mtime, RuleSet(load_rules(path)))
+        _cached[path] = cached
+    return cached[1]
+
+def main():
+    parser = argparse.ArgumentParser(description="Check a rule file and apply the logical assessment in batch")
+    parser.add_argument("--rules", default=None, help="JSON or YAML rule file (default: DISASTER_RULES or bundled)")
+    parser.add_argument("--assess", metavar="CSV", help="CSV with one column per question (q1..q5)")
+    parser.add_argument("--output", help="Where to write the assessed CSV")
+    args = parser.parse_args()
+
+    try:
+        rules = RuleSet(load_rules(args.rules))
+    except (OSError, ValueError, KeyError) as e:
+        print(f"❌ Invalid rule file: {e}")
+        raise SystemExit(1)
+    print(f"✅ {len(rules.assessment.rules)} assessment rules over {len(rules.questions)} questions "
+          f"({rules.assessment.size} table cells)")
+    print(f"✅ {len(rules.warnings)} warning rules over {', '.join(rules.warning_table.inputs)} "
+          f"({rules.warning_table.size} table cells)")
+
+    if args.assess:
+        df = pd.read_csv(args.assess, keep_default_na=False)
+        start = time.perf_counter()
+        df['Logic_Assessment'], df['Logic_Confidence'] = rules.assess(
+            {key: df[key].to_numpy() for key in rules.options if key in df.columns}
+        )
+        elapsed = time.perf_counter() - start
+        output = args.output or args.assess.replace(".csv", "_assessed.csv")
+        df.to_csv(output, index=False)
+        print(f"⚡ Assessed {len(df)} rows in {elapsed * 1000:.1f} ms -> {output}")
+
+if __name__ == "__main__":
+    main()
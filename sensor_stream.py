@@ -0,0 +1,539 @@
+# sensor_stream.py
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from log_aggregates import LOCATION_COLUMNS
+from model_artifacts import ModelHolder, predict_batch
+from prediction_log import BufferedLogSink, CSVLogSink
+from risk_scoring import warning_codes, warning_flags
+
+STREAM_LOG_PATH = "Stream_Log.csv"
+STREAM_COLUMNS = ['Timestamp', 'Station', 'Latitude', 'Longitude', 'Model_Version', 'AI_Prediction',
+                  'AI_Confidence', 'Warnings']
+
+# How each model feature is built from a station's recent readings, and the
+# value used when the station reported nothing for it within the window
+WINDOW_SPEC = {
+    'Rainfall_mm': {'agg': 'sum', 'window_s': 24 * 3600, 'default': 0.0},
+    'Humidity_%': {'agg': 'mean', 'window_s': 3600, 'default': 50.0},
+    'Temperature_C': {'agg': 'mean', 'window_s': 3600, 'default': 25.0},
+    'Wind_Speed_kmph': {'agg': 'max', 'window_s': 3600, 'default': 0.0},
+    'Soil_Moisture_%': {'agg': 'last', 'window_s': 6 * 3600, 'default': 40.0},
+    'Magnitude': {'agg': 'max', 'window_s': 24 * 3600, 'default': 0.0},
+    # Depth of the strongest quake in the window rather than of the latest reading
+    'Depth_km': {'agg': 'at_max', 'of': 'Magnitude', 'window_s': 24 * 3600, 'default': 0.0},
+}
+
+# Epoch timestamps above this are taken as milliseconds (as seconds it is the year 5138)
+MILLISECOND_EPOCH = 1e11
+
+# Slot statistics each aggregate reads, and the value of an empty slot
+SLOT_FIELDS = {
+    'sum': ('total',),
+    'mean': ('total', 'count'),
+    'max': ('peak',),
+    'last': ('last',),
+    # Value of this feature at the largest reading of the 'of' feature
+    'at_max': ('at_peak', 'ref_peak'),
+}
+SLOT_FILL = {'total': np.nan, 'count': 0, 'peak': -np.inf, 'last': np.nan, 'at_peak': np.nan, 'ref_peak': -np.inf}
+
+def parse_reading(line, fields=None):
+    """(station, epoch seconds, {field: value}) from one JSON line
+
+    ``timestamp`` may be epoch seconds, epoch milliseconds or ISO 8601 and
+    defaults to now. Only ``fields`` are kept (every other key when None);
+    each must be a finite number or null, which counts as missing. Raises
+    ValueError for anything else.
+    """
+    record = json.loads(line)
+    if not isinstance(record, dict):
+        raise ValueError(f"Reading is not a JSON object: {line!r}")
+    station = record.pop('station', None)
+    if station is None or isinstance(station, (dict, list)):
+        raise ValueError("Reading has no station")
+    ts = record.pop('timestamp', None)
+    if ts is None:
+        ts = time.time()
+    elif isinstance(ts, str):
+        ts = datetime.fromisoformat(ts.replace('Z', '+00:00'))
+        ts = (ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)).timestamp()
+    elif isinstance(ts, bool) or not isinstance(ts, (int, float)):
+        raise ValueError(f"Invalid timestamp: {ts!r}")
+    elif ts > MILLISECOND_EPOCH:
+        ts = ts / 1000
+    if not math.isfinite(ts):
+        raise ValueError(f"Invalid timestamp: {ts!r}")
+
+    values = {}
+    for name in (record if fields is None else fields):
+        value = record.get(name)
+        if value is None:
+            continue
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+            raise ValueError(f"{name} is not a finite number: {value!r}")
+        values[name] = float(value)
+    if not -90 <= values.get('Latitude', 0) <= 90 or not -180 <= values.get('Longitude', 0) <= 180:
+        raise ValueError(f"Location out of range: {values.get('Latitude')}, {values.get('Longitude')}")
+    return str(station), float(ts), values
+
+class StationWindows:
+    """Rolling per-station windows kept as time-bucketed ring buffers
+
+    Features with the same window share a ring of ``window / bucket_seconds + 1``
+    slots of ``bucket_seconds`` per station, and each feature keeps only the
+    slot statistics its aggregate needs (sum, count, max, latest value or
+    value-at-max). Memory per station is fixed however fast it reports, and a
+    window aggregate only touches its station's slots.
+    """
+
+    def __init__(self, features, spec=WINDOW_SPEC, bucket_seconds=300, max_stations=10_000, initial_stations=64,
+                 max_skew_s=300):
+        self.features = list(features)
+        self.fields = self.features + LOCATION_COLUMNS
+        self.spec = [spec[f] for f in self.features]
+        for feature, s in zip(self.features, self.spec):
+            if s['agg'] not in SLOT_FIELDS:
+                raise ValueError(f"Unknown aggregate {s['agg']!r} for {feature}")
+        self.bucket_seconds = bucket_seconds
+        self.max_stations = max_stations
+        self.max_skew_s = max_skew_s
+        self.windows = np.array([-(-s['window_s'] // bucket_seconds) for s in self.spec])
+        self.defaults = np.array([s['default'] for s in self.spec])
+        self._at_max_of = {i: self.features.index(s['of']) for i, s in enumerate(self.spec) if s['agg'] == 'at_max'}
+        # One ring per distinct window, shared by the features that use it
+        self.rings = sorted(set(self.windows.tolist()))
+        self._ring_of = [self.rings.index(w) for w in self.windows]
+
+        self.stations = []
+        self.index = {}
+        self.watermark = 0.0
+        self.accepted = 0
+        self.late = 0
+        self.future = 0
+        self.rejected_stations = 0
+        self._buckets = []
+        self._slots = []
+        self.location = np.empty((0, 2))
+        self._allocate(min(initial_stations, max_stations))
+
+    def _allocate(self, capacity):
+        def grow(old, shape, fill, dtype):
+            array = np.full(shape, fill, dtype=dtype)
+            array[:len(old)] = old
+            return array
+
+        if not self._buckets:
+            self._buckets = [np.empty((0, w + 1), dtype=np.int32) for w in self.rings]
+            self._slots = [{name: np.empty((0, self.rings[r] + 1), dtype=np.int32 if name == 'count' else np.float32)
+                            for name in SLOT_FIELDS[s['agg']]}
+                           for s, r in zip(self.spec, self._ring_of)]
+        self._buckets = [grow(b, (capacity, b.shape[1]), -1, np.int32) for b in self._buckets]
+        self._slots = [{name: grow(a, (capacity, a.shape[1]), SLOT_FILL[name], a.dtype) for name, a in slots.items()}
+                       for slots in self._slots]
+        # Latest reported (Latitude, Longitude) of each station
+        self.location = grow(self.location, (capacity, 2), np.nan, np.float64)
+
+    @property
+    def memory_bytes(self):
+        return (sum(b.nbytes for b in self._buckets) + self.location.nbytes
+                + sum(a.nbytes for slots in self._slots for a in slots.values()))
+
+    def _station(self, station):
+        s = self.index.get(station)
+        if s is None:
+            if len(self.stations) >= self.max_stations:
+                return None
+            s = len(self.stations)
+            if s == len(self.location):
+                self._allocate(min(2 * s, self.max_stations))
+            self.index[station] = s
+            self.stations.append(station)
+        return s
+
+    def add(self, station, ts, values):
+        """Fold one reading into its station's buckets; returns the station index or None if dropped"""
+        if ts > time.time() + self.max_skew_s:
+            # A clock far ahead would move the watermark and make every real reading late
+            self.future += 1
+            return None
+        s = self._station(station)
+        if s is None:
+            self.rejected_stations += 1
+            return None
+        bucket = int(ts // self.bucket_seconds)
+        watermark_bucket = int(self.watermark // self.bucket_seconds)
+        slots = []
+        for r, bucket_id in enumerate(self._buckets):
+            n = bucket_id.shape[1]
+            slot = bucket % n
+            current = bucket_id[s, slot]
+            if bucket < current or bucket <= watermark_bucket - n:
+                # Older than anything this ring still holds
+                slots.append(None)
+                continue
+            if bucket > current:
+                bucket_id[s, slot] = bucket
+                for i in (i for i, ring in enumerate(self._ring_of) if ring == r):
+                    for name, array in self._slots[i].items():
+                        array[s, slot] = SLOT_FILL[name]
+            slots.append(slot)
+        if all(slot is None for slot in slots):
+            self.late += 1
+            return None
+
+        for i, feature in enumerate(self.features):
+            slot = slots[self._ring_of[i]]
+            if slot is None:
+                continue
+            agg = self.spec[i]['agg']
+            arrays = self._slots[i]
+            if agg == 'at_max':
+                ref = values.get(self.features[self._at_max_of[i]])
+                if ref is not None and ref > arrays['ref_peak'][s, slot]:
+                    arrays['ref_peak'][s, slot] = ref
+                    arrays['at_peak'][s, slot] = values.get(feature, np.nan)
+                continue
+            value = values.get(feature)
+            if value is None:
+                continue
+            if agg in ('sum', 'mean'):
+                total = arrays['total'][s, slot]
+                arrays['total'][s, slot] = value if np.isnan(total) else total + value
+                if agg == 'mean':
+                    arrays['count'][s, slot] += 1
+            elif agg == 'max':
+                arrays['peak'][s, slot] = max(arrays['peak'][s, slot], value)
+            else:
+                arrays['last'][s, slot] = value
+        if 'Latitude' in values and 'Longitude' in values:
+            self.location[s] = values['Latitude'], values['Longitude']
+        self.watermark = max(self.watermark, ts)
+        self.accepted += 1
+        return s
+
+    def features_for(self, stations, now=None):
+        """(n, n_features) model inputs for the given station indices at event time `now`"""
+        stations = np.asarray(stations, dtype=np.intp)
+        rows = np.arange(len(stations))
+        now_bucket = int((self.watermark if now is None else now) // self.bucket_seconds)
+        rings = []
+        for bucket_id, window in zip(self._buckets, self.rings):
+            bucket_id = bucket_id[stations]
+            age = now_bucket - bucket_id
+            rings.append((bucket_id, (age >= 0) & (age < window)))
+
+        out = np.empty((len(stations), len(self.features)), dtype=np.float64)
+        empty = np.zeros(out.shape, dtype=bool)
+        for i, spec in enumerate(self.spec):
+            bucket_id, in_window = rings[self._ring_of[i]]
+            arrays = {name: array[stations] for name, array in self._slots[i].items()}
+            agg = spec['agg']
+            if agg in ('sum', 'mean'):
+                live = in_window & ~np.isnan(arrays['total'])
+                out[:, i] = np.where(live, arrays['total'], 0).sum(axis=1, dtype=np.float64)
+                if agg == 'mean':
+                    out[:, i] /= np.maximum(np.where(live, arrays['count'], 0).sum(axis=1), 1)
+                empty[:, i] = ~live.any(axis=1)
+            elif agg == 'max':
+                out[:, i] = np.where(in_window, arrays['peak'], -np.inf).max(axis=1)
+                empty[:, i] = out[:, i] == -np.inf
+            elif agg == 'last':
+                live = in_window & ~np.isnan(arrays['last'])
+                newest = np.where(live, bucket_id, -1).argmax(axis=1)
+                out[:, i] = arrays['last'][rows, newest]
+                empty[:, i] = ~live.any(axis=1)
+            else:
+                ref = np.where(in_window, arrays['ref_peak'], -np.inf)
+                strongest = ref.argmax(axis=1)
+                out[:, i] = arrays['at_peak'][rows, strongest]
+                empty[:, i] = ref[rows, strongest] == -np.inf
+        empty |= np.isnan(out)
+        out[empty] = np.broadcast_to(self.defaults, out.shape)[empty]
+        return out
+
+class SensorStream:
+    """Async ingestion of station readings with windowed features and batched predictions
+
+    Sources await ``put``, which blocks once ``max_pending`` readings are
+    queued, so a slow consumer pushes back on sockets and file tails instead
+    of buffering without limit. Every ``interval`` seconds the stations that
+    reported since the last tick are scored in batches of ``max_batch``; a
+    tick that arrives while the previous one is still predicting is skipped
+    and its stations are scored by the next, so prediction work grows with
+    the number of stations, not with the reading rate.
+    """
+
+    def __init__(self, holder, windows=None, interval=1.0, max_batch=4096, max_pending=10_000,
+                 log_path=STREAM_LOG_PATH, on_predictions=None):
+        self.holder = holder
+        features = holder.current()[3]
+        self.windows = windows or StationWindows(features)
+        self.interval = interval
+        self.max_batch = max_batch
+        self.max_pending = max_pending
+        self.on_predictions = on_predictions
+        self.log = BufferedLogSink(CSVLogSink(log_path, STREAM_COLUMNS + list(features)), max_rows=4096) \
+            if log_path else None
+        self._queue = None
+        self._dirty = set()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="stream-predict")
+        self._predict_task = None
+        self.invalid = 0
+        self.ticks = 0
+        self.skipped_ticks = 0
+        self.predictions = 0
+        self.predict_s = 0.0
+
+    async def put(self, line):
+        """Queue one raw JSON reading; waits while the pending queue is full"""
+        await self._queue.put(line)
+
+    def stats(self):
+        return {
+            'stations': len(self.windows.stations),
+            'readings': self.windows.accepted,
+            'late': self.windows.late,
+            'future': self.windows.future,
+            'invalid': self.invalid,
+            'rejected_stations': self.windows.rejected_stations,
+            'pending': self._queue.qsize() if self._queue else 0,
+            'ticks': self.ticks,
+            'skipped_ticks': self.skipped_ticks,
+            'predictions': self.predictions,
+            'predict_s': round(self.predict_s, 3),
+            'window_mb': round(self.windows.memory_bytes / 1e6, 1),
+        }
+
+    async def run(self, sources=()):
+        """Consume readings and emit predictions until cancelled"""
+        self._queue = asyncio.Queue(maxsize=self.max_pending)
+        tasks = [asyncio.create_task(self._consume()), asyncio.create_task(self._tick_loop())]
+        tasks += [asyncio.create_task(source(self)) for source in sources]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            # Let the batch in flight finish so its predictions reach the log
+            if self._predict_task is not None:
+                await asyncio.gather(self._predict_task, return_exceptions=True)
+            if self.log is not None:
+                self.log.close()
+
+    async def _consume(self):
+        while True:
+            line = await self._queue.get()
+            # One malformed message is counted and skipped rather than stopping ingestion
+            try:
+                station, ts, values = parse_reading(line, self.windows.fields)
+                s = self.windows.add(station, ts, values)
+            except (ValueError, KeyError, TypeError):
+                self.invalid += 1
+                continue
+            if s is not None:
+                self._dirty.add(s)
+
+    async def _tick_loop(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            self.ticks += 1
+            if self._predict_task is not None and not self._predict_task.done():
+                # Still predicting the previous tick; its stations stay dirty for the next one
+                self.skipped_ticks += 1
+                continue
+            if not self._dirty:
+                continue
+            stations, self._dirty = np.fromiter(self._dirty, dtype=np.intp), set()
+            X = self.windows.features_for(stations)
+            # Runs beside the tick loop, so ticks keep coming and are skipped while it is busy
+            self._predict_task = asyncio.create_task(self._predict_batches(stations, X, self.windows.watermark))
+
+    async def _predict_batches(self, stations, X, now):
+        loop = asyncio.get_running_loop()
+        try:
+            for start in range(0, len(stations), self.max_batch):
+                await loop.run_in_executor(self._executor, self._predict,
+                                           stations[start:start + self.max_batch],
+                                           X[start:start + self.max_batch], now)
+        except Exception as e:
+            print(f"❌ Prediction failed for {len(stations)} stations: {e}")
+
+    def _predict(self, stations, X, now):
+        model, label_encoder, scaler, features, version = self.holder.current()
+        start = time.perf_counter()
+        labels, confidences, _ = predict_batch(model, label_encoder, scaler, X)
+        self.predict_s += time.perf_counter() - start
+        self.predictions += len(stations)
+
+        names = [self.windows.stations[s] for s in stations]
+        locations = self.windows.location[stations]
+        if self.on_predictions is not None:
+            self.on_predictions(names, X, labels, confidences)
+        if self.log is not None:
+            frame = pd.DataFrame(X, columns=features)
+            codes = warning_codes(warning_flags(frame))
+            timestamp = datetime.fromtimestamp(now, timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+            for i, row in enumerate(frame.round(3).to_dict('records')):
+                latitude, longitude = (None if np.isnan(v) else float(v) for v in locations[i])
+                row.update({'Timestamp': timestamp, 'Station': names[i], 'Latitude': latitude,
+                            'Longitude': longitude, 'Model_Version': version,
+                            'AI_Prediction': labels[i], 'AI_Confidence': round(float(confidences[i]), 2),
+                            'Warnings': codes[i]})
+                self.log.append(row)
+
+def tail_file(path, from_start=False, poll_interval=0.5):
+    """Source that follows a JSON-lines file like ``tail -F``, reopening it after rotation"""
+    async def source(stream):
+        position = None
+        while True:
+            try:
+                with open(path, encoding='utf-8') as f:
+                    if position is None:
+                        position = 0 if from_start else os.path.getsize(path)
+                    elif os.path.getsize(path) < position:
+                        position = 0  # truncated or replaced
+                    f.seek(position)
+                    while True:
+                        line = f.readline()
+                        if not line.endswith('\n'):
+                            break  # partial line; wait for the writer to finish it
+                        position = f.tell()
+                        if line.strip():
+                            await stream.put(line)
+            except FileNotFoundError:
+                pass
+            await asyncio.sleep(poll_interval)
+    return source
+
+def listen(host=None, port=None, unix_path=None):
+    """Source accepting newline-delimited JSON over TCP or a unix socket
+
+    Connections are read only as fast as the stream consumes, so senders see
+    TCP backpressure when the pending queue is full.
+    """
+    async def handle(stream, reader, writer):
+        try:
+            while line := await reader.readline():
+                if line.strip():
+                    await stream.put(line)
+        except ConnectionResetError:
+            pass
+        finally:
+            writer.close()
+
+    async def source(stream):
+        callback = lambda r, w: handle(stream, r, w)
+        if unix_path:
+            server = await asyncio.start_unix_server(callback, unix_path)
+        else:
+            server = await asyncio.start_server(callback, host, port)
+        print(f"📡 Listening for readings on {unix_path or f'{host}:{port}'}")
+        async with server:
+            await server.serve_forever()
+    return source
+
+def simulate(n_stations, rate, duration=None, seed=0):
+    """Source generating synthetic readings from `n_stations` at `rate` readings per second"""
+    async def source(stream):
+        rng = random.Random(seed)
+        # Each station stays at one place scattered over the inhabited latitudes
+        places = [(round(rng.uniform(-50, 60), 4), round(rng.uniform(-180, 180), 4)) for _ in range(n_stations)]
+        start = time.time()
+        sent = 0
+        while duration is None or time.time() - start < duration:
+            # Readings due since the last batch, sent in one go to keep the loop cheap
+            due = int((time.time() - start) * rate) - sent
+            for _ in range(max(due, 0)):
+                station = rng.randrange(n_stations)
+                reading = {
+                    'station': f"ST{station:05d}",
+                    'timestamp': time.time(),
+                    'Latitude': places[station][0],
+                    'Longitude': places[station][1],
+                    'Rainfall_mm': round(rng.expovariate(1 / 2), 2),
+                    'Humidity_%': round(rng.uniform(20, 100), 1),
+                    'Temperature_C': round(rng.gauss(25, 8), 1),
+                    'Wind_Speed_kmph': round(rng.expovariate(1 / 15), 1),
+                    'Soil_Moisture_%': round(rng.uniform(10, 90), 1),
+                }
+                if rng.random() < 0.001:
+                    reading.update({'Magnitude': round(rng.uniform(3, 8), 1), 'Depth_km': round(rng.uniform(0, 30), 1)})
+                await stream.put(json.dumps(reading))
+            sent += max(due, 0)
+            await asyncio.sleep(0.01)
+        print(f"✅ Simulator sent {sent} readings")
+    return source
+
+def main():
+    parser = argparse.ArgumentParser(description="Continuous monitoring: windowed sensor features into batched predictions")
+    parser.add_argument("--tail", metavar="JSONL", help="Follow a file of JSON readings")
+    parser.add_argument("--from-start", action="store_true", help="Replay the tailed file from the beginning")
+    parser.add_argument("--listen", metavar="HOST:PORT", help="Accept JSON lines over TCP")
+    parser.add_argument("--unix", metavar="PATH", help="Accept JSON lines on a unix socket")
+    parser.add_argument("--simulate", type=int, metavar="STATIONS", help="Generate synthetic readings")
+    parser.add_argument("--rate", type=float, default=1000, help="Simulated readings per second")
+    parser.add_argument("--duration", type=float, help="Stop after this many seconds")
+    parser.add_argument("--interval", type=float, default=1.0, help="Seconds between prediction ticks")
+    parser.add_argument("--bucket-seconds", type=int, default=300, help="Ring buffer bucket width")
+    parser.add_argument("--max-stations", type=int, default=10_000)
+    parser.add_argument("--max-skew", type=float, default=300,
+                        help="Seconds a reading's timestamp may be ahead of this clock before it is rejected")
+    parser.add_argument("--max-pending", type=int, default=10_000, help="Queued readings before sources block")
+    parser.add_argument("--max-batch", type=int, default=4096, help="Most rows per predict_proba call")
+    parser.add_argument("--log", default=STREAM_LOG_PATH, help="Where predictions are written")
+    args = parser.parse_args()
+
+    sources = []
+    if args.tail:
+        sources.append(tail_file(args.tail, args.from_start))
+    if args.listen:
+        host, _, port = args.listen.rpartition(':')
+        sources.append(listen(host or "127.0.0.1", int(port)))
+    if args.unix:
+        sources.append(listen(unix_path=args.unix))
+    if args.simulate:
+        sources.append(simulate(args.simulate, args.rate))
+    if not sources:
+        parser.error("Give at least one source: --tail, --listen, --unix or --simulate")
+
+    holder = ModelHolder()
+    try:
+        features = holder.current()[3]
+    except FileNotFoundError:
+        print("❌ Model files not found. Please run train_model.py first.")
+        raise SystemExit(1)
+
+    windows = StationWindows(features, bucket_seconds=args.bucket_seconds, max_stations=args.max_stations,
+                             max_skew_s=args.max_skew)
+    stream = SensorStream(holder, windows, args.interval, args.max_batch, args.max_pending, args.log)
+
+    async def run():
+        task = asyncio.create_task(stream.run(sources))
+        try:
+            await asyncio.wait_for(asyncio.shield(task), args.duration) if args.duration else await task
+        except asyncio.TimeoutError:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    print(f"📋 {stream.stats()}")
+
+if __name__ == "__main__":
+    main()
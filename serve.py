@@ -0,0 +1,236 @@
+# serve.py
+import argparse
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from model_artifacts import ModelHolder, predict_batch
+from shadow_scoring import shadow_from_env
+
+MAX_BODY_BYTES = 1_000_000
+
+class MicroBatcher:
+    """Collect concurrent single-row requests into batches for one predict call"""
+
+    def __init__(self, predict_fn, max_batch_size=64, max_wait_ms=5.0):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue = None
+        # One worker keeps batches in order; the next batch fills while it runs
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="predict")
+        self.batches = 0
+        self.rows = 0
+
+    def start(self):
+        self._queue = asyncio.Queue()
+        return asyncio.create_task(self._run())
+
+    async def submit(self, row):
+        """Queue one feature row and wait for its (label, confidence, probabilities, classes)"""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((row, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                if not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                # asyncio.wait, unlike wait_for before Python 3.12, never swallows a cancel that
+                # lands as the get completes; a cancelled get leaves its row in the queue
+                getter = asyncio.ensure_future(self._queue.get())
+                try:
+                    done, _ = await asyncio.wait({getter}, timeout=timeout)
+                finally:
+                    getter.cancel()
+                if not done:
+                    break
+                batch.append(getter.result())
+
+            rows = np.array([row for row, _ in batch], dtype=np.float64)
+            try:
+                labels, confidences, probabilities, classes = await loop.run_in_executor(
+                    self._executor, self.predict_fn, rows
+                )
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.rows += len(batch)
+            for i, (_, future) in enumerate(batch):
+                if not future.done():
+                    future.set_result((labels[i], confidences[i], probabilities[i], classes))
+
+class PredictionServer:
+    """Minimal HTTP/1.1 JSON prediction service on top of asyncio streams"""
+
+    def __init__(self, holder, max_batch_size=64, max_wait_ms=5.0, shadow=None):
+        self.holder = holder
+        self.shadow = shadow
+        self.batcher = MicroBatcher(self._predict, max_batch_size, max_wait_ms)
+        self._batcher_task = None
+
+    def _predict(self, rows):
+        # Each batch runs entirely on one model version, even if a newer one is swapped in meanwhile
+        model, label_encoder, scaler, _, version = self.holder.current()
+        start = time.perf_counter()
+        labels, confidences, probabilities = predict_batch(model, label_encoder, scaler, rows)
+        if self.shadow is not None:
+            self.shadow.submit(rows, labels, confidences, (time.perf_counter() - start) * 1000, version)
+        # Probability columns are named by the same snapshot that produced them
+        return labels, confidences, probabilities, [str(c) for c in label_encoder.classes_]
+
+    @property
+    def features(self):
+        return list(self.holder.current()[3])
+
+    async def serve(self, host, port):
+        # Keep a reference so the task isn't garbage-collected and its failure is reported
+        self._batcher_task = self.batcher.start()
+        self._batcher_task.add_done_callback(self._batcher_done)
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        print(f"🚀 Serving predictions on http://{host}:{port}/predict")
+        async with server:
+            await server.serve_forever()
+
+    @staticmethod
+    def _batcher_done(task):
+        if not task.cancelled() and task.exception() is not None:
+            print(f"❌ Prediction batcher stopped: {task.exception()!r}")
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, path, _ = request_line.decode('latin-1').split(' ', 2)
+                except ValueError:
+                    await self._respond(writer, 400, {'error': 'Malformed request line'}, close=True)
+                    break
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                try:
+                    length = int(headers.get('content-length', 0) or 0)
+                    if length < 0:
+                        raise ValueError(length)
+                except ValueError:
+                    await self._respond(writer, 400, {'error': 'Invalid Content-Length'}, close=True)
+                    break
+                if length > MAX_BODY_BYTES:
+                    await self._respond(writer, 413, {'error': 'Request body too large'}, close=True)
+                    break
+                body = await reader.readexactly(length) if length else b''
+                close = headers.get('connection', '').lower() == 'close'
+
+                status, payload = await self.route(method, path, body)
+                await self._respond(writer, status, payload, close)
+                if close:
+                    break
+        except (ConnectionResetError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def route(self, method, path, body):
+        path = path.split('?', 1)[0]
+        if path == '/health':
+            health = {'status': 'ok', 'model': self.holder.current()[4],
+                      'batches': self.batcher.batches, 'rows': self.batcher.rows}
+            if self.shadow is not None:
+                health['shadow'] = self.shadow.stats()
+            return 200, health
+        if path != '/predict':
+            return 404, {'error': 'Not found'}
+        if method != 'POST':
+            return 405, {'error': 'Use POST'}
+
+        try:
+            request = json.loads(body or b'{}')
+            instances = request['instances'] if 'instances' in request else [request]
+            rows = [self._to_row(instance) for instance in instances]
+        except (ValueError, KeyError, TypeError) as e:
+            return 400, {'error': f'Invalid request: {e}'}
+
+        results = await asyncio.gather(*(self.batcher.submit(row) for row in rows))
+        predictions = [
+            {
+                'prediction': str(label),
+                'confidence': round(float(confidence), 2),
+                'probabilities': dict(zip(classes, np.round(probs.astype(float), 4).tolist())),
+            }
+            for label, confidence, probs, classes in results
+        ]
+        return 200, {'predictions': predictions} if 'instances' in request else predictions[0]
+
+    def _to_row(self, instance):
+        """Accept either {"Rainfall_mm": ..., ...} or {"features": [...]}"""
+        features = self.features
+        if 'features' in instance:
+            values = [float(v) for v in instance['features']]
+            if len(values) != len(features):
+                raise ValueError(f"expected {len(features)} features, got {len(values)}")
+        else:
+            values = [float(instance[name]) for name in features]
+        # json.loads accepts NaN and Infinity, which the model would silently score
+        if not np.isfinite(values).all():
+            raise ValueError("features must be finite numbers")
+        return values
+
+    async def _respond(self, writer, status, payload, close=False):
+        reasons = {200: 'OK', 400: 'Bad Request', 404: 'Not Found',
+                   405: 'Method Not Allowed', 413: 'Payload Too Large'}
+        body = json.dumps(payload).encode()
+        head = (f"HTTP/1.1 {status} {reasons.get(status, '')}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'close' if close else 'keep-alive'}\r\n\r\n")
+        writer.write(head.encode('latin-1') + body)
+        await writer.drain()
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP disaster prediction service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--max-batch-size", type=int, default=64, help="Most rows per predict_proba call")
+    parser.add_argument("--max-wait-ms", type=float, default=5.0, help="Longest a request waits for a batch to fill")
+    args = parser.parse_args()
+
+    holder = ModelHolder()
+    try:
+        holder.current()
+    except FileNotFoundError:
+        print("❌ Model files not found. Please run train_model.py first.")
+        raise SystemExit(1)
+
+    server = PredictionServer(holder, max_batch_size=args.max_batch_size, max_wait_ms=args.max_wait_ms,
+                              shadow=shadow_from_env())
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        print("👋 Server stopped")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+# shadow_scoring.py
+import argparse
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from model_artifacts import predict_batch
+from model_bundle import ModelBundle
+from model_registry import BUNDLE_FILENAME, default_registry
+from prediction_log import CSV_READ_OPTIONS, BufferedLogSink, CSVLogSink
+
+SHADOW_LOG_PATH = "Shadow_Log.csv"
+SHADOW_COLUMNS = ['Timestamp', 'Production_Version', 'Candidate_Version',
+                  'Production_Prediction', 'Candidate_Prediction',
+                  'Production_Confidence', 'Candidate_Confidence', 'Agree',
+                  'Batch_Size', 'Production_Latency_ms', 'Candidate_Latency_ms']
+
+def load_candidate(spec):
+    """(model, label_encoder, scaler, features, fingerprint) for a registry version or bundle path"""
+    registry = default_registry()
+    if spec in registry.versions():
+        path = registry.bundle_path(spec)
+    elif os.path.isdir(spec):
+        path = os.path.join(spec, BUNDLE_FILENAME)
+    else:
+        path = spec
+    bundle = ModelBundle(path)
+    return bundle.model, bundle.label_encoder, bundle.scaler, bundle.features, bundle.fingerprint
+
+class ShadowScorer:
+    """Scores a candidate model on production inputs in a background thread
+
+    ``submit`` only enqueues and never blocks; when the queue is full the
+    batch is dropped and counted, so shadow scoring can't slow requests down.
+    """
+
+    def __init__(self, candidate, log_path=SHADOW_LOG_PATH, max_queue=1024):
+        self.candidate = candidate
+        features = list(candidate[3])
+        self.log = BufferedLogSink(CSVLogSink(log_path, SHADOW_COLUMNS + features))
+        self.features = features
+        self.submitted = 0
+        self.scored = 0
+        self.dropped = 0
+        self.disagreements = 0
+        self.errors = 0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    @property
+    def version(self):
+        return self.candidate[4]
+
+    def submit(self, rows, labels, confidences, latency_ms=None, production_version=None):
+        """Queue a batch the production model scored; latency_ms is None for cached results"""
+        item = (datetime.now().strftime("%Y-%m-%d %H:%M:%S"), np.array(rows, dtype=np.float64),
+                list(labels), list(confidences), latency_ms, production_version)
+        try:
+            self._queue.put_nowait(item)
+            self.submitted += len(item[1])
+        except queue.Full:
+            self.dropped += len(item[1])
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            try:
+                self._score(*item)
+            except Exception as e:
+                self.errors += 1
+                print(f"Error in shadow scoring: {e}")
+
+    def _score(self, timestamp, rows, labels, confidences, latency_ms, production_version):
+        model, label_encoder, scaler, _, version = self.candidate
+        start = time.perf_counter()
+        candidate_labels, candidate_confidences, _ = predict_batch(model, label_encoder, scaler, rows)
+        candidate_latency_ms = (time.perf_counter() - start) * 1000
+
+        for i, row in enumerate(rows):
+            agree = str(labels[i]) == str(candidate_labels[i])
+            self.disagreements += not agree
+            record = {
+                'Timestamp': timestamp,
+                'Production_Version': production_version,
+                'Candidate_Version': version,
+                'Production_Prediction': labels[i],
+                'Candidate_Prediction': candidate_labels[i],
+                'Production_Confidence': round(float(confidences[i]), 2),
+                'Candidate_Confidence': round(float(candidate_confidences[i]), 2),
+                'Agree': agree,
+                'Batch_Size': len(rows),
+                'Production_Latency_ms': None if latency_ms is None else round(latency_ms, 3),
+                'Candidate_Latency_ms': round(candidate_latency_ms, 3),
+            }
+            record.update(zip(self.features, row.tolist()))
+            self.log.append(record)
+        self.scored += len(rows)
+
+    def stats(self):
+        return {
+            'candidate': self.version,
+            'submitted': self.submitted,
+            'scored': self.scored,
+            'dropped': self.dropped,
+            'disagreements': self.disagreements,
+            'agreement_rate': 1 - self.disagreements / self.scored if self.scored else None,
+            'errors': self.errors,
+        }
+
+    def close(self):
+        """Finish queued work and flush the shadow log"""
+        self._queue.put(None)
+        self._thread.join()
+        self.log.close()
+
+def shadow_from_env():
+    """ShadowScorer for DISASTER_SHADOW_MODEL (a registry version or bundle path), or None when unset"""
+    spec = os.environ.get("DISASTER_SHADOW_MODEL")
+    if not spec:
+        return None
+    try:
+        candidate = load_candidate(spec)
+    except (FileNotFoundError, ValueError) as e:
+        # A broken candidate must never take production down
+        print(f"⚠️ Shadow model {spec} not loaded: {e}")
+        return None
+    print(f"🌓 Shadow scoring with candidate {candidate[4]}")
+    return ShadowScorer(candidate, os.environ.get("DISASTER_SHADOW_LOG", SHADOW_LOG_PATH))
+
+def summarize(df):
+    """Agreement and latency summary of a shadow log"""
+    df = df.copy()
+    df['Agree'] = df['Agree'].astype(str) == 'True'
+    summary = {'rows': len(df), 'agreement_rate': float(df['Agree'].mean()) if len(df) else None}
+    for side in ('Production', 'Candidate'):
+        latency = pd.to_numeric(df[f'{side}_Latency_ms'], errors='coerce').dropna()
+        summary[f'{side.lower()}_p50_ms'] = float(latency.quantile(0.5)) if len(latency) else None
+        summary[f'{side.lower()}_p99_ms'] = float(latency.quantile(0.99)) if len(latency) else None
+    confusion = pd.crosstab(df['Production_Prediction'], df['Candidate_Prediction'],
+                            rownames=['Production'], colnames=['Candidate'])
+    return summary, confusion
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize how a shadow candidate compares with production")
+    parser.add_argument("--log", default=os.environ.get("DISASTER_SHADOW_LOG", SHADOW_LOG_PATH))
+    args = parser.parse_args()
+
+    try:
+        df = pd.read_csv(args.log, **CSV_READ_OPTIONS)
+    except FileNotFoundError:
+        print(f"❌ {args.log} not found. Set DISASTER_SHADOW_MODEL and make some predictions first.")
+        raise SystemExit(1)
+
+    for candidate, group in df.groupby('Candidate_Version'):
+        summary, confusion = summarize(group)
+        print(f"🌓 Candidate {candidate}: {summary['rows']} rows, "
+              f"agreement {summary['agreement_rate']:.2%}")
+        print(f"⚡ Latency p50/p99 ms: production {summary['production_p50_ms']}/{summary['production_p99_ms']}, "
+              f"candidate {summary['candidate_p50_ms']}/{summary['candidate_p99_ms']}")
+        print("📋 Production (rows) vs candidate (columns):")
+        print(confusion.to_string())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+# spatial_index.py
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from risk_scoring import RISK_LEVELS, confidence_risk_codes
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = np.pi * EARTH_RADIUS_KM / 180
+
+# Regions on the dashboard map are cells of this many degrees
+REGION_CELL_DEG = 1.0
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance in km; broadcasts over arrays"""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=np.float64)) for v in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+def _wrap_lon(lon):
+    return (np.asarray(lon, dtype=np.float64) + 180) % 360 - 180
+
+class SpatialIndex:
+    """Points bucketed into a lat/lon grid with CSR offsets
+
+    Points are sorted by grid cell, so the cells of one grid row that a query
+    touches are a single contiguous slice. A radius or bounding-box query
+    reads one or two slices per row and then filters exactly, without
+    visiting points elsewhere on the globe.
+    """
+
+    def __init__(self, lat, lon, cell_deg=0.5):
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = _wrap_lon(lon)
+        self.cell_deg = cell_deg
+        self.n_rows = int(np.ceil(180 / cell_deg))
+        self.n_cols = int(np.ceil(360 / cell_deg))
+
+        valid = np.flatnonzero(~(np.isnan(lat) | np.isnan(lon)))
+        cells = self._rows(lat[valid]) * self.n_cols + self._cols(lon[valid])
+        order = np.argsort(cells, kind='stable')
+        # Positions in the original arrays, in cell order
+        self.ids = valid[order]
+        self.lat = lat[self.ids]
+        self.lon = lon[self.ids]
+        self.offsets = np.zeros(self.n_rows * self.n_cols + 1, dtype=np.int64)
+        np.cumsum(np.bincount(cells, minlength=self.n_rows * self.n_cols), out=self.offsets[1:])
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _rows(self, lat):
+        return np.clip(((np.asarray(lat) + 90) // self.cell_deg).astype(np.int64), 0, self.n_rows - 1)
+
+    def _cols(self, lon):
+        return np.clip(((np.asarray(lon) + 180) // self.cell_deg).astype(np.int64), 0, self.n_cols - 1)
+
+    def _candidates(self, min_lat, max_lat, lon_ranges):
+        """Sorted-array positions of every point in the grid cells covering the ranges"""
+        rows = np.arange(self._rows(min_lat), self._rows(max_lat) + 1) * self.n_cols
+        starts = np.concatenate([self.offsets[rows + self._cols(lo)] for lo, _ in lon_ranges])
+        ends = np.concatenate([self.offsets[rows + self._cols(hi) + 1] for _, hi in lon_ranges])
+        lengths = ends - starts
+        total = int(lengths.sum())
+        if total == 0:
+            return np.empty(0, dtype=np.int64)
+        return np.arange(total) + np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+
+    def query_bbox(self, min_lat, min_lon, max_lat, max_lon):
+        """Indices of points inside the box; min_lon > max_lon crosses the antimeridian"""
+        # Wrap only out-of-range longitudes so that 180 stays the east edge
+        min_lon, max_lon = (float(v if -180 <= v <= 180 else _wrap_lon(v)) for v in (min_lon, max_lon))
+        ranges = [(min_lon, max_lon)] if min_lon <= max_lon else [(min_lon, 180.0), (-180.0, max_lon)]
+        pos = self._candidates(min_lat, max_lat, ranges)
+        lat, lon = self.lat[pos], self.lon[pos]
+        inside = (lat >= min_lat) & (lat <= max_lat)
+        inside &= np.logical_or.reduce([(lon >= lo) & (lon <= hi) for lo, hi in ranges])
+        return self.ids[pos[inside]]
+
+    def query_radius(self, lat, lon, radius_km):
+        """(indices, distances in km) of points within radius_km, nearest first"""
+        lon = float(_wrap_lon(lon))
+        angle = radius_km / EARTH_RADIUS_KM
+        min_lat = max(lat - np.degrees(angle), -90.0)
+        max_lat = min(lat + np.degrees(angle), 90.0)
+        # Widest longitude span of the spherical cap; every longitude once it reaches a pole
+        cos_lat = np.cos(np.radians(lat))
+        if min_lat <= -90 or max_lat >= 90 or np.sin(angle) >= cos_lat:
+            ranges = [(-180.0, 180.0)]
+        else:
+            half = np.degrees(np.arcsin(np.sin(angle) / cos_lat))
+            lo, hi = lon - half, lon + half
+            if lo < -180:
+                ranges = [(lo + 360, 180.0), (-180.0, hi)]
+            elif hi > 180:
+                ranges = [(lo, 180.0), (-180.0, hi - 360)]
+            else:
+                ranges = [(lo, hi)]
+
+        pos = self._candidates(min_lat, max_lat, ranges)
+        distance = haversine_km(lat, lon, self.lat[pos], self.lon[pos])
+        inside = distance <= radius_km
+        pos, distance = pos[inside], distance[inside]
+        nearest = np.argsort(distance, kind='stable')
+        return self.ids[pos[nearest]], distance[nearest]
+
+def region_keys(lat, lon, cell_deg=REGION_CELL_DEG):
+    """'lat,lon' of the south-west corner of each point's region cell"""
+    lat_cell = np.floor(np.asarray(lat, dtype=np.float64) / cell_deg) * cell_deg
+    lon_cell = np.floor(_wrap_lon(lon) / cell_deg) * cell_deg
+    return pd.Series(lat_cell).map('{:g}'.format) + ',' + pd.Series(lon_cell).map('{:g}'.format)
+
+def summarize_regions(lat, lon, labels, confidences, cell_deg=REGION_CELL_DEG):
+    """{region: {'count', 'risk': [none, low, medium, high], 'classes': {label: n}}} for located predictions
+
+    ``confidences`` may be a scalar, e.g. 0 when the log has no confidence column.
+    """
+    lat = pd.to_numeric(pd.Series(lat), errors='coerce').to_numpy()
+    confidences = pd.to_numeric(pd.Series(np.broadcast_to(np.asarray(confidences), len(lat))), errors='coerce')
+    df = pd.DataFrame({
+        'lat': lat,
+        'lon': pd.to_numeric(pd.Series(lon), errors='coerce').to_numpy(),
+        'label': pd.Series(labels).astype(str).to_numpy(),
+        'confidence': confidences.fillna(0).to_numpy(),
+    }).dropna(subset=['lat', 'lon'])
+    if df.empty:
+        return {}
+    df['region'] = region_keys(df['lat'], df['lon'], cell_deg).to_numpy()
+    df['risk'] = confidence_risk_codes(df['confidence'], df['label'])
+
+    risk = pd.crosstab(df['region'], df['risk']).reindex(columns=range(len(RISK_LEVELS)), fill_value=0)
+    classes = pd.crosstab(df['region'], df['label'])
+    return {
+        region: {
+            'count': int(risk.loc[region].sum()),
+            'risk': risk.loc[region].astype(int).tolist(),
+            'classes': {label: int(n) for label, n in classes.loc[region].items() if n},
+        }
+        for region in risk.index
+    }
+
+def merge_regions(target, other):
+    """Add the counts of one region summary into another, in place"""
+    for region, summary in other.items():
+        current = target.setdefault(region, {'count': 0, 'risk': [0] * len(RISK_LEVELS), 'classes': {}})
+        current['count'] += summary['count']
+        current['risk'] = [a + b for a, b in zip(current['risk'], summary['risk'])]
+        for label, n in summary['classes'].items():
+            current['classes'][label] = current['classes'].get(label, 0) + n
+    return target
+
+def regions_frame(regions, cell_deg=REGION_CELL_DEG):
+    """One row per region with its centre, counts, top disaster and a 0-1 risk score"""
+    columns = ['region', 'lat', 'lon', 'count', *RISK_LEVELS, 'top_disaster', 'risk_score']
+    if not regions:
+        return pd.DataFrame(columns=columns)
+    rows = []
+    for region, summary in regions.items():
+        south, west = (float(v) for v in region.split(','))
+        classes = summary['classes']
+        top = max(classes, key=lambda label: (classes[label], label != 'None')) if classes else 'None'
+        none, low, medium, high = summary['risk']
+        count = max(summary['count'], 1)
+        rows.append([region, south + cell_deg / 2, west + cell_deg / 2, summary['count'],
+                     none, low, medium, high, top,
+                     # High-risk predictions count fully, medium ones half
+                     (high + 0.5 * medium) / count])
+    return pd.DataFrame(rows, columns=columns).sort_values('risk_score', ascending=False, ignore_index=True)
+
+def load_points(path):
+    """Frame with Latitude/Longitude (plus any prediction columns) from a log, dataset or GeoJSON catalog"""
+    if path.endswith((".json", ".geojson")):
+        from geojson_stream import read_catalog
+
+        events = read_catalog([path])
+        return pd.DataFrame({'Latitude': events['lat'], 'Longitude': events['lon'],
+                             'Magnitude': events['mag'], 'Depth_km': events['depth'], 'time': events['time']})
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path)
+    from prediction_log import CSV_READ_OPTIONS
+
+    return pd.read_csv(path, **CSV_READ_OPTIONS)
+
+def benchmark(n_points, queries=200, radius_km=100, seed=0):
+    """Build and query time on n_points clustered points (milliseconds)"""
+    rng = np.random.default_rng(seed)
+    centers = np.column_stack([rng.uniform(-60, 70, 200), rng.uniform(-180, 180, 200)])
+    which = rng.integers(0, len(centers), n_points)
+    lat = np.clip(centers[which, 0] + rng.normal(0, 3, n_points), -90, 90)
+    lon = centers[which, 1] + rng.normal(0, 3, n_points)
+
+    start = time.perf_counter()
+    index = SpatialIndex(lat, lon)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    radius_ms, bbox_ms, hits = [], [], []
+    for i in range(queries):
+        qlat, qlon = centers[i % len(centers)] + rng.normal(0, 1, 2)
+        start = time.perf_counter()
+        ids, _ = index.query_radius(qlat, qlon, radius_km)
+        radius_ms.append((time.perf_counter() - start) * 1000)
+        hits.append(len(ids))
+        start = time.perf_counter()
+        index.query_bbox(qlat - 2, qlon - 2, qlat + 2, qlon + 2)
+        bbox_ms.append((time.perf_counter() - start) * 1000)
+    return {
+        'points': n_points, 'build_ms': build_ms, 'mean_hits': float(np.mean(hits)),
+        'radius_p50_ms': float(np.percentile(radius_ms, 50)), 'radius_p99_ms': float(np.percentile(radius_ms, 99)),
+        'bbox_p50_ms': float(np.percentile(bbox_ms, 50)), 'bbox_p99_ms': float(np.percentile(bbox_ms, 99)),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Regional queries over located predictions, stations and events")
+    commands = parser.add_subparsers(dest="command", required=True)
+    near = commands.add_parser("near", help="Points within a radius of a location")
+    near.add_argument("source", help="CSV/Parquet log or dataset with Latitude/Longitude, or a GeoJSON catalog")
+    near.add_argument("lat", type=float)
+    near.add_argument("lon", type=float)
+    near.add_argument("--radius", type=float, default=100, help="Radius in km")
+    bbox = commands.add_parser("bbox", help="Points inside a bounding box")
+    bbox.add_argument("source")
+    bbox.add_argument("min_lat", type=float)
+    bbox.add_argument("min_lon", type=float)
+    bbox.add_argument("max_lat", type=float)
+    bbox.add_argument("max_lon", type=float)
+    regions = commands.add_parser("regions", help="Regional risk summary of located predictions")
+    regions.add_argument("source")
+    regions.add_argument("--cell-deg", type=float, default=REGION_CELL_DEG)
+    regions.add_argument("--top", type=int, default=15)
+    bench = commands.add_parser("benchmark", help="Time index build and queries on synthetic points")
+    bench.add_argument("--points", type=int, default=2_000_000)
+    args = parser.parse_args()
+
+    if args.command == "benchmark":
+        result = benchmark(args.points)
+        print(f"⚡ Indexed {result['points']:,} points in {result['build_ms']:.0f} ms")
+        print(f"⚡ Radius (100 km, ~{result['mean_hits']:.0f} hits): p50 {result['radius_p50_ms']:.2f} ms, "
+              f"p99 {result['radius_p99_ms']:.2f} ms")
+        print(f"⚡ Bounding box (4°): p50 {result['bbox_p50_ms']:.2f} ms, p99 {result['bbox_p99_ms']:.2f} ms")
+        return
+
+    if not os.path.exists(args.source):
+        parser.error(f"Source not found: {args.source}")
+    df = load_points(args.source)
+    if 'Latitude' not in df.columns or 'Longitude' not in df.columns:
+        print(f"❌ {args.source} has no Latitude/Longitude columns")
+        raise SystemExit(1)
+
+    if args.command == "regions":
+        if 'AI_Prediction' not in df.columns:
+            print(f"❌ {args.source} has no AI_Prediction column")
+            raise SystemExit(1)
+        summary = summarize_regions(df['Latitude'], df['Longitude'], df['AI_Prediction'],
+                                    df.get('AI_Confidence', 0), args.cell_deg)
+        table = regions_frame(summary, args.cell_deg)
+        print(f"📋 {len(table)} regions from {sum(s['count'] for s in summary.values())} located rows")
+        print(table.head(args.top).round(3).to_string(index=False))
+        return
+
+    start = time.perf_counter()
+    index = SpatialIndex(df['Latitude'].to_numpy(dtype=float), df['Longitude'].to_numpy(dtype=float))
+    build_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    if args.command == "near":
+        ids, distance = index.query_radius(args.lat, args.lon, args.radius)
+        result = df.iloc[ids].assign(Distance_km=distance.round(1))
+    else:
+        ids = index.query_bbox(args.min_lat, args.min_lon, args.max_lat, args.max_lon)
+        result = df.iloc[ids]
+    query_ms = (time.perf_counter() - start) * 1000
+    print(f"✅ {len(result)} of {len(index)} located points (index {build_ms:.0f} ms, query {query_ms:.2f} ms)")
+    print(result.head(20).to_string(index=False))
+
+if __name__ == "__main__":
+    main()
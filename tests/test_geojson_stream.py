@@ -0,0 +1,105 @@
+# tests/test_geojson_stream.py
+import io
+import json
+
+import numpy as np
+import pytest
+
+import geojson_stream
+from geojson_stream import CatalogBuilder, iter_features, read_catalog
+
+def make_feature(i):
+    return {
+        'type': "Feature",
+        'properties': {
+            'mag': None if i % 5 == 0 else round(1.5 + i * 0.37, 2),
+            'time': 1_700_000_000_000 + i * 61_001,
+            # Escapes and non-ASCII text that a chunk boundary can split
+            'place': f"{i} km SSW of \"Volcán\" \\ Nordé\n☃",
+            'tsunami': i % 2 == 0,
+            'depth_error': -1.25e-3 * i,
+        },
+        'geometry': {'type': "Point", 'coordinates': [-155.0 + i / 7, 19.0 - i / 11, 10.0 + i]},
+        'id': f"ev{i:04d}",
+    }
+
+FEATURES = [make_feature(i) for i in range(40)]
+
+def usgs_feed(features=FEATURES, indent=None):
+    """FeatureCollection laid out like a USGS response: metadata first, bbox after the features"""
+    return json.dumps({
+        'type': "FeatureCollection",
+        'metadata': {'generated': 1_700_000_000_000, 'title': "USGS \"All\" Earthquakes", 'count': len(features)},
+        'features': features,
+        'bbox': [-180.0, -90.0, -1000.0, 180.0, 90.0, 1000.0],
+    }, indent=indent)
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1 << 20])
+@pytest.mark.parametrize("indent", [None, 2])
+def test_features_match_json_loads(chunk_size, indent):
+    feed = usgs_feed(indent=indent)
+    metadata = []
+    features = list(iter_features(io.StringIO(feed), chunk_size, metadata.append))
+    assert features == json.loads(feed)['features']
+    assert metadata == [json.loads(feed)['metadata']]
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1 << 20])
+def test_binary_streams_and_paths(chunk_size, tmp_path):
+    feed = usgs_feed()
+    assert list(iter_features(io.BytesIO(feed.encode('utf-8')), chunk_size)) == FEATURES
+    path = tmp_path / "catalog.geojson"
+    path.write_text(feed, encoding='utf-8')
+    assert list(iter_features(str(path), chunk_size)) == FEATURES
+    assert list(iter_features(path, chunk_size)) == FEATURES
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7])
+def test_numbers_split_across_chunks(chunk_size):
+    # A number ending exactly where the buffer ends must not be cut short
+    feed = '{"features": [1234567.125e-2, -0.5, 98765432109876543210, true, null], "bbox": [1e300]}'
+    assert list(iter_features(io.StringIO(feed), chunk_size)) == [1234567.125e-2, -0.5, 98765432109876543210,
+                                                                  True, None]
+
+def test_collections_without_features_or_metadata():
+    assert list(iter_features(io.StringIO('{"type": "FeatureCollection", "features": []}'))) == []
+    assert list(iter_features(io.StringIO('{}'))) == []
+
+@pytest.mark.parametrize("feed", ['', '[]', '{"features": [{"a": 1}', '{"features": [1, 2]'])
+def test_malformed_streams_raise(feed):
+    with pytest.raises(ValueError):
+        list(iter_features(io.StringIO(feed), 3))
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1 << 20])
+def test_catalog_columns(chunk_size):
+    catalog = read_catalog(io.StringIO(usgs_feed()), chunk_size=chunk_size)
+    expected_mag = [np.nan if f['properties']['mag'] is None else f['properties']['mag'] for f in FEATURES]
+    np.testing.assert_array_equal(catalog['mag'], expected_mag)
+    assert catalog['time'].tolist() == [f['properties']['time'] for f in FEATURES]
+    assert catalog['lon'].tolist() == [f['geometry']['coordinates'][0] for f in FEATURES]
+    assert catalog['lat'].tolist() == [f['geometry']['coordinates'][1] for f in FEATURES]
+    assert catalog['depth'].tolist() == [f['geometry']['coordinates'][2] for f in FEATURES]
+
+def test_metadata_count_reserves_room_before_features(monkeypatch):
+    calls = []
+    reserve = CatalogBuilder.reserve
+
+    def record(builder, extra):
+        calls.append((builder.size, extra, len(builder.columns['mag'])))
+        reserve(builder, extra)
+
+    monkeypatch.setattr(geojson_stream.CatalogBuilder, 'reserve', record)
+    catalogs = [usgs_feed(FEATURES[:25]), usgs_feed(FEATURES[25:])]
+    catalog = read_catalog([io.StringIO(feed) for feed in catalogs])
+    # One reservation per catalog, made before any of its features are added
+    assert calls == [(0, 25, 0), (25, 15, 25)]
+    assert len(catalog['mag']) == len(FEATURES)
+
+def test_builder_grows_without_metadata():
+    feed = json.dumps({'features': FEATURES})
+    catalog = read_catalog(io.StringIO(feed), capacity=3)
+    assert catalog['time'].tolist() == [f['properties']['time'] for f in FEATURES]
+
+def test_missing_depth_and_time():
+    feature = {'geometry': {'coordinates': [1.0, 2.0]}, 'properties': {'mag': 3.0}}
+    catalog = read_catalog(io.StringIO(json.dumps({'features': [feature]})))
+    assert np.isnan(catalog['depth'][0])
+    assert catalog['time'].tolist() == [0]
@@ -0,0 +1,126 @@
+# tests/test_log_aggregates.py
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from log_aggregates import STATS_COLUMNS, AggregateStore, RunningStats
+
+@pytest.fixture(scope="module")
+def log():
+    """A prediction log with a few unlocated rows and rows missing numeric readings"""
+    rng = np.random.default_rng(0)
+    n = 1200
+    df = pd.DataFrame({
+        'Timestamp': (pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.permutation(n), unit='min'))
+        .strftime('%Y-%m-%d %H:%M:%S'),
+        'AI_Prediction': rng.choice(['None', 'Flood', 'Wildfire', 'Earthquake'], n),
+        'AI_Confidence': rng.uniform(30, 100, n).round(2),
+        'Rainfall_mm': rng.uniform(0, 500, n),
+        'Humidity_%': rng.uniform(0, 100, n),
+        'Temperature_C': rng.uniform(-10, 60, n),
+        'Wind_Speed_kmph': rng.uniform(0, 150, n),
+        'Latitude': rng.uniform(-5, 5, n),
+        'Longitude': rng.uniform(170, 190, n) - 360 * (rng.random(n) < 0.5),
+    })
+    df.loc[rng.choice(n, 50, replace=False), 'Latitude'] = np.nan
+    df.loc[rng.choice(n, 50, replace=False), 'Humidity_%'] = np.nan
+    return df
+
+def single_pass(df):
+    stats = RunningStats()
+    stats.update_frame(df)
+    return stats
+
+def assert_same(stats, expected):
+    assert stats.count == expected.count
+    assert stats.class_counts == expected.class_counts
+    assert stats.last_timestamp == expected.last_timestamp
+    assert stats.n == expected.n
+    np.testing.assert_allclose(stats.mean, expected.mean, rtol=1e-10)
+    np.testing.assert_allclose(stats.comoment, expected.comoment, rtol=1e-8)
+    assert stats.recent == expected.recent
+    assert stats.regions == expected.regions
+
+def test_single_pass_matches_pandas(log):
+    stats = single_pass(log)
+    complete = log[STATS_COLUMNS].dropna()
+    assert stats.count == len(log)
+    assert stats.n == len(complete)
+    assert stats.most_common() == log['AI_Prediction'].value_counts().idxmax()
+    assert stats.mean_of('Rainfall_mm') == pytest.approx(complete['Rainfall_mm'].mean())
+    np.testing.assert_allclose(stats.correlation().to_numpy(), complete.corr().to_numpy(), atol=1e-10)
+    assert stats.last_timestamp == log['Timestamp'].max()
+    assert [p[0] for p in stats.recent] == sorted(log['Timestamp'])[-len(stats.recent):]
+    assert sum(region['count'] for region in stats.regions.values()) == log['Latitude'].notna().sum()
+
+def test_merging_batches_matches_a_single_pass(log):
+    merged = RunningStats()
+    for chunk in np.array_split(log.index, 7):
+        merged.merge(single_pass(log.loc[chunk]))
+    assert_same(merged, single_pass(log))
+
+def test_update_rows_matches_update_frame(log):
+    stats = RunningStats()
+    for start in range(0, len(log), 100):
+        stats.update_rows(log.iloc[start:start + 100].to_dict('records'))
+    stats.update_rows([])
+    assert_same(stats, single_pass(log))
+
+def test_snapshot_round_trip_and_copy_isolation(log):
+    stats = single_pass(log)
+    restored = RunningStats.from_dict(json.loads(json.dumps(stats.to_dict())))
+    assert_same(restored, stats)
+
+    snapshot = stats.copy()
+    stats.update_frame(log.head(10))
+    assert snapshot.count == len(log)
+    assert sum(region['count'] for region in snapshot.regions.values()) == log['Latitude'].notna().sum()
+
+def test_regions_are_counted_without_a_confidence_column(log):
+    stats = single_pass(log.drop(columns='AI_Confidence'))
+    located = log['Latitude'].notna()
+    assert sum(region['count'] for region in stats.regions.values()) == located.sum()
+    # Without a confidence every located disaster counts as low risk
+    assert sum(region['risk'][1] for region in stats.regions.values()) == \
+        (located & (log['AI_Prediction'] != 'None')).sum()
+
+def test_old_snapshots_without_regions_load():
+    data = RunningStats().to_dict()
+    del data['regions']
+    assert RunningStats.from_dict(data).regions == {}
+
+def test_empty_stats():
+    stats = RunningStats()
+    stats.update_frame(pd.DataFrame())
+    assert stats.count == 0
+    assert stats.most_common() == "N/A"
+    assert stats.mean_of('Rainfall_mm') == 0
+
+def test_store_coalesces_writes_until_flushed(log, tmp_path):
+    path = str(tmp_path / "aggregates.json")
+    store = AggregateStore(path, write_interval=3600)
+    store.rebuild([log.iloc[:400]])
+
+    # The first batch after a rebuild is due at once, later ones wait for the interval
+    store.add_rows(log.iloc[400:800].to_dict('records'))
+    store.add_rows(log.iloc[800:].to_dict('records'))
+    with open(path, encoding='utf-8') as f:
+        assert json.load(f)['count'] == 800
+
+    # Another process reading the snapshot sees the pending rows only after a flush
+    other = AggregateStore(path)
+    assert other.current().count == 800
+    assert_same(store.current(), single_pass(log))
+    assert other.current().count == len(log)
+
+def test_store_rebuild_replaces_totals(log, tmp_path):
+    path = str(tmp_path / "aggregates.json")
+    store = AggregateStore(path, write_interval=0)
+    assert not store.exists()
+    assert store.current().count == 0
+    store.add_rows(log.to_dict('records'))
+    assert store.exists()
+    store.rebuild([])
+    assert store.current().count == 0
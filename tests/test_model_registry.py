@@ -0,0 +1,110 @@
+# tests/test_model_registry.py
+import os
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from model_artifacts import ModelHolder
+from model_bundle import write_bundle
+from model_registry import ModelRegistry
+from tree_engine import FlatForest
+
+FEATURES = ['Rainfall_mm', 'Humidity_%', 'Temperature_C']
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+def make_bundle(path, seed):
+    rng = np.random.default_rng(seed)
+    X = rng.uniform(0, 100, (200, len(FEATURES)))
+    y = np.where(X[:, 0] > 50, 'Flood', 'None')
+    forest = RandomForestClassifier(n_estimators=3, max_depth=3, random_state=seed).fit(X, y)
+    write_bundle(str(path), FlatForest.from_sklearn(forest), forest.classes_, FEATURES,
+                 np.zeros(len(FEATURES)), np.ones(len(FEATURES)), True)
+    return str(path)
+
+@pytest.fixture
+def registry(tmp_path):
+    return ModelRegistry(str(tmp_path / "registry"))
+
+def test_publish_activate_and_prune(registry, tmp_path):
+    assert registry.versions() == [] and registry.current_version() is None
+    v1 = registry.publish(make_bundle(tmp_path / "a.bin", 1))
+    # Publishing the same bundle again reuses its version
+    assert registry.publish(make_bundle(tmp_path / "b.bin", 1)) == v1
+    v2 = registry.publish(make_bundle(tmp_path / "c.bin", 2), activate=False)
+    assert registry.current_version() == v1
+    assert sorted(registry.versions()) == sorted([v1, v2])
+
+    registry.activate(v2)
+    assert registry.current_version() == v2
+    with pytest.raises(ValueError):
+        registry.activate("no-such-version")
+    assert registry.current_version() == v2
+
+    assert registry.prune(keep=1) == [v1]
+    assert registry.versions() == [v2]
+
+def test_holder_swaps_after_the_recheck_interval(registry, tmp_path):
+    v1 = registry.publish(make_bundle(tmp_path / "a.bin", 1))
+    clock = FakeClock()
+    holder = ModelHolder(registry, check_interval=1.0, clock=clock)
+    first = holder.current()
+    assert holder.version == v1
+
+    v2 = registry.publish(make_bundle(tmp_path / "b.bin", 2))
+    clock.now += 0.5
+    assert holder.current() is first
+    clock.now += 0.5
+    second = holder.current()
+    assert holder.version == v2
+    assert second[4] != first[4]
+    # Callers still holding the old snapshot can keep scoring on it
+    X = np.array([[80.0, 50.0, 20.0]])
+    assert first[0].predict_proba(X).shape == second[0].predict_proba(X).shape
+
+@pytest.mark.parametrize("pointer", ["not-a-version\n", "../../etc\n"])
+def test_a_corrupt_pointer_keeps_the_loaded_model(registry, tmp_path, pointer, capsys):
+    v1 = registry.publish(make_bundle(tmp_path / "a.bin", 1))
+    clock = FakeClock()
+    holder = ModelHolder(registry, clock=clock)
+    first = holder.current()
+
+    with open(registry.pointer_path, 'w', encoding='utf-8') as f:
+        f.write(pointer)
+    for _ in range(3):
+        clock.now += 1
+        assert holder.current() is first
+        assert holder.version == v1
+    assert capsys.readouterr().out.count("Keeping model") == 1
+
+    # A valid pointer is picked up again at the next check
+    v2 = registry.publish(make_bundle(tmp_path / "b.bin", 2))
+    clock.now += 1
+    assert holder.current()[4] != first[4]
+    assert holder.version == v2
+
+def test_a_truncated_bundle_keeps_the_loaded_model(registry, tmp_path):
+    registry.publish(make_bundle(tmp_path / "a.bin", 1))
+    clock = FakeClock()
+    holder = ModelHolder(registry, clock=clock)
+    first = holder.current()
+
+    v2 = registry.publish(make_bundle(tmp_path / "b.bin", 2), activate=False)
+    with open(registry.bundle_path(v2), 'r+b') as f:
+        f.truncate(4)
+    registry.activate(v2)
+    clock.now += 1
+    assert holder.current() is first
+
+def test_a_holder_without_a_loadable_model_raises(registry):
+    os.makedirs(registry.root)
+    with open(registry.pointer_path, 'w', encoding='utf-8') as f:
+        f.write("missing\n")
+    with pytest.raises(FileNotFoundError):
+        ModelHolder(registry).current()
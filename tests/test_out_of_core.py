@@ -0,0 +1,113 @@
+# tests/test_out_of_core.py
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import LabelEncoder, StandardScaler
+
+from out_of_core import evaluate, fit_bagged_forest, stratified_split, stream_to_disk, train_out_of_core
+from train_model import prepare_data
+
+FEATURES = ['Rainfall_mm', 'Temperature_C', 'Magnitude']
+TARGET = 'Disaster_Type'
+FOREST_PARAMS = {'n_estimators': 8, 'max_depth': 6, 'class_weight': 'balanced', 'random_state': 0, 'n_jobs': 1}
+
+@pytest.fixture(scope="module")
+def frame():
+    """Separable classes with uneven sizes; Wildfire comes first so label codes need remapping"""
+    rng = np.random.default_rng(0)
+    n = 900
+    df = pd.DataFrame({
+        'Rainfall_mm': rng.uniform(0, 500, n),
+        'Temperature_C': rng.uniform(-10, 60, n),
+        'Magnitude': rng.uniform(0, 9, n),
+    })
+    df[TARGET] = np.select([df['Temperature_C'] > 45, df['Rainfall_mm'] > 380, df['Magnitude'] > 7],
+                           ['Wildfire', 'Flood', 'Earthquake'], 'None')
+    df = df.sort_values(TARGET, key=lambda s: s != 'Wildfire', kind='stable').reset_index(drop=True)
+    df.loc[[5, 300, 301], 'Magnitude'] = np.nan
+    return df
+
+@pytest.fixture(params=['csv', 'parquet'])
+def data_path(request, frame, tmp_path_factory):
+    path = tmp_path_factory.mktemp("data") / f"dataset.{request.param}"
+    if request.param == 'csv':
+        frame.to_csv(path, index=False)
+    else:
+        frame.to_parquet(path, index=False)
+    return str(path)
+
+def test_streaming_in_chunks_matches_loading_in_memory(frame, data_path, tmp_path):
+    dataset = stream_to_disk(data_path, FEATURES, TARGET, work_dir=str(tmp_path), chunksize=37)
+    complete = frame.dropna(subset=FEATURES)
+    X = complete[FEATURES].to_numpy()
+    label_encoder = LabelEncoder().fit(complete[TARGET])
+    scaler = StandardScaler().fit(X)
+
+    assert len(dataset) == len(complete)
+    np.testing.assert_array_equal(dataset.X, X.astype(np.float32))
+    assert list(dataset.label_encoder.classes_) == list(label_encoder.classes_)
+    np.testing.assert_array_equal(dataset.y, label_encoder.transform(complete[TARGET]))
+    np.testing.assert_allclose(dataset.scaler.mean_, scaler.mean_, rtol=1e-12)
+    np.testing.assert_allclose(dataset.scaler.scale_, scaler.scale_, rtol=1e-10)
+    np.testing.assert_allclose(dataset.scaled(np.arange(len(dataset))), scaler.transform(X), rtol=1e-5, atol=1e-5)
+
+@pytest.mark.parametrize("chunksize", [7, 100, 1_000_000])
+def test_stratified_split_preserves_class_proportions(tmp_path, chunksize):
+    y = np.random.default_rng(1).choice(5, size=2003, p=[0.5, 0.25, 0.15, 0.08, 0.02]).astype(np.int16)
+    train_idx, test_idx, class_offsets = stratified_split(y, 0.2, random_state=3, chunksize=chunksize,
+                                                          work_dir=str(tmp_path))
+    class_counts = np.bincount(y)
+    test_counts = np.bincount(y[test_idx], minlength=5)
+    np.testing.assert_array_equal(test_counts, np.floor(class_counts * 0.2))
+    # Within one row per class of what train_test_split(stratify=y) keeps out
+    _, sklearn_test = train_test_split(y, test_size=0.2, random_state=3, stratify=y)
+    assert np.abs(test_counts - np.bincount(sklearn_test, minlength=5)).max() <= 1
+
+    # Every row lands in exactly one side, and train rows are grouped by class
+    assert sorted(np.concatenate([train_idx, test_idx])) == list(range(len(y)))
+    assert (np.diff(test_idx) > 0).all()
+    for c in range(5):
+        assert (y[train_idx[class_offsets[c]:class_offsets[c + 1]]] == c).all()
+
+def test_stratified_split_is_deterministic(tmp_path):
+    y = np.random.default_rng(2).integers(0, 3, 500).astype(np.int16)
+    for name in ("a", "b"):
+        (tmp_path / name).mkdir()
+    first = stratified_split(y, 0.25, 7, 64, str(tmp_path / "a"))
+    second = stratified_split(y, 0.25, 7, 64, str(tmp_path / "b"))
+    for a, b in zip(first, second):
+        np.testing.assert_array_equal(a, b)
+
+def test_prepare_data_stratifies_like_the_out_of_core_split(frame, tmp_path):
+    complete = frame.dropna(subset=FEATURES).copy()
+    for column in ('Humidity_%', 'Wind_Speed_kmph', 'Soil_Moisture_%', 'Depth_km'):
+        complete[column] = 0.0
+    _, _, y_train, y_test, label_encoder, _ = prepare_data(complete, random_state=0)
+    y = label_encoder.transform(complete[TARGET]).astype(np.int16)
+    _, test_idx, _ = stratified_split(y, 0.2, 0, 100, str(tmp_path))
+    assert np.abs(np.bincount(y_test) - np.bincount(y[test_idx])).max() <= 1
+    assert len(y_train) + len(y_test) == len(complete)
+
+def test_out_of_core_fit_matches_an_in_memory_fit(frame, data_path, tmp_path):
+    forest, dataset, train_idx, accuracy = train_out_of_core(
+        data_path, FEATURES, TARGET, FOREST_PARAMS, work_dir=str(tmp_path), chunksize=64, max_samples=10_000
+    )
+    assert len(forest.estimators_) == FOREST_PARAMS['n_estimators']
+    test_idx = np.setdiff1d(np.arange(len(dataset)), train_idx)
+    in_memory = RandomForestClassifier(**FOREST_PARAMS).fit(dataset.scaled(train_idx), dataset.y[train_idx])
+    expected = (in_memory.predict(dataset.scaled(test_idx)) == dataset.y[test_idx]).mean()
+    assert accuracy > 0.9
+    assert abs(accuracy - expected) < 0.05
+
+    # Evaluating in chunks scores the same rows as one pass
+    assert evaluate(forest, dataset, test_idx, chunksize=9) == evaluate(forest, dataset, test_idx)
+
+    # The same trees fit on the same rows whatever size the streaming chunks were
+    small = stream_to_disk(data_path, FEATURES, TARGET, work_dir=str(tmp_path / "one_chunk"),
+                           chunksize=1_000_000)
+    split = stratified_split(dataset.y, 0.2, 0, 64, str(tmp_path / "one_chunk"))
+    refit = fit_bagged_forest(small, split[0], split[2], FOREST_PARAMS, max_samples=10_000)
+    X = dataset.scaled(np.arange(len(dataset)))
+    np.testing.assert_array_equal(refit.predict_proba(X), forest.predict_proba(X))
@@ -0,0 +1,74 @@
+# tests/test_prediction_cache.py
+import numpy as np
+import pytest
+
+from prediction_cache import PredictionCache
+
+ROW = [120.0, 65.0, 31.0, 20.0, 45.0]
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+def test_entries_expire_after_the_ttl():
+    clock = FakeClock()
+    cache = PredictionCache(ttl_seconds=60, clock=clock)
+    cache.put(ROW, "v1", "Flood")
+
+    clock.now += 60
+    assert cache.get(ROW, "v1") == "Flood"
+    clock.now += 0.5
+    assert cache.get(ROW, "v1") is None
+    # The expired entry is dropped rather than kept around
+    assert cache.stats() == {'hits': 1, 'misses': 1, 'size': 0, 'hit_rate': 0.5}
+
+def test_a_new_put_restarts_the_ttl():
+    clock = FakeClock()
+    cache = PredictionCache(ttl_seconds=60, clock=clock)
+    cache.put(ROW, "v1", "Flood")
+    clock.now += 50
+    cache.put(ROW, "v1", "Wildfire")
+    clock.now += 50
+    assert cache.get(ROW, "v1") == "Wildfire"
+
+def test_least_recently_used_entries_are_evicted_first():
+    cache = PredictionCache(max_size=3, clock=FakeClock())
+    rows = [[float(i)] * 5 for i in range(4)]
+    for i, row in enumerate(rows[:3]):
+        cache.put(row, "v1", i)
+
+    # Reading row 0 makes row 1 the oldest
+    assert cache.get(rows[0], "v1") == 0
+    cache.put(rows[3], "v1", 3)
+    assert cache.get(rows[1], "v1") is None
+    assert [cache.get(row, "v1") for row in (rows[0], rows[2], rows[3])] == [0, 2, 3]
+
+    # Overwriting an entry refreshes it too
+    cache.put(rows[0], "v1", "again")
+    cache.put(rows[1], "v1", 1)
+    assert cache.get(rows[2], "v1") is None
+    assert cache.stats()['size'] == 3
+
+@pytest.mark.parametrize("decimals, same, different", [
+    (1, [120.04, 64.96, 31.0, 20.0, 45.0], [120.06, 65.0, 31.0, 20.0, 45.0]),
+    (0, [119.6, 65.4, 31.0, 20.0, 45.0], [120.6, 65.0, 31.0, 20.0, 45.0]),
+    (2, [120.001, 65.0, 31.0, 20.0, 45.0], [120.01, 65.0, 31.0, 20.0, 45.0]),
+])
+def test_keys_follow_feature_rounding(decimals, same, different):
+    cache = PredictionCache(decimals=decimals, clock=FakeClock())
+    cache.put(ROW, "v1", "Flood")
+    assert cache.key(same, "v1") == cache.key(ROW, "v1")
+    assert cache.get(same, "v1") == "Flood"
+    assert cache.get(different, "v1") is None
+
+def test_keys_depend_on_model_version_and_accept_numpy_rows():
+    cache = PredictionCache(clock=FakeClock())
+    cache.put(np.array(ROW, dtype=np.float32), "v1", "Flood")
+    assert cache.get(ROW, "v1") == "Flood"
+    assert cache.get(ROW, "v2") is None
+    assert cache.key(np.array(ROW), "v1") == cache.key(ROW, "v1")
+    cache.clear()
+    assert cache.get(ROW, "v1") is None
@@ -0,0 +1,253 @@
+# tests/test_prediction_log.py
+import csv
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import prediction_log
+from log_aggregates import AggregateStore, RunningStats
+from prediction_log import (LOG_COLUMNS, BufferedLogSink, CSVLogSink, ParquetLogSink, SQLiteLogSink,
+                            create_aggregate_store, migrate_csv_to_parquet)
+
+OLD_COLUMNS = LOG_COLUMNS[:-2]
+
+def make_rows(n, start="2024-05-01 23:58:00"):
+    """Log rows a minute apart, so a handful of them cross midnight"""
+    times = pd.date_range(start, periods=n, freq="min")
+    return [{
+        'Timestamp': t.strftime('%Y-%m-%d %H:%M:%S'),
+        'Logic_Assessment': "None (High)",
+        'AI_Prediction': ['None', 'Flood', 'Wildfire'][i % 3],
+        'AI_Confidence': 50.0 + i,
+        'Rainfall_mm': float(i * 10),
+        'Humidity_%': 60.0,
+        'Temperature_C': 20.0 + i,
+        'Wind_Speed_kmph': 5.0,
+        'Soil_Moisture_%': 40.0,
+        'Magnitude': 0.0,
+        'Depth_km': 0.0,
+        'Latitude': 10.0 + i,
+        'Longitude': -20.0 - i,
+    } for i, t in enumerate(times)]
+
+@pytest.fixture(params=['csv', 'sqlite', 'parquet'])
+def sink(request, tmp_path):
+    if request.param == 'csv':
+        return CSVLogSink(str(tmp_path / "log.csv"))
+    if request.param == 'sqlite':
+        return SQLiteLogSink(str(tmp_path / "log.db"))
+    return ParquetLogSink(str(tmp_path / "logs"))
+
+def sort_by_time(df):
+    return df.sort_values('Timestamp', kind='stable').reset_index(drop=True)
+
+def test_sinks_round_trip_rows(sink):
+    rows = make_rows(5)
+    sink.write_rows(rows[:2])
+    sink.write_rows(rows[2:])
+    sink.write_rows([])
+    df = sort_by_time(sink.read())
+    assert list(df.columns)[:len(LOG_COLUMNS)] == LOG_COLUMNS
+    # "None" is a class label and must not come back as a missing value
+    assert df['AI_Prediction'].tolist() == ['None', 'Flood', 'Wildfire', 'None', 'Flood']
+    assert df['AI_Confidence'].astype(float).tolist() == [r['AI_Confidence'] for r in rows]
+    assert df['Longitude'].astype(float).tolist() == [r['Longitude'] for r in rows]
+    assert pd.to_datetime(df['Timestamp']).dt.strftime('%Y-%m-%d %H:%M:%S').tolist() == \
+        [r['Timestamp'] for r in rows]
+
+def test_sinks_read_only_requested_columns(sink):
+    sink.write_rows(make_rows(3))
+    df = sink.read(['AI_Prediction', 'Magnitude', 'Not_A_Column'])
+    assert sorted(df.columns) == ['AI_Prediction', 'Magnitude']
+    assert len(df) == 3
+
+def test_sinks_count_and_read_rows_in_chunks(sink):
+    rows = make_rows(7)
+    sink.write_rows(rows[:3])
+    sink.write_rows(rows[3:])
+    assert sink.count_rows() == 7
+    chunks = list(sink.iter_chunks(['AI_Prediction', 'Latitude', 'Not_A_Column'], chunksize=2))
+    assert all(len(chunk) <= 2 for chunk in chunks)
+    df = pd.concat(chunks, ignore_index=True)
+    assert sorted(df.columns) == ['AI_Prediction', 'Latitude']
+    assert sorted(df['Latitude'].astype(float)) == [r['Latitude'] for r in rows]
+
+def test_csv_row_count_includes_an_unterminated_last_row(tmp_path):
+    path = tmp_path / "log.csv"
+    sink = CSVLogSink(str(path))
+    sink.write_rows(make_rows(3))
+    with open(path, 'rb+') as f:
+        f.truncate(path.stat().st_size - 2)
+    assert sink.count_rows() == 3 == len(sink.read())
+
+def test_reading_before_any_write_raises(sink):
+    with pytest.raises(FileNotFoundError):
+        sink.read()
+
+def test_csv_log_keeps_its_original_header(tmp_path):
+    path = tmp_path / "log.csv"
+    old = CSVLogSink(str(path), OLD_COLUMNS)
+    old.write_rows(make_rows(2))
+    CSVLogSink(str(path)).write_rows(make_rows(1))
+
+    with open(path, newline='', encoding='utf-8') as f:
+        lines = list(csv.reader(f))
+    assert lines[0] == OLD_COLUMNS
+    assert {len(line) for line in lines} == {len(OLD_COLUMNS)}
+    df = CSVLogSink(str(path)).read(['AI_Prediction', 'Latitude'])
+    assert list(df.columns) == ['AI_Prediction']
+    assert len(df) == 3
+
+def test_sqlite_log_gains_new_columns(tmp_path):
+    path = str(tmp_path / "log.db")
+    SQLiteLogSink(path, OLD_COLUMNS).write_rows(make_rows(2))
+    sink = SQLiteLogSink(path)
+    sink.write_rows(make_rows(1, start="2024-06-01"))
+
+    with sqlite3.connect(path) as conn:
+        columns = [row[1] for row in conn.execute('PRAGMA table_info("prediction_log")')]
+    assert columns == LOG_COLUMNS
+    df = sort_by_time(sink.read(['Timestamp', 'Latitude']))
+    assert df['Latitude'].isna().tolist() == [True, True, False]
+
+def test_parquet_log_partitions_by_day_and_fills_missing_columns(tmp_path):
+    path = tmp_path / "logs"
+    ParquetLogSink(str(path), OLD_COLUMNS).write_rows(make_rows(1, start="2024-04-30 12:00"))
+    sink = ParquetLogSink(str(path))
+    sink.write_rows(make_rows(4))
+    assert sorted(p.name for p in path.iterdir()) == ['date=2024-04-30', 'date=2024-05-01', 'date=2024-05-02']
+
+    df = sort_by_time(sink.read(['Timestamp', 'AI_Prediction', 'Latitude']))
+    assert len(df) == 5
+    assert np.isnan(df['Latitude'].iloc[0])
+    assert df['Latitude'].iloc[1:].tolist() == [10.0, 11.0, 12.0, 13.0]
+
+    sink.write_rows(make_rows(2))
+    sink.compact()
+    assert all(len(list(day.glob("*.parquet"))) == 1 for day in path.iterdir())
+    assert len(sink.read(['AI_Prediction'])) == 7
+
+def test_migrate_csv_to_parquet(tmp_path):
+    src = str(tmp_path / "log.csv")
+    CSVLogSink(src).write_rows(make_rows(5))
+    assert migrate_csv_to_parquet(src, str(tmp_path / "logs"), chunksize=2) == 5
+    df = sort_by_time(ParquetLogSink(str(tmp_path / "logs")).read())
+    assert df['AI_Prediction'].tolist() == ['None', 'Flood', 'Wildfire', 'None', 'Flood']
+
+def test_migrating_an_empty_csv_writes_nothing(tmp_path):
+    src = tmp_path / "log.csv"
+    src.write_text(",".join(LOG_COLUMNS) + "\n")
+    assert migrate_csv_to_parquet(str(src), str(tmp_path / "logs")) == 0
+    assert not (tmp_path / "logs").exists()
+    ParquetLogSink(str(tmp_path / "logs")).compact()
+
+class FlakySink:
+    """Stands in for a log whose first write fails"""
+
+    def __init__(self):
+        self.rows = []
+        self.failures = 1
+
+    def write_rows(self, rows):
+        if self.failures:
+            self.failures -= 1
+            raise OSError("disk full")
+        self.rows.extend(rows)
+
+    def read(self, columns=None):
+        return pd.DataFrame(self.rows)
+
+def test_buffered_sink_flushes_when_full_and_notifies_listeners():
+    inner = FlakySink()
+    inner.failures = 0
+    sink = BufferedLogSink(inner, max_rows=3, flush_interval=60)
+    seen = []
+    sink.add_listener(seen.append)
+    sink.add_listener(lambda rows: 1 / 0)
+    try:
+        rows = make_rows(4)
+        for row in rows[:3]:
+            sink.append(row)
+        assert inner.rows == rows[:3]
+        assert seen == [rows[:3]]
+
+        sink.append(rows[3])
+        assert inner.rows == rows[:3]
+        assert len(sink.read()) == 4
+        assert seen == [rows[:3], rows[3:]]
+    finally:
+        sink.close()
+
+def test_buffered_sink_keeps_rows_after_a_failed_write():
+    inner = FlakySink()
+    sink = BufferedLogSink(inner, max_rows=100, flush_interval=60)
+    try:
+        rows = make_rows(2)
+        sink.append(rows[0])
+        with pytest.raises(OSError):
+            sink.flush()
+        sink.append(rows[1])
+        sink.flush()
+        assert inner.rows == rows
+    finally:
+        sink.close()
+
+def test_aggregate_store_is_rebuilt_when_it_misses_log_rows(sink, tmp_path, monkeypatch):
+    monkeypatch.setenv("DISASTER_AGGREGATES_PATH", str(tmp_path / "aggregates.json"))
+    rows = make_rows(10)
+    sink.write_rows(rows)
+    expected = RunningStats()
+    expected.update_rows(rows)
+
+    # Only the first batch reached the snapshot before a crash
+    stale = AggregateStore(str(tmp_path / "aggregates.json"))
+    stale.rebuild([pd.DataFrame(rows[:4])])
+    store = create_aggregate_store(sink)
+    assert store.snapshot_count() == 10
+    stats = store.current()
+    assert stats.class_counts == expected.class_counts
+    np.testing.assert_allclose(stats.mean, expected.mean)
+    assert stats.regions == expected.regions
+
+    # A matching snapshot is kept as it is
+    mtime = (tmp_path / "aggregates.json").stat().st_mtime_ns
+    create_aggregate_store(sink)
+    assert (tmp_path / "aggregates.json").stat().st_mtime_ns == mtime
+
+def test_corrupt_aggregates_are_rebuilt(tmp_path, monkeypatch):
+    path = tmp_path / "aggregates.json"
+    monkeypatch.setenv("DISASTER_AGGREGATES_PATH", str(path))
+    sink = CSVLogSink(str(tmp_path / "log.csv"))
+    sink.write_rows(make_rows(3))
+    path.write_text("{not json")
+    assert create_aggregate_store(sink).current().count == 3
+
+def test_failed_aggregate_update_rebuilds_from_the_log(tmp_path, monkeypatch):
+    monkeypatch.setenv("DISASTER_LOG_BACKEND", "csv")
+    monkeypatch.setenv("DISASTER_LOG_PATH", str(tmp_path / "log.csv"))
+    monkeypatch.setenv("DISASTER_AGGREGATES_PATH", str(tmp_path / "aggregates.json"))
+    monkeypatch.setattr(prediction_log, '_sink', None)
+    sink = prediction_log.get_log_sink()
+    try:
+        aggregates = prediction_log._aggregates
+        add_rows = aggregates.add_rows
+        calls = []
+
+        def flaky_add_rows(rows):
+            calls.append(len(rows))
+            if len(calls) == 1:
+                raise ValueError("bad batch")
+            add_rows(rows)
+
+        monkeypatch.setattr(aggregates, 'add_rows', flaky_add_rows)
+        for row in make_rows(5):
+            sink.append(row)
+        sink.flush()
+        sink.append(make_rows(1, start="2024-06-01")[0])
+        assert prediction_log.get_aggregates().count == 6
+        assert aggregates.snapshot_count() == 6
+    finally:
+        sink.close()
+        monkeypatch.setattr(prediction_log, '_sink', None)
@@ -0,0 +1,121 @@
+# tests/test_risk_scoring.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from risk_scoring import (check_early_warnings, confidence_risk_codes, decode_warnings, get_risk_level,
+                          get_risk_level_from_confidence, risk_codes, risk_levels, score_frame,
+                          warning_codes, warning_flags)
+
+DISASTERS = ['None', 'Flood', 'Wildfire', 'Earthquake', 'Tsunami', 'Volcano']
+
+# The scalar functions disaster_app.py used before scoring moved to risk_scoring.py
+
+def original_confidence_risk(confidence, disaster_type):
+    if disaster_type == 'None':
+        return 'none'
+    if confidence >= 80:
+        return 'high'
+    elif confidence >= 60:
+        return 'medium'
+    return 'low'
+
+def original_risk(confidence, disaster_type, parameters):
+    if disaster_type == 'None':
+        return 'none'
+    risk_score = confidence / 100 * 40
+    if parameters.get('rainfall', 0) > 150 and disaster_type == 'Flood':
+        risk_score += 30
+    if parameters.get('temperature', 0) > 35 and disaster_type == 'Wildfire':
+        risk_score += 30
+    if parameters.get('magnitude', 0) > 5.0 and disaster_type == 'Earthquake':
+        risk_score += 30
+    if risk_score > 70:
+        return 'high'
+    elif risk_score > 40:
+        return 'medium'
+    return 'low'
+
+def original_warnings(parameters):
+    rainfall = parameters.get('rainfall', 0)
+    temperature = parameters.get('temperature', 0)
+    humidity = parameters.get('humidity', 50)
+    magnitude = parameters.get('magnitude', 0)
+    warnings = []
+    if rainfall > 250:
+        warnings.append(('🌊 CRITICAL FLOOD RISK', 'critical'))
+    elif rainfall > 150:
+        warnings.append(('⚠️ HIGH FLOOD RISK', 'high'))
+    if temperature > 40 and humidity < 20:
+        warnings.append(('🔥 CRITICAL FIRE RISK', 'critical'))
+    elif temperature > 35 and humidity < 25:
+        warnings.append(('⚠️ HIGH FIRE RISK', 'high'))
+    if magnitude > 7.0:
+        warnings.append(('🔄 MAJOR EARTHQUAKE', 'critical'))
+    elif magnitude > 5.5:
+        warnings.append(('⚠️ SIGNIFICANT QUAKE', 'high'))
+    return warnings
+
+@pytest.fixture(scope="module")
+def readings():
+    """Random slider-range readings, with a share of them exactly on a threshold"""
+    rng = np.random.default_rng(0)
+    n = 20_000
+    df = pd.DataFrame({
+        'rainfall': rng.integers(0, 501, n).astype(float),
+        'humidity': rng.integers(0, 101, n).astype(float),
+        'temperature': rng.integers(-10, 61, n).astype(float),
+        'wind_speed': rng.integers(0, 151, n).astype(float),
+        'magnitude': rng.integers(0, 101, n) / 10,
+        'confidence': rng.uniform(0, 100, n).round(2),
+        'disaster': rng.choice(DISASTERS, n),
+    })
+    edges = {'rainfall': [150, 250], 'humidity': [20, 25], 'temperature': [35, 40],
+             'magnitude': [5.0, 5.5, 7.0], 'confidence': [50.0, 60.0, 75.0, 80.0]}
+    for column, values in edges.items():
+        rows = rng.choice(n, n // 10, replace=False)
+        df.loc[rows, column] = rng.choice(values, len(rows))
+    # Bad rows: every comparison with NaN is False in the original code
+    for column in ['confidence', 'rainfall', 'temperature', 'humidity', 'magnitude']:
+        df.loc[rng.choice(n, n // 50, replace=False), column] = np.nan
+    return df
+
+def test_scalar_wrappers_match_original(readings):
+    for row in readings.head(3000).itertuples(index=False):
+        parameters = {'rainfall': row.rainfall, 'humidity': row.humidity, 'temperature': row.temperature,
+                      'wind_speed': row.wind_speed, 'magnitude': row.magnitude}
+        assert [(w['type'], w['severity']) for w in check_early_warnings(parameters)] == \
+            original_warnings(parameters)
+        assert get_risk_level(row.confidence, row.disaster, parameters) == \
+            original_risk(row.confidence, row.disaster, parameters)
+        assert get_risk_level_from_confidence(row.confidence, row.disaster) == \
+            original_confidence_risk(row.confidence, row.disaster)
+
+def test_vectorized_scoring_matches_original(readings):
+    records = readings.to_dict('records')
+    flags = warning_flags(readings)
+    assert [[(w['type'], w['severity']) for w in decode_warnings(f)] for f in flags] == \
+        [original_warnings(r) for r in records]
+    assert risk_levels(risk_codes(readings['confidence'], readings['disaster'], readings)).tolist() == \
+        [original_risk(r['confidence'], r['disaster'], r) for r in records]
+    assert risk_levels(confidence_risk_codes(readings['confidence'], readings['disaster'])).tolist() == \
+        [original_confidence_risk(r['confidence'], r['disaster']) for r in records]
+
+def test_nan_confidence_is_low_risk_like_the_original():
+    confidence = [np.nan, np.nan, np.nan]
+    disasters = ['Flood', 'Earthquake', 'None']
+    readings = {'magnitude': np.array([0, 9.0, 0])}
+    assert risk_levels(confidence_risk_codes(confidence, disasters)).tolist() == ['low', 'low', 'none']
+    assert risk_levels(risk_codes(confidence, disasters, readings)).tolist() == ['low', 'low', 'none']
+
+def test_missing_readings_use_original_defaults():
+    assert check_early_warnings({}) == []
+    assert warning_flags({'temperature': np.array([41.0])}).tolist() == \
+        warning_flags({'temperature': np.array([41.0]), 'humidity': 50}).tolist()
+
+def test_log_columns_are_accepted_and_codes_joined():
+    df = pd.DataFrame({'Rainfall_mm': [300, 0], 'Magnitude': [7.5, 0], 'AI_Confidence': [90, 90],
+                       'AI_Prediction': ['Flood', 'None']})
+    assert warning_codes(warning_flags(df)).tolist() == ['FLOOD_CRITICAL|QUAKE_MAJOR', '']
+    scored = score_frame(df)
+    assert scored['Risk_Level'].tolist() == ['medium', 'none']
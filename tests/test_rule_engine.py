@@ -0,0 +1,107 @@
+# tests/test_rule_engine.py
+import itertools
+import json
+import os
+
+import numpy as np
+import pytest
+
+from rule_engine import DecisionTable, FlagTable, RuleSet, default_rule_set, load_rules
+
+OPTIONS = {
+    'q1': ["No", "Yes - Mild", "Yes - Strong"],
+    'q2': ["No", "Yes - Smoke/Ash", "Yes - Lava flow"],
+    'q3': ["No", "Yes - Heavy rain", "Yes - Torrential rain"],
+    'q4': ["No", "Yes - High waves", "Yes - Coastal flooding"],
+    'q5': ["No", "Yes - Small fire", "Yes - Large wildfire"],
+}
+
+def logical_assessment(q1, q2, q3, q4, q5):
+    """The question flow disaster_app.py hard-coded before the rule file: (guess, confidence, asked keys)"""
+    if "Yes" in q1:
+        if "Yes" in q2:
+            return "Volcano", "High", {'q1', 'q2'}
+        return "Earthquake", "High" if "Strong" in q1 else "Medium", {'q1', 'q2'}
+    if "Yes" in q3:
+        if "Yes" in q4:
+            return "Tsunami", "High" if "Coastal flooding" in q4 else "Medium", {'q1', 'q3', 'q4'}
+        return "Flood", "High" if "Torrential" in q3 else "Medium", {'q1', 'q3', 'q4'}
+    if "Yes" in q5:
+        return "Wildfire", "High" if "Large" in q5 else "Medium", {'q1', 'q3', 'q5'}
+    return "None", "High", {'q1', 'q3', 'q5'}
+
+ALL_ANSWERS = list(itertools.product(*OPTIONS.values()))
+
+@pytest.fixture(scope="module")
+def rules():
+    return RuleSet(load_rules())
+
+def test_bundled_questions_match_original_options(rules):
+    assert rules.options == OPTIONS
+
+def test_assessment_matches_original_flow_for_every_answer(rules):
+    for answers in ALL_ANSWERS:
+        guess, confidence, _ = logical_assessment(*answers)
+        assert rules.assess_one(dict(zip(OPTIONS, answers))) == (guess, confidence), answers
+
+def test_batch_assessment_by_label_and_index(rules):
+    expected = [logical_assessment(*answers)[:2] for answers in ALL_ANSWERS]
+    labels = {key: np.array([a[i] for a in ALL_ANSWERS], dtype=object) for i, key in enumerate(OPTIONS)}
+    indices = {key: np.array([OPTIONS[key].index(v) for v in values]) for key, values in labels.items()}
+    for answers in (labels, indices):
+        guesses, confidences = rules.assess(answers)
+        assert list(zip(guesses, confidences)) == expected
+
+def test_follow_up_questions_match_original_flow(rules):
+    for answers in ALL_ANSWERS:
+        _, _, asked = logical_assessment(*answers)
+        # The app asks questions in order, passing only the answers given so far
+        given = {}
+        for key, value in zip(OPTIONS, answers):
+            if rules.is_asked(key, given):
+                given[key] = value
+        assert set(given) == asked, answers
+
+def test_unknown_answer_falls_back_to_default(rules):
+    assert rules.assess_one({'q1': "Maybe"}) == ("None", "High")
+
+def test_decision_table_first_match_and_no_match():
+    table = DecisionTable([[['x', '>', 10]], [['x', '>', 5]]])
+    assert table.lookup({'x': np.array([11, 10, 6, 5, np.nan])}).tolist() == [0, 1, 1, -1, -1]
+
+def test_flag_table_sets_first_match_per_group():
+    table = FlagTable([[['x', '>', 10]], [['x', '>', 5]], [['y', '<', 0]]], ['a', 'a', 'b'])
+    flags = table.lookup({'x': np.array([11, 6, 0]), 'y': np.array([-1, 1, -1])})
+    assert flags.tolist() == [0b101, 0b010, 0b100]
+
+def test_interval_axis_uses_binary_search_for_many_thresholds():
+    thresholds = np.arange(20)
+    table = DecisionTable([[['x', '>=', float(t)]] for t in thresholds[::-1]])
+    values = np.array([-1, 0, 0.5, 7, 19, 25])
+    expected = [-1 if v < 0 else 19 - int(min(np.floor(v), 19)) for v in values]
+    assert table.lookup({'x': values}).tolist() == expected
+
+def test_unknown_option_is_rejected():
+    spec = load_rules()
+    spec['assessment']['rules'][0]['when'] = [['q1', '==', 'Sometimes']]
+    with pytest.raises(ValueError, match="no option"):
+        RuleSet(spec)
+
+def test_unknown_warning_reading_is_rejected():
+    spec = load_rules()
+    spec['warnings'][0]['when'] = [['soil', '>', 3]]
+    with pytest.raises(ValueError, match="unknown reading"):
+        RuleSet(spec)
+
+def test_default_rule_set_recompiles_when_the_file_changes(tmp_path):
+    path = tmp_path / "rules.json"
+    spec = load_rules()
+    path.write_text(json.dumps(spec))
+    first = default_rule_set(str(path))
+    assert default_rule_set(str(path)) is first
+
+    spec['assessment']['default']['guess'] = "Unknown"
+    path.write_text(json.dumps(spec))
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert default_rule_set(str(path)).assess_one({'q1': "No"}) == ("Unknown", "High")
@@ -0,0 +1,191 @@
+# tests/test_sensor_stream.py
+import asyncio
+import json
+import time
+
+import numpy as np
+import pytest
+
+from model_bundle import BundleLabelEncoder
+from sensor_stream import WINDOW_SPEC, SensorStream, StationWindows, parse_reading
+
+FEATURES = list(WINDOW_SPEC)
+BUCKET = 300
+START = 1_700_000_000.0
+
+def window_buckets(feature):
+    return -(-WINDOW_SPEC[feature]['window_s'] // BUCKET)
+
+def reference_features(readings, station, now):
+    """Window aggregates straight from the raw (station, ts, values) readings, in arrival order"""
+    now_bucket = int(now // BUCKET)
+    row = []
+    for feature, spec in WINDOW_SPEC.items():
+        window = window_buckets(feature)
+        recent = [(ts, values) for s, ts, values in readings
+                  if s == station and 0 <= now_bucket - int(ts // BUCKET) < window]
+        if spec['agg'] == 'at_max':
+            quakes = [(values[spec['of']], values.get(feature, np.nan)) for _, values in recent
+                      if spec['of'] in values]
+            value = max(quakes, key=lambda quake: quake[0])[1] if quakes else np.nan
+        else:
+            present = [(int(ts // BUCKET), values[feature]) for ts, values in recent if feature in values]
+            if not present:
+                value = np.nan
+            elif spec['agg'] == 'sum':
+                value = sum(v for _, v in present)
+            elif spec['agg'] == 'mean':
+                value = np.mean([v for _, v in present])
+            elif spec['agg'] == 'max':
+                value = max(v for _, v in present)
+            else:
+                # Latest bucket wins; within a bucket, the reading that arrived last
+                newest = max(b for b, _ in present)
+                value = [v for b, v in present if b == newest][-1]
+        row.append(spec['default'] if np.isnan(value) else value)
+    return row
+
+@pytest.fixture(scope="module")
+def readings():
+    """30 hours of out-of-order readings from 20 stations, each reporting a random subset of fields"""
+    rng = np.random.default_rng(0)
+    out = []
+    for i in range(4000):
+        ts = START + i * 27 - rng.uniform(0, 1200)
+        values = {
+            'Rainfall_mm': rng.uniform(0, 20), 'Humidity_%': rng.uniform(0, 100),
+            'Temperature_C': rng.uniform(-10, 50), 'Wind_Speed_kmph': rng.uniform(0, 150),
+            'Soil_Moisture_%': rng.uniform(0, 100),
+        }
+        values = {k: v for k, v in values.items() if rng.random() < 0.7}
+        if rng.random() < 0.05:
+            values['Magnitude'] = rng.uniform(2, 8)
+            if rng.random() < 0.8:
+                values['Depth_km'] = rng.uniform(0, 50)
+        out.append((f"ST{rng.integers(20):02d}", float(ts), values))
+    return out
+
+@pytest.fixture(scope="module")
+def windows(readings):
+    windows = StationWindows(FEATURES, bucket_seconds=BUCKET)
+    for station, ts, values in readings:
+        assert windows.add(station, ts, values) is not None
+    return windows
+
+@pytest.mark.parametrize("offset", [0, 1800, 7200, 30 * 3600])
+def test_window_features_match_reference(readings, windows, offset):
+    now = windows.watermark + offset
+    X = windows.features_for(np.arange(len(windows.stations)), now=now)
+    expected = [reference_features(readings, station, now) for station in windows.stations]
+    # Slots are float32
+    np.testing.assert_allclose(X, expected, rtol=1e-5, atol=1e-3)
+
+def test_features_default_to_watermark(windows):
+    stations = np.arange(len(windows.stations))
+    assert np.array_equal(windows.features_for(stations), windows.features_for(stations, now=windows.watermark))
+
+def test_rings_are_sized_per_window():
+    short = StationWindows(['Temperature_C'], bucket_seconds=BUCKET, initial_stations=10)
+    # One 13-slot ring (int32 bucket ids, float32 totals, int32 counts) plus the location
+    assert short.memory_bytes == 10 * (13 * 4 * 3 + 16)
+    full = StationWindows(FEATURES, bucket_seconds=BUCKET, initial_stations=10)
+    assert full.rings == [12, 72, 288]
+    bucket_ids = (13 + 73 + 289) * 4
+    # rain total, humidity/temperature total+count, wind peak, soil last, magnitude peak, depth at_peak+ref_peak
+    slots = (289 + 13 * 2 + 13 * 2 + 13 + 73 + 289 + 289 * 2) * 4
+    assert full.memory_bytes == 10 * (bucket_ids + slots + 16)
+
+def test_capacity_grows_up_to_max_stations():
+    windows = StationWindows(['Rainfall_mm'], initial_stations=2, max_stations=5)
+    for i in range(7):
+        windows.add(f"ST{i}", START, {'Rainfall_mm': 1.0})
+    assert windows.stations == [f"ST{i}" for i in range(5)]
+    assert windows.rejected_stations == 2
+    assert len(windows.location) == 5
+
+def test_late_readings_are_dropped_per_window():
+    windows = StationWindows(FEATURES, bucket_seconds=BUCKET)
+    windows.add("A", START, {'Rainfall_mm': 1.0})
+    windows.add("A", START + 25 * 3600, {'Rainfall_mm': 2.0})
+    # Too old for every ring
+    assert windows.add("B", START, {'Rainfall_mm': 5.0}) is None
+    assert windows.late == 1
+
+    # Two hours behind: still inside the 24h rain window, already out of the 1h temperature window
+    s = windows.add("B", START + 23 * 3600, {'Rainfall_mm': 3.0, 'Temperature_C': 45.0})
+    rain, temperature = windows.features_for([s])[0][[FEATURES.index('Rainfall_mm'), FEATURES.index('Temperature_C')]]
+    assert rain == 3.0
+    assert temperature == WINDOW_SPEC['Temperature_C']['default']
+    assert windows.accepted == 3
+
+def test_future_readings_do_not_move_the_watermark():
+    windows = StationWindows(FEATURES, bucket_seconds=BUCKET, max_skew_s=300)
+    now = time.time()
+    windows.add("A", now, {'Rainfall_mm': 1.0})
+    assert windows.add("A", now + 3600, {'Rainfall_mm': 1.0}) is None
+    assert windows.future == 1
+    assert windows.watermark == now
+    assert windows.add("A", now - 60, {'Rainfall_mm': 1.0}) is not None
+
+def test_parse_reading_formats():
+    assert parse_reading('{"station": 7, "timestamp": 1700000000, "Rainfall_mm": 3}') == \
+        ("7", 1_700_000_000.0, {'Rainfall_mm': 3.0})
+    assert parse_reading('{"station": "A", "timestamp": 1700000000500}')[1] == 1_700_000_000.5
+    assert parse_reading('{"station": "A", "timestamp": "2023-11-14T22:13:20Z"}')[1] == 1_700_000_000.0
+    assert parse_reading('{"station": "A", "timestamp": "2023-11-14T22:13:20"}')[1] == 1_700_000_000.0
+    assert abs(parse_reading('{"station": "A"}')[1] - time.time()) < 5
+
+def test_parse_reading_keeps_only_requested_fields():
+    line = json.dumps({'station': "A", 'timestamp': START, 'Rainfall_mm': 1, 'Humidity_%': None, 'extra': "x"})
+    assert parse_reading(line, ['Rainfall_mm', 'Humidity_%', 'Magnitude'])[2] == {'Rainfall_mm': 1.0}
+
+@pytest.mark.parametrize("line", [
+    '[1, 2]',
+    '"text"',
+    'not json',
+    '{"timestamp": 1700000000}',
+    '{"station": {"id": 1}}',
+    '{"station": "A", "timestamp": true}',
+    '{"station": "A", "timestamp": [1]}',
+    '{"station": "A", "timestamp": "yesterday"}',
+    '{"station": "A", "Rainfall_mm": "heavy"}',
+    '{"station": "A", "Rainfall_mm": NaN}',
+    '{"station": "A", "Rainfall_mm": Infinity}',
+    '{"station": "A", "Rainfall_mm": false}',
+    '{"station": "A", "Latitude": 95, "Longitude": 0}',
+    '{"station": "A", "Latitude": 0, "Longitude": -181}',
+])
+def test_parse_reading_rejects_bad_input(line):
+    with pytest.raises(ValueError):
+        parse_reading(line)
+
+class UniformModel:
+    def predict_proba(self, X):
+        return np.full((len(X), 2), 0.5)
+
+class FixedHolder:
+    def current(self):
+        return UniformModel(), BundleLabelEncoder(['Flood', 'None']), None, FEATURES, "test"
+
+def test_stream_counts_bad_lines_and_scores_good_ones():
+    scored = []
+    stream = SensorStream(FixedHolder(), interval=0.05, log_path=None,
+                          on_predictions=lambda names, X, labels, confidences: scored.extend(names))
+    now = time.time()
+    lines = [json.dumps({'station': f"ST{i}", 'timestamp': now, 'Rainfall_mm': i}) for i in range(3)]
+    lines += ['[1]', '{"station": "X", "Rainfall_mm": "wet"}', '{"station": "X", "timestamp": %f}' % (now + 3600)]
+
+    async def source(stream):
+        for line in lines:
+            await stream.put(line)
+
+    async def run():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(stream.run([source]), 0.5)
+
+    asyncio.run(run())
+    stats = stream.stats()
+    assert stats['readings'] == 3
+    assert stats['invalid'] == 2
+    assert stats['future'] == 1
+    assert sorted(scored) == ["ST0", "ST1", "ST2"]
@@ -0,0 +1,180 @@
+# tests/test_serve.py
+import asyncio
+import json
+import time
+
+import numpy as np
+import pytest
+
+from model_bundle import BundleLabelEncoder
+from serve import MicroBatcher, PredictionServer
+
+FEATURES = ['Rainfall_mm', 'Humidity_%', 'Temperature_C']
+
+class RecordingPredict:
+    """predict_fn that labels each row by its first value and remembers the batches it saw"""
+
+    def __init__(self, delay=0.0):
+        self.batches = []
+        self.delay = delay
+
+    def __call__(self, rows):
+        self.batches.append(rows.copy())
+        time.sleep(self.delay)
+        labels = np.array([f"row{int(r[0])}" for r in rows])
+        return labels, rows[:, 0] * 10, np.tile([0.25, 0.75], (len(rows), 1)), ['a', 'b']
+
+def run_batcher(batcher, coroutine):
+    async def run():
+        task = batcher.start()
+        try:
+            return await coroutine()
+        finally:
+            task.cancel()
+
+    return asyncio.run(run())
+
+def test_concurrent_requests_share_one_batch():
+    predict = RecordingPredict()
+    batcher = MicroBatcher(predict, max_batch_size=64, max_wait_ms=200)
+
+    async def submit_all():
+        return await asyncio.gather(*(batcher.submit([float(i), 0.0]) for i in range(10)))
+
+    results = run_batcher(batcher, submit_all)
+    assert len(predict.batches) == 1
+    assert predict.batches[0][:, 0].tolist() == list(range(10))
+    # Each caller gets its own row back
+    assert [label for label, *_ in results] == [f"row{i}" for i in range(10)]
+    assert [confidence for _, confidence, *_ in results] == [i * 10 for i in range(10)]
+    assert all(classes == ['a', 'b'] for *_, classes in results)
+    assert (batcher.batches, batcher.rows) == (1, 10)
+
+def test_batches_are_capped_at_max_batch_size():
+    predict = RecordingPredict()
+    batcher = MicroBatcher(predict, max_batch_size=4, max_wait_ms=200)
+
+    async def submit_all():
+        return await asyncio.gather(*(batcher.submit([float(i)]) for i in range(10)))
+
+    run_batcher(batcher, submit_all)
+    assert [len(batch) for batch in predict.batches] == [4, 4, 2]
+
+def test_a_lone_request_is_flushed_after_max_wait():
+    predict = RecordingPredict()
+    batcher = MicroBatcher(predict, max_batch_size=64, max_wait_ms=50)
+
+    async def submit_one():
+        start = time.perf_counter()
+        result = await batcher.submit([3.0])
+        return result, time.perf_counter() - start
+
+    (label, *_), elapsed = run_batcher(batcher, submit_one)
+    assert label == "row3"
+    assert 0.04 <= elapsed < 2
+    assert len(predict.batches) == 1
+
+def test_a_failed_batch_reaches_every_waiting_caller():
+    calls = []
+
+    def predict(rows):
+        calls.append(len(rows))
+        if len(calls) == 1:
+            raise RuntimeError("model exploded")
+        return RecordingPredict()(rows)
+
+    batcher = MicroBatcher(predict, max_batch_size=64, max_wait_ms=100)
+
+    async def submit_all():
+        failed = await asyncio.gather(*(batcher.submit([float(i)]) for i in range(3)), return_exceptions=True)
+        # The batcher keeps serving after a failed batch
+        label, *_ = await batcher.submit([7.0])
+        return failed, label
+
+    failed, label = run_batcher(batcher, submit_all)
+    assert all(isinstance(e, RuntimeError) and str(e) == "model exploded" for e in failed)
+    assert label == "row7"
+    assert calls == [3, 1]
+    assert batcher.batches == 1
+
+def test_cancelling_the_batcher_stops_it_while_a_batch_fills():
+    def predict(rows):
+        raise RuntimeError("model exploded")
+
+    batcher = MicroBatcher(predict, max_batch_size=4, max_wait_ms=200)
+
+    async def run():
+        task = batcher.start()
+        submits = [asyncio.ensure_future(batcher.submit([float(i)])) for i in range(10)]
+        # Cancel just as the first batch fails and the next one starts filling from a full queue
+        await asyncio.wait(submits, return_when=asyncio.FIRST_EXCEPTION)
+        task.cancel()
+        done, _ = await asyncio.wait({task}, timeout=1)
+        task.cancel()
+        for submit in submits:
+            submit.cancel()
+        await asyncio.gather(*submits, return_exceptions=True)
+        return task in done
+
+    assert asyncio.run(run())
+
+class UniformModel:
+    def __init__(self, n_classes):
+        self.n_classes = n_classes
+
+    def predict_proba(self, X):
+        return np.full((len(X), self.n_classes), 1 / self.n_classes)
+
+class SwappingHolder:
+    """Holder that publishes a model with an extra class after ``swap_after`` snapshots"""
+
+    def __init__(self, swap_after=0):
+        self.snapshots = [
+            (UniformModel(2), BundleLabelEncoder(['Flood', 'None']), None, FEATURES, "v1"),
+            (UniformModel(3), BundleLabelEncoder(['Earthquake', 'Flood', 'None']), None, FEATURES, "v2"),
+        ]
+        self.swap_after = swap_after
+        self.calls = 0
+
+    def current(self):
+        self.calls += 1
+        return self.snapshots[self.calls > self.swap_after]
+
+def route(server, body, method='POST', path='/predict'):
+    async def run():
+        task = server.batcher.start()
+        try:
+            return await server.route(method, path, json.dumps(body).encode())
+        finally:
+            task.cancel()
+
+    return asyncio.run(run())
+
+def test_probabilities_are_named_by_the_model_that_scored_them():
+    # v1 parses and scores the request, v2 is swapped in while the response is built
+    status, payload = route(PredictionServer(SwappingHolder(swap_after=2), max_wait_ms=1),
+                            {'features': [1, 50, 20]})
+    assert status == 200
+    assert payload['probabilities'] == {'Flood': 0.5, 'None': 0.5}
+
+    status, payload = route(PredictionServer(SwappingHolder(), max_wait_ms=1), {'features': [1, 50, 20]})
+    assert payload['probabilities'] == {'Earthquake': 0.3333, 'Flood': 0.3333, 'None': 0.3333}
+
+@pytest.mark.parametrize("body", [
+    {'features': [float('nan'), 50, 20]},
+    {'features': [1, float('inf'), 20]},
+    {'Rainfall_mm': 1, 'Humidity_%': 50, 'Temperature_C': float('-inf')},
+    {'Rainfall_mm': "NaN", 'Humidity_%': 50, 'Temperature_C': 20},
+    {'instances': [{'features': [1, 2, 3]}, {'features': [1, float('nan'), 3]}]},
+])
+def test_non_finite_features_are_rejected(body):
+    status, payload = route(PredictionServer(SwappingHolder(), max_wait_ms=1), body)
+    assert status == 400
+    assert "finite" in payload['error']
+
+def test_bad_requests_are_rejected():
+    server = PredictionServer(SwappingHolder(), max_wait_ms=1)
+    assert route(server, {'features': [1, 2]})[0] == 400
+    assert route(server, {'Rainfall_mm': 1})[0] == 400
+    assert route(server, {}, method='GET')[0] == 405
+    assert route(server, {}, path='/nope')[0] == 404
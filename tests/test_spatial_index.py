@@ -0,0 +1,106 @@
+# tests/test_spatial_index.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from spatial_index import (SpatialIndex, haversine_km, merge_regions, region_keys, regions_frame,
+                           summarize_regions)
+
+@pytest.fixture(scope="module")
+def points():
+    """Points over the whole globe, a cluster on the antimeridian and a few unlocated rows"""
+    rng = np.random.default_rng(1)
+    lat = np.concatenate([rng.uniform(-90, 90, 20_000), rng.uniform(-3, 3, 500)])
+    lon = np.concatenate([rng.uniform(-180, 180, 20_000), rng.uniform(177, 183, 500)])
+    lat[:20] = np.nan
+    return lat, lon
+
+@pytest.fixture(scope="module")
+def index(points):
+    return SpatialIndex(*points, cell_deg=0.5)
+
+def wrap(lon):
+    return (lon + 180) % 360 - 180
+
+def brute_force_bbox(lat, lon, min_lat, min_lon, max_lat, max_lon):
+    lon = wrap(lon)
+    # Box edges in range are kept as given, so 180 stays the east edge
+    min_lon, max_lon = (v if -180 <= v <= 180 else wrap(v) for v in (min_lon, max_lon))
+    in_lon = (lon >= min_lon) & (lon <= max_lon) if min_lon <= max_lon else (lon >= min_lon) | (lon <= max_lon)
+    return np.flatnonzero((lat >= min_lat) & (lat <= max_lat) & in_lon)
+
+RADIUS_QUERIES = [
+    (0, 179.9, 300), (0, -179.9, 300), (0, 540, 200), (89.5, 10, 200), (-89.9, 0, 500),
+    (60, 30, 1000), (10, 10, 5000), (0, 0, 25_000), (45, 100, 0.1), (88, 170, 400),
+]
+
+def random_radius_queries(n=100):
+    rng = np.random.default_rng(2)
+    return [(rng.uniform(-90, 90), rng.uniform(-180, 180), rng.uniform(1, 3000)) for _ in range(n)]
+
+@pytest.mark.parametrize("query", RADIUS_QUERIES + random_radius_queries())
+def test_radius_query_matches_brute_force(points, index, query):
+    lat, lon = points
+    ids, distances = index.query_radius(*query)
+    expected = np.flatnonzero(haversine_km(query[0], query[1], lat, lon) <= query[2])
+    assert sorted(ids) == expected.tolist()
+    assert (np.diff(distances) >= 0).all()
+    np.testing.assert_allclose(distances, haversine_km(query[0], query[1], lat[ids], lon[ids]))
+
+BBOX_QUERIES = [
+    (-10, 170, 10, -170), (-90, -180, 90, 180), (0, 0, 1, 1), (-5, -180, 5, -179), (-5, 179, 5, 181),
+    (20, -30, 20.5, -29.5), (-90, 0, -80, 360),
+]
+
+@pytest.mark.parametrize("query", BBOX_QUERIES)
+def test_bbox_query_matches_brute_force(points, index, query):
+    expected = brute_force_bbox(*points, *query)
+    assert sorted(index.query_bbox(*query)) == expected.tolist()
+
+def test_unlocated_points_are_not_indexed(points, index):
+    lat, lon = points
+    assert len(index) == np.isfinite(lat).sum()
+    assert not set(index.query_bbox(-90, -180, 90, 180)) & set(range(20))
+
+def test_empty_index():
+    index = SpatialIndex([], [])
+    assert len(index) == 0
+    assert len(index.query_radius(0, 0, 1000)[0]) == 0
+    assert len(index.query_bbox(-90, -180, 90, 180)) == 0
+
+def test_region_summaries_merge_like_one_pass():
+    rng = np.random.default_rng(3)
+    n = 2000
+    df = pd.DataFrame({'lat': rng.uniform(-3, 3, n), 'lon': rng.uniform(-3, 3, n),
+                       'label': rng.choice(['None', 'Flood', 'Wildfire'], n),
+                       'confidence': rng.uniform(0, 100, n)})
+    df.loc[:9, 'lat'] = np.nan
+    whole = summarize_regions(df['lat'], df['lon'], df['label'], df['confidence'])
+
+    merged = {}
+    for rows in np.array_split(df.index, 5):
+        chunk = df.loc[rows]
+        merge_regions(merged, summarize_regions(chunk['lat'], chunk['lon'], chunk['label'], chunk['confidence']))
+    assert merged == whole
+    assert sum(s['count'] for s in whole.values()) == n - 10
+    assert set(whole) == set(region_keys(df['lat'].dropna(), df.loc[df['lat'].notna(), 'lon']))
+
+def test_region_summaries_accept_a_scalar_confidence():
+    regions = summarize_regions([1.0, 2.0, np.nan], [3.0, 4.0, 5.0], ['Flood', 'None', 'Flood'], 0)
+    assert regions == {
+        '1,3': {'count': 1, 'risk': [0, 1, 0, 0], 'classes': {'Flood': 1}},
+        '2,4': {'count': 1, 'risk': [1, 0, 0, 0], 'classes': {'None': 1}},
+    }
+
+def test_regions_frame_ranks_by_risk():
+    regions = {
+        '0,0': {'count': 4, 'risk': [0, 0, 0, 4], 'classes': {'Flood': 4}},
+        '10,-20': {'count': 4, 'risk': [2, 0, 2, 0], 'classes': {'None': 2, 'Wildfire': 2}},
+    }
+    frame = regions_frame(regions)
+    assert frame['region'].tolist() == ['0,0', '10,-20']
+    assert frame['risk_score'].tolist() == [1.0, 0.25]
+    assert frame['lat'].tolist() == [0.5, 10.5]
+    # Ties go to the disaster rather than "None"
+    assert frame['top_disaster'].tolist() == ['Flood', 'Wildfire']
+    assert regions_frame({}).empty
@@ -0,0 +1,142 @@
+# tests/test_tree_engine.py
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import StandardScaler
+
+from model_artifacts import predict_batch, predict_proba
+from model_bundle import ModelBundle, write_bundle
+import tree_engine
+from tree_engine import FlatForest, export_raw_input_model, verify_equivalence
+
+FEATURES = ['Rainfall_mm', 'Humidity_pct', 'Temperature_C', 'Wind_Speed_kmh', 'Magnitude']
+
+@pytest.fixture(scope="module")
+def fitted():
+    """A small forest trained the way train_model.py does: scaler first, then the forest"""
+    rng = np.random.default_rng(0)
+    X_raw = np.column_stack([
+        rng.uniform(0, 500, 600), rng.uniform(0, 100, 600), rng.uniform(-10, 60, 600),
+        rng.uniform(0, 150, 600), rng.uniform(0, 10, 600),
+    ])
+    y = np.select([X_raw[:, 0] > 250, X_raw[:, 4] > 6, X_raw[:, 2] > 40], ['Flood', 'Earthquake', 'Wildfire'],
+                  'None')
+    scaler = StandardScaler().fit(X_raw)
+    forest = RandomForestClassifier(n_estimators=15, max_depth=8, random_state=0).fit(scaler.transform(X_raw), y)
+    return forest, scaler, X_raw
+
+def walk(flat, X, max_depth):
+    """Reference traversal: follow each tree one row at a time for at most max_depth splits"""
+    X = np.asarray(X, dtype=np.float32)
+    out = np.zeros((len(X), flat.value.shape[1]))
+    for i, row in enumerate(X):
+        for root in flat.roots:
+            node = root
+            for _ in range(max_depth):
+                if flat.left[node] == node:
+                    break
+                node = flat.right[node] if row[flat.feature[node]] > flat.threshold[node] else flat.left[node]
+            out[i] += flat.value[node]
+    return out / len(flat.roots)
+
+def test_flat_forest_matches_sklearn(fitted):
+    forest, scaler, X_raw = fitted
+    flat = FlatForest.from_sklearn(forest)
+    X = scaler.transform(X_raw)
+    max_diff, ok = verify_equivalence(forest, flat, X)
+    assert ok, max_diff
+    assert (flat.predict(X) == forest.predict(X)).all()
+    assert (flat.classes_ == forest.classes_).all()
+
+def test_small_chunks_give_the_same_probabilities(fitted, monkeypatch):
+    forest, scaler, X_raw = fitted
+    monkeypatch.setattr(tree_engine, 'COMPILED_MIN_ROWS', len(X_raw) + 1)
+    flat = FlatForest.from_sklearn(forest)
+    X = scaler.transform(X_raw)
+    assert np.array_equal(flat.predict_proba(X, chunk_size=7), flat.predict_proba(X))
+
+@pytest.mark.parametrize("n_estimators, max_depth", [(None, None), (4, 3)])
+def test_compiled_batches_reach_the_same_leaves(fitted, monkeypatch, n_estimators, max_depth):
+    forest, scaler, X_raw = fitted
+    # Pruned forests number their nodes level by level across trees
+    flat = FlatForest.from_sklearn(forest).prune(n_estimators, max_depth).fold_scaler(scaler.mean_, scaler.scale_)
+    X = X_raw.copy()
+    X[::50, 0] = np.nan
+    compiled_leaves, compiled_proba = flat.apply(X), flat.predict_proba(X)
+    monkeypatch.setattr(tree_engine, 'COMPILED_MIN_ROWS', len(X) + 1)
+    assert np.array_equal(compiled_leaves, flat.apply(X))
+    np.testing.assert_allclose(compiled_proba, flat.predict_proba(X), atol=1e-12)
+
+@pytest.mark.parametrize("n_jobs", [2, -1])
+def test_threaded_batches_match_one_thread(fitted, n_jobs):
+    forest, scaler, X_raw = fitted
+    flat = FlatForest.from_sklearn(forest)
+    X = scaler.transform(X_raw)
+    expected = flat.predict_proba(X)
+    flat.n_jobs = n_jobs
+    np.testing.assert_allclose(flat.predict_proba(X), expected, atol=1e-12)
+
+def test_batches_fall_back_to_numpy_without_scikit_learn(fitted, monkeypatch):
+    forest, scaler, X_raw = fitted
+    flat = FlatForest.from_sklearn(forest)
+    monkeypatch.setattr(flat, '_compiled', [])
+    X = scaler.transform(X_raw)
+    np.testing.assert_allclose(flat.predict_proba(X), forest.predict_proba(X), atol=1e-9)
+
+def test_folded_scaler_takes_raw_features(fitted):
+    forest, scaler, X_raw = fitted
+    raw = FlatForest.from_sklearn(forest).fold_scaler(scaler.mean_, scaler.scale_)
+    np.testing.assert_allclose(raw.predict_proba(X_raw), forest.predict_proba(scaler.transform(X_raw)),
+                               atol=1e-9)
+
+def test_export_raw_input_model_round_trips(fitted, tmp_path):
+    forest, scaler, X_raw = fitted
+    path = tmp_path / "raw.npz"
+    assert export_raw_input_model(forest, scaler, X_raw, str(path))
+    loaded = FlatForest.load(str(path))
+    np.testing.assert_allclose(loaded.predict_proba(X_raw), forest.predict_proba(scaler.transform(X_raw)),
+                               atol=1e-9)
+
+def test_prune_keeps_leading_trees_and_caps_depth(fitted):
+    forest, scaler, X_raw = fitted
+    flat = FlatForest.from_sklearn(forest)
+    X = scaler.transform(X_raw[:100])
+
+    assert np.array_equal(flat.prune().predict_proba(X), flat.predict_proba(X))
+
+    first = flat.prune(n_estimators=5)
+    expected = np.mean([tree.predict_proba(X) for tree in forest.estimators_[:5]], axis=0)
+    np.testing.assert_allclose(first.predict_proba(X), expected, atol=1e-9)
+
+    shallow = flat.prune(max_depth=3)
+    assert shallow.max_depth <= 3
+    assert shallow.n_nodes < flat.n_nodes
+    np.testing.assert_allclose(shallow.predict_proba(X), walk(flat, X, 3), atol=1e-12)
+
+@pytest.mark.parametrize("raw_input", [False, True])
+def test_bundle_predictions_match_sklearn(fitted, tmp_path, raw_input):
+    forest, scaler, X_raw = fitted
+    flat = FlatForest.from_sklearn(forest)
+    if raw_input:
+        flat = flat.fold_scaler(scaler.mean_, scaler.scale_)
+    path = str(tmp_path / "model_bundle.bin")
+    fingerprint = write_bundle(path, flat, forest.classes_, FEATURES, scaler.mean_, scaler.scale_, raw_input)
+
+    bundle = ModelBundle(path)
+    assert bundle.fingerprint == fingerprint
+    assert bundle.features == FEATURES
+    assert (bundle.scaler is None) == raw_input
+
+    expected = forest.predict_proba(scaler.transform(X_raw))
+    np.testing.assert_allclose(predict_proba(bundle.model, bundle.scaler, X_raw), expected, atol=1e-9)
+    labels, confidences, _ = predict_batch(bundle.model, bundle.label_encoder, bundle.scaler, X_raw)
+    assert (labels == forest.classes_[expected.argmax(axis=1)]).all()
+    np.testing.assert_allclose(confidences, expected.max(axis=1) * 100)
+
+def test_bundle_fingerprint_tracks_contents(fitted, tmp_path):
+    forest, scaler, _ = fitted
+    flat = FlatForest.from_sklearn(forest)
+    args = (flat, forest.classes_, FEATURES, scaler.mean_, scaler.scale_, False)
+    first = write_bundle(str(tmp_path / "a.bin"), *args)
+    assert write_bundle(str(tmp_path / "b.bin"), *args) == first
+    assert write_bundle(str(tmp_path / "c.bin"), flat.prune(n_estimators=3), *args[1:]) != first
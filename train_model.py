@@ -1,8 +1,11 @@
 # train_model.py
+import argparse
+import hashlib
+import json
+from datetime import datetime, timezone
 import pandas as pd
 import numpy as np
-import joblib
-import requests
+import sklearn
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import LabelEncoder, StandardScaler
 from sklearn.ensemble import RandomForestClassifier
@@ -10,125 +13,199 @@ from sklearn.metrics import classification_report, accuracy_score
 import warnings
 warnings.filterwarnings('ignore')
 
+from dataset_cache import StageCache
+from model_artifacts import save_artifacts, save_bundle
+from model_registry import default_registry
+from out_of_core import DEFAULT_WORK_DIR, train_out_of_core
+from tree_engine import export_raw_input_model
+from usgs_ingest import client_from_env, read_events
+
+FEATURES = ['Rainfall_mm', 'Humidity_%', 'Temperature_C', 'Wind_Speed_kmph',
+            'Soil_Moisture_%', 'Magnitude', 'Depth_km']
+
+# Event coordinates kept alongside the features; only real earthquakes have them
+LOCATION_COLUMNS = ['Latitude', 'Longitude']
+
+# Synthetic class profiles: number of samples and a (low, high) uniform range
+# or a constant for every generated column
+CLASS_PROFILES = {
+    # Flood data (high rainfall scenarios)
+    'Flood': {
+        'count': 200,
+        'Rainfall_mm': (150, 400), 'Humidity_%': (75, 100), 'Temperature_C': (15, 30),
+        'Wind_Speed_kmph': (20, 60), 'Soil_Moisture_%': (80, 100), 'Magnitude': (3, 8),
+        'Depth_km': 0, 'Confidence_Score': (0.7, 0.95),
+    },
+    # Wildfire data (hot, dry conditions)
+    'Wildfire': {
+        'count': 150,
+        'Rainfall_mm': (0, 10), 'Humidity_%': (10, 30), 'Temperature_C': (30, 50),
+        'Wind_Speed_kmph': (25, 70), 'Soil_Moisture_%': (0, 20), 'Magnitude': (2, 6),
+        'Depth_km': 0, 'Confidence_Score': (0.7, 0.95),
+    },
+    # Tsunami data (coastal conditions)
+    'Tsunami': {
+        'count': 100,
+        'Rainfall_mm': (50, 150), 'Humidity_%': (60, 90), 'Temperature_C': (20, 35),
+        'Wind_Speed_kmph': (40, 100), 'Soil_Moisture_%': (50, 80), 'Magnitude': (4, 9),
+        'Depth_km': (0, 5), 'Confidence_Score': (0.7, 0.95),
+    },
+    # Volcano data (unique conditions)
+    'Volcano': {
+        'count': 80,
+        'Rainfall_mm': (0, 50), 'Humidity_%': (40, 80), 'Temperature_C': (25, 45),
+        'Wind_Speed_kmph': (10, 50), 'Soil_Moisture_%': (10, 40), 'Magnitude': (3, 7),
+        'Depth_km': (0, 10), 'Confidence_Score': (0.7, 0.95),
+    },
+}
+
+# Normal weather conditions for a balanced dataset
+NORMAL_PROFILE = {
+    'None': {
+        'count': 500,
+        'Rainfall_mm': (0, 100), 'Humidity_%': (30, 70), 'Temperature_C': (10, 30),
+        'Wind_Speed_kmph': (5, 30), 'Soil_Moisture_%': (20, 60), 'Magnitude': 0,
+        'Depth_km': 0, 'Confidence_Score': (0.1, 0.3),
+    },
+}
+
+# USGS catalog window used for real earthquake events
+EARTHQUAKE_START = '2020-01-01'
+EARTHQUAKE_END = '2024-01-01'
+
+# Simulated environmental conditions attached to real earthquake events
+EARTHQUAKE_ENVIRONMENT = {
+    'Rainfall_mm': (0, 50), 'Humidity_%': (30, 80), 'Temperature_C': (10, 35),
+    'Wind_Speed_kmph': (5, 40), 'Soil_Moisture_%': (20, 60),
+}
+
+def generate_from_profiles(profiles, rng, scale=1.0):
+    """Draw every class's rows column by column with one vectorized call per column"""
+    names = list(profiles)
+    counts = np.array([int(round(profiles[name]['count'] * scale)) for name in names])
+    codes = np.repeat(np.arange(len(names)), counts)
+
+    columns = {}
+    for col in FEATURES + ['Confidence_Score']:
+        bounds = [profiles[name][col] for name in names]
+        low = np.array([b[0] if isinstance(b, tuple) else b for b in bounds], dtype=float)
+        high = np.array([b[1] if isinstance(b, tuple) else b for b in bounds], dtype=float)
+        columns[col] = rng.uniform(low[codes], high[codes])
+    df = pd.DataFrame(columns)
+    df.insert(len(FEATURES), 'Disaster_Type', np.array(names, dtype=object)[codes])
+    return df
+
+# Random forest settings shared by in-memory and out-of-core training
+FOREST_PARAMS = {
+    'n_estimators': 300,
+    'max_depth': 15,
+    'min_samples_split': 5,
+    'min_samples_leaf': 2,
+    'class_weight': 'balanced',
+    'random_state': 42,
+    'n_jobs': -1,
+}
+
 class DisasterDataCollector:
-    def __init__(self):
+    def __init__(self, seed=None, scale=1.0, usgs_client=None, max_earthquakes=1000, stage_cache=None):
         self.df = pd.DataFrame()
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
+        self.scale = scale
+        self.usgs = usgs_client or client_from_env()
+        self.max_earthquakes = max_earthquakes
+        # Stages are only reproducible, and so only cacheable, with a fixed seed
+        self.cache = stage_cache if seed is not None else None
+        self.stage_keys = {}
+    
+    def _stage_rng(self, *labels):
+        """Random generator for one stage, independent of the order stages run in"""
+        if self.seed is None:
+            return self.rng
+        digest = hashlib.sha256(json.dumps(labels).encode()).digest()
+        return np.random.default_rng([self.seed, int.from_bytes(digest[:8], 'little')])
     
-    def fetch_earthquake_data(self):
-        """Fetch real earthquake data from USGS"""
+    def _run_stage(self, name, params, compute, inputs=()):
+        """Run a dataset stage, reusing its cached output when nothing it depends on changed"""
+        if self.cache is None or None in inputs:
+            self.stage_keys[name] = None
+            return compute()
+        df, self.stage_keys[name] = self.cache.run(name, dict(params, seed=self.seed), compute, inputs)
+        return df
+    
+    def fetch_earthquake_data(self, starttime=EARTHQUAKE_START, endtime=EARTHQUAKE_END, minmagnitude=4.5):
+        """Fetch real earthquake data from USGS, one cached stage per time window"""
+        self.stage_keys['earthquakes'] = None
         try:
-            url = "https://earthquake.usgs.gov/fdsnws/event/1/query"
-            params = {
-                'format': 'geojson',
-                'starttime': '2020-01-01',
-                'endtime': '2024-01-01',
-                'minmagnitude': 4.5,
-                'limit': 1000
-            }
-            response = requests.get(url, params=params)
-            data = response.json()
+            query = {'minmagnitude': minmagnitude}
+            windows = self.usgs.split_windows(starttime, endtime)
+            frames = [None] * len(windows)
+            window_keys = []
+            pending = []
+            for i, window in enumerate(windows):
+                key = StageCache.key('earthquake_window', dict(query, window=window, seed=self.seed, located=True))
+                # Windows that are still open keep gaining events, so they are always rebuilt
+                cacheable = self.cache is not None and self.usgs.is_complete(window[1])
+                window_keys.append(key if cacheable else None)
+                if cacheable:
+                    frames[i] = self.cache.load(key)
+                if frames[i] is None:
+                    pending.append((i, window, key, cacheable))
             
-            earthquake_data = []
-            for feature in data['features']:
-                props = feature['properties']
-                coords = feature['geometry']['coordinates']
-                
-                # Simulate environmental features based on earthquake characteristics
-                earthquake_data.append({
-                    'Rainfall_mm': np.random.uniform(0, 50),
-                    'Humidity_%': np.random.uniform(30, 80),
-                    'Temperature_C': np.random.uniform(10, 35),
-                    'Wind_Speed_kmph': np.random.uniform(5, 40),
-                    'Soil_Moisture_%': np.random.uniform(20, 60),
-                    'Magnitude': props['mag'],
-                    'Depth_km': coords[2],
-                    'Disaster_Type': 'Earthquake',
-                    'Confidence_Score': min(0.9, props['mag'] / 10 + 0.3)
-                })
+            # Only download and rebuild the windows that aren't cached yet
+            if pending:
+                page_lists = self.usgs.fetch_windows([window for _, window, _, _ in pending], **query)
+                for (i, window, key, cacheable), paths in zip(pending, page_lists):
+                    events = read_events(paths)
+                    frames[i] = self.earthquake_frame(events['mag'], events['depth'],
+                                                      self._stage_rng('earthquakes', *window),
+                                                      events['lat'], events['lon'])
+                    if cacheable:
+                        self.cache.save(key, frames[i])
+            print(f"🌍 Earthquake windows: {len(windows) - len(pending)} cached, {len(pending)} fetched")
             
-            return pd.DataFrame(earthquake_data)
+            eq_df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+            # Keep the most recent events, as the original single capped query did
+            if self.max_earthquakes is not None:
+                eq_df = eq_df.tail(self.max_earthquakes).reset_index(drop=True)
+            if None not in window_keys:
+                self.stage_keys['earthquakes'] = StageCache.key(
+                    'earthquakes', {'max_earthquakes': self.max_earthquakes}, window_keys
+                )
+            return eq_df
         except Exception as e:
             print(f"Error fetching earthquake data: {e}")
             return pd.DataFrame()
     
+    def earthquake_frame(self, magnitudes, depths, rng=None, latitudes=None, longitudes=None):
+        """Attach simulated environmental features to real earthquake magnitudes, depths and locations"""
+        rng = rng or self.rng
+        n = len(magnitudes)
+        df = pd.DataFrame({
+            col: rng.uniform(low, high, n) for col, (low, high) in EARTHQUAKE_ENVIRONMENT.items()
+        })
+        df['Magnitude'] = magnitudes
+        df['Depth_km'] = depths
+        df['Disaster_Type'] = 'Earthquake'
+        df['Confidence_Score'] = np.minimum(0.9, magnitudes / 10 + 0.3)
+        if latitudes is not None and longitudes is not None:
+            df['Latitude'] = latitudes
+            df['Longitude'] = longitudes
+        return df
+    
     def fetch_weather_disaster_data(self):
         """Generate realistic weather-related disaster data"""
-        disasters = []
-        
-        # Flood data (high rainfall scenarios)
-        for _ in range(200):
-            disasters.append({
-                'Rainfall_mm': np.random.uniform(150, 400),
-                'Humidity_%': np.random.uniform(75, 100),
-                'Temperature_C': np.random.uniform(15, 30),
-                'Wind_Speed_kmph': np.random.uniform(20, 60),
-                'Soil_Moisture_%': np.random.uniform(80, 100),
-                'Magnitude': np.random.uniform(3, 8),
-                'Depth_km': 0,
-                'Disaster_Type': 'Flood',
-                'Confidence_Score': np.random.uniform(0.7, 0.95)
-            })
-        
-        # Wildfire data (hot, dry conditions)
-        for _ in range(150):
-            disasters.append({
-                'Rainfall_mm': np.random.uniform(0, 10),
-                'Humidity_%': np.random.uniform(10, 30),
-                'Temperature_C': np.random.uniform(30, 50),
-                'Wind_Speed_kmph': np.random.uniform(25, 70),
-                'Soil_Moisture_%': np.random.uniform(0, 20),
-                'Magnitude': np.random.uniform(2, 6),
-                'Depth_km': 0,
-                'Disaster_Type': 'Wildfire',
-                'Confidence_Score': np.random.uniform(0.7, 0.95)
-            })
-        
-        # Tsunami data (coastal conditions)
-        for _ in range(100):
-            disasters.append({
-                'Rainfall_mm': np.random.uniform(50, 150),
-                'Humidity_%': np.random.uniform(60, 90),
-                'Temperature_C': np.random.uniform(20, 35),
-                'Wind_Speed_kmph': np.random.uniform(40, 100),
-                'Soil_Moisture_%': np.random.uniform(50, 80),
-                'Magnitude': np.random.uniform(4, 9),
-                'Depth_km': np.random.uniform(0, 5),
-                'Disaster_Type': 'Tsunami',
-                'Confidence_Score': np.random.uniform(0.7, 0.95)
-            })
-        
-        # Volcano data (unique conditions)
-        for _ in range(80):
-            disasters.append({
-                'Rainfall_mm': np.random.uniform(0, 50),
-                'Humidity_%': np.random.uniform(40, 80),
-                'Temperature_C': np.random.uniform(25, 45),
-                'Wind_Speed_kmph': np.random.uniform(10, 50),
-                'Soil_Moisture_%': np.random.uniform(10, 40),
-                'Magnitude': np.random.uniform(3, 7),
-                'Depth_km': np.random.uniform(0, 10),
-                'Disaster_Type': 'Volcano',
-                'Confidence_Score': np.random.uniform(0.7, 0.95)
-            })
-        
-        return pd.DataFrame(disasters)
+        return self._run_stage(
+            'weather', {'profiles': CLASS_PROFILES, 'scale': self.scale},
+            lambda: generate_from_profiles(CLASS_PROFILES, self._stage_rng('weather'), self.scale)
+        )
     
     def add_normal_conditions(self):
         """Add normal weather conditions for balanced dataset"""
-        normal_conditions = []
-        for _ in range(500):
-            normal_conditions.append({
-                'Rainfall_mm': np.random.uniform(0, 100),
-                'Humidity_%': np.random.uniform(30, 70),
-                'Temperature_C': np.random.uniform(10, 30),
-                'Wind_Speed_kmph': np.random.uniform(5, 30),
-                'Soil_Moisture_%': np.random.uniform(20, 60),
-                'Magnitude': 0,
-                'Depth_km': 0,
-                'Disaster_Type': 'None',
-                'Confidence_Score': np.random.uniform(0.1, 0.3)
-            })
-        return pd.DataFrame(normal_conditions)
+        return self._run_stage(
+            'normal', {'profiles': NORMAL_PROFILE, 'scale': self.scale},
+            lambda: generate_from_profiles(NORMAL_PROFILE, self._stage_rng('normal'), self.scale)
+        )
     
     def build_dataset(self):
         """Build comprehensive dataset"""
@@ -144,28 +221,30 @@ class DisasterDataCollector:
         normal_df = self.add_normal_conditions()
         
         # Combine all data
-        self.df = pd.concat([eq_df, weather_df, normal_df], ignore_index=True)
+        def merge():
+            df = pd.concat([eq_df, weather_df, normal_df], ignore_index=True)
+            
+            # Remove any potential duplicates or invalid rows; only real events have a location
+            df = df.dropna(subset=df.columns.difference(LOCATION_COLUMNS))
+            return df[df['Confidence_Score'] > 0].reset_index(drop=True)
         
-        # Remove any potential duplicates or invalid rows
-        self.df = self.df.dropna()
-        self.df = self.df[self.df['Confidence_Score'] > 0]
+        inputs = [self.stage_keys[name] for name in ('earthquakes', 'weather', 'normal')]
+        self.df = self._run_stage('merged', {'location_columns': LOCATION_COLUMNS}, merge, inputs)
         
         print(f"✅ Dataset built with {len(self.df)} samples")
         print(f"📊 Class distribution:\n{self.df['Disaster_Type'].value_counts()}")
+        if self.cache is not None:
+            print(f"💾 Dataset stage cache: {self.cache.hits} reused, {self.cache.misses} rebuilt")
         
         return self.df
 
-def train_model():
-    """Train the enhanced disaster prediction model"""
-    
-    # Build dataset
-    collector = DisasterDataCollector()
-    df = collector.build_dataset()
+def prepare_data(df, test_size=0.2, random_state=42):
+    """Encode labels, split with stratification and fit the scaler on the training split
     
+    Returns (X_train, X_test, y_train, y_test, label_encoder, scaler) with raw,
+    unscaled feature frames.
+    """
     # Prepare features and target
-    FEATURES = ['Rainfall_mm', 'Humidity_%', 'Temperature_C', 'Wind_Speed_kmph', 
-                'Soil_Moisture_%', 'Magnitude', 'Depth_km']
-    
     X = df[FEATURES]
     y = df['Disaster_Type']
     
@@ -175,24 +254,44 @@ def train_model():
     
     # Split data with stratification
     X_train, X_test, y_train, y_test = train_test_split(
-        X, y_encoded, test_size=0.2, random_state=42, stratify=y_encoded
+        X, y_encoded, test_size=test_size, random_state=random_state, stratify=y_encoded
     )
     
     # Scale features
     scaler = StandardScaler()
-    X_train_scaled = scaler.fit_transform(X_train)
+    scaler.fit(X_train)
+    return X_train, X_test, y_train, y_test, le, scaler
+
+def training_metadata(forest_params, accuracy, n_train, n_test, **extra):
+    """Training details stored alongside the model in its bundle"""
+    return dict({
+        'trained_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'accuracy': round(float(accuracy), 6),
+        'n_train': int(n_train),
+        'n_test': int(n_test),
+        'forest_params': forest_params,
+        'sklearn_version': sklearn.__version__,
+    }, **extra)
+
+def publish_model():
+    """Publish the freshly written bundle so running apps swap it in"""
+    version = default_registry().publish()
+    print(f"🚀 Published model version {version}; running apps pick it up on their next request")
+    return version
+
+def train_model(forest_params=None):
+    """Train the enhanced disaster prediction model"""
+    
+    # Build dataset
+    collector = DisasterDataCollector(seed=42, stage_cache=StageCache())
+    df = collector.build_dataset()
+    
+    X_train, X_test, y_train, y_test, le, scaler = prepare_data(df)
+    X_train_scaled = scaler.transform(X_train)
     X_test_scaled = scaler.transform(X_test)
     
     # Train model with balanced class weights
-    clf = RandomForestClassifier(
-        n_estimators=300,
-        max_depth=15,
-        min_samples_split=5,
-        min_samples_leaf=2,
-        class_weight='balanced',
-        random_state=42,
-        n_jobs=-1
-    )
+    clf = RandomForestClassifier(**(forest_params or FOREST_PARAMS))
     
     clf.fit(X_train_scaled, y_train)
     
@@ -205,18 +304,51 @@ def train_model():
     print(classification_report(y_test, y_pred, target_names=le.classes_))
     
     # Save artifacts
-    joblib.dump(clf, "enhanced_rf_model.pkl")
-    joblib.dump(le, "enhanced_label_encoder.pkl")
-    joblib.dump(scaler, "feature_scaler.pkl")
-    joblib.dump(FEATURES, "feature_names.pkl")
+    save_artifacts(clf, le, scaler, FEATURES)
+    export_raw_input_model(clf, scaler, X_train)
+    save_bundle(training_metadata(forest_params or FOREST_PARAMS, accuracy, len(y_train), len(y_test),
+                                  dataset_key=collector.stage_keys.get('merged')))
+    publish_model()
     
     # Save the dataset for reference
     df.to_csv("enhanced_disaster_dataset.csv", index=False)
     
     print("✅ Enhanced model and artifacts saved successfully!")
-    print(f"📁 Files saved: enhanced_rf_model.pkl, enhanced_label_encoder.pkl, feature_scaler.pkl")
+    print("📁 Files saved: enhanced_rf_model.pkl, enhanced_label_encoder.pkl, feature_scaler.pkl, model_bundle.bin")
     
     return clf, le, scaler, FEATURES
 
+def train_model_out_of_core(data_path, work_dir=DEFAULT_WORK_DIR, chunksize=1_000_000, max_samples=200_000):
+    """Train from a CSV/Parquet dataset too large for memory, streaming it from disk"""
+    clf, dataset, train_idx, accuracy = train_out_of_core(
+        data_path, FEATURES, 'Disaster_Type', FOREST_PARAMS,
+        work_dir=work_dir, chunksize=chunksize, max_samples=max_samples
+    )
+    
+    # Save artifacts
+    save_artifacts(clf, dataset.label_encoder, dataset.scaler, FEATURES)
+    sample = np.sort(np.random.default_rng(42).choice(train_idx, size=min(len(train_idx), 10_000), replace=False))
+    export_raw_input_model(clf, dataset.scaler, dataset.X[sample])
+    save_bundle(training_metadata(FOREST_PARAMS, accuracy, len(train_idx), len(dataset) - len(train_idx),
+                                  source=data_path, max_samples=max_samples))
+    publish_model()
+    
+    print("✅ Enhanced model and artifacts saved successfully!")
+    return clf, dataset.label_encoder, dataset.scaler, FEATURES
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the disaster prediction model")
+    parser.add_argument("--out-of-core", metavar="DATA",
+                        help="Train from a CSV/Parquet dataset streamed from disk instead of building one in memory")
+    parser.add_argument("--work-dir", default=DEFAULT_WORK_DIR, help="Directory for memory-mapped training arrays")
+    parser.add_argument("--chunksize", type=int, default=1_000_000)
+    parser.add_argument("--max-samples", type=int, default=200_000, help="Training rows drawn for each tree")
+    args = parser.parse_args()
+    
+    if args.out_of_core:
+        train_model_out_of_core(args.out_of_core, args.work_dir, args.chunksize, args.max_samples)
+    else:
+        train_model()
+
 if __name__ == "__main__":
-    train_model()
\ No newline at end of file
+    main()
\ No newline at end of file
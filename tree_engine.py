@@ -0,0 +1,347 @@
+# tree_engine.py
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+FLAT_MODEL_PATH = "flat_forest.npz"
+RAW_MODEL_PATH = "raw_input_forest.npz"
+
+# Batches of at least this many rows go through scikit-learn's compiled tree
+# traversal; below it the per-call overhead of one C call per tree dominates
+COMPILED_MIN_ROWS = 64
+
+class FlatForest:
+    """Tree ensemble stored as contiguous node arrays, evaluated for a whole batch per level
+
+    Every tree's nodes live in the same arrays; ``roots`` holds each tree's
+    first node and leaves point to themselves.
+    """
+
+    def __init__(self, feature, threshold, left, right, value, roots, max_depth, classes,
+                 children=None, is_leaf=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.classes_ = classes
+        self.n_features_in_ = int(feature.max()) + 1 if len(feature) else 0
+        # Interleaved (left, right) pairs so one gather picks the next node; both can be
+        # passed in precomputed, e.g. memory-mapped from a model bundle
+        self._children = np.stack([left, right], axis=1).ravel() if children is None else children
+        self._is_leaf = left == np.arange(len(left)) if is_leaf is None else is_leaf
+        self._compiled = None
+        # Threads for compiled batches, split by tree; -1 uses every CPU like scikit-learn
+        self.n_jobs = 1
+
+    @classmethod
+    def from_sklearn(cls, forest):
+        """Flatten a fitted RandomForestClassifier (or any forest of decision trees)"""
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            n = tree.node_count
+            is_leaf = tree.children_left == -1
+            node_ids = np.arange(offset, offset + n)
+
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(np.where(is_leaf, 0.0, tree.threshold))
+            lefts.append(np.where(is_leaf, node_ids, tree.children_left + offset))
+            rights.append(np.where(is_leaf, node_ids, tree.children_right + offset))
+
+            # Normalize every node's (weighted) class counts the way predict_proba does
+            counts = tree.value[:, 0, :]
+            totals = counts.sum(axis=1, keepdims=True)
+            totals[totals == 0] = 1.0
+            values.append(counts / totals)
+
+            roots.append(offset)
+            max_depth = max(max_depth, tree.max_depth)
+            offset += n
+
+        return cls(
+            feature=np.concatenate(features).astype(np.int32),
+            threshold=np.concatenate(thresholds).astype(np.float64),
+            left=np.concatenate(lefts).astype(np.int32),
+            right=np.concatenate(rights).astype(np.int32),
+            value=np.concatenate(values).astype(np.float64),
+            roots=np.array(roots, dtype=np.int32),
+            max_depth=max_depth,
+            classes=np.asarray(forest.classes_),
+        )
+
+    def fold_scaler(self, mean, scale):
+        """Forest that takes raw features by moving a StandardScaler into the split thresholds
+
+        ``(x - mean) / scale <= t`` is the same test as ``x <= t * scale + mean``
+        because scale is always positive.
+        """
+        mean = np.asarray(mean, dtype=np.float64)
+        scale = np.asarray(scale, dtype=np.float64)
+        threshold = np.where(self._is_leaf, 0.0,
+                             self.threshold * scale[self.feature] + mean[self.feature])
+        return FlatForest(self.feature, threshold, self.left, self.right, self.value,
+                          self.roots, self.max_depth, self.classes_)
+
+    def prune(self, n_estimators=None, max_depth=None):
+        """Forest of the first n_estimators trees with every tree cut off at max_depth
+
+        A node at the depth cap becomes a leaf predicting its own class
+        distribution, exactly as if the tree had been grown with that max_depth.
+        Unreachable nodes are dropped, so the result is smaller.
+        """
+        roots = self.roots[:n_estimators]
+        cap = self.max_depth if max_depth is None else min(max_depth, self.max_depth)
+
+        # Walk all trees level by level, collecting the nodes that stay reachable
+        kept, cut = [], []
+        frontier = roots.astype(np.int64)
+        for depth in range(cap + 1):
+            is_cut = self._is_leaf[frontier] | (depth == cap)
+            kept.append(frontier)
+            cut.append(is_cut)
+            parents = frontier[~is_cut]
+            frontier = np.stack([self.left[parents], self.right[parents]], axis=1).ravel()
+            if not len(frontier):
+                break
+        kept = np.concatenate(kept)
+        cut = np.concatenate(cut)
+
+        new_id = np.full(len(self.left), -1, dtype=np.int64)
+        new_id[kept] = np.arange(len(kept))
+        own = np.arange(len(kept), dtype=np.int32)
+        return FlatForest(
+            feature=np.where(cut, 0, self.feature[kept]).astype(np.int32),
+            threshold=np.where(cut, 0.0, self.threshold[kept]),
+            left=np.where(cut, own, new_id[self.left[kept]]).astype(np.int32),
+            right=np.where(cut, own, new_id[self.right[kept]]).astype(np.int32),
+            value=self.value[kept],
+            roots=new_id[roots].astype(np.int32),
+            max_depth=depth,
+            classes=self.classes_,
+        )
+
+    @property
+    def n_nodes(self):
+        return len(self.left)
+
+    @property
+    def n_estimators(self):
+        return len(self.roots)
+
+    def _compiled_trees(self):
+        """(Tree, node ids, leaf values) per tree, rebuilt as scikit-learn Tree objects
+
+        A Tree's C traversal makes the same float32 comparisons as the level
+        loop in apply(), so it reaches the same leaves. Empty when scikit-learn
+        isn't installed, in which case batches use the NumPy traversal.
+        """
+        if self._compiled is not None:
+            return self._compiled
+        try:
+            from sklearn.tree._tree import NODE_DTYPE, Tree
+        except ImportError:
+            self._compiled = []
+            return self._compiled
+
+        # Label every reachable node with its tree and depth; pruned forests
+        # number nodes level by level, so a tree's nodes aren't contiguous
+        n = len(self.left)
+        tree_of = np.full(n, -1, dtype=np.int64)
+        depth = np.zeros(n, dtype=np.int64)
+        frontier = self.roots.astype(np.int64)
+        labels = np.arange(len(self.roots))
+        level = 0
+        while len(frontier):
+            tree_of[frontier] = labels
+            depth[frontier] = level
+            inner = ~self._is_leaf[frontier]
+            parents = frontier[inner]
+            frontier = np.stack([self.left[parents], self.right[parents]], axis=1).ravel()
+            labels = np.repeat(labels[inner], 2)
+            level += 1
+
+        # Each tree's nodes with its root first, as Tree expects
+        ids = np.flatnonzero(tree_of >= 0)
+        owner = tree_of[ids]
+        ids = ids[np.lexsort((ids, ids != self.roots[owner], owner))]
+        local = np.empty(n, dtype=np.int64)
+        compiled = []
+        n_classes = np.array([self.value.shape[1]], dtype=np.intp)
+        for nodes in np.split(ids, np.cumsum(np.bincount(tree_of[ids], minlength=len(self.roots)))[:-1]):
+            local[nodes] = np.arange(len(nodes))
+            leaf = self._is_leaf[nodes]
+            arrays = np.zeros(len(nodes), dtype=NODE_DTYPE)
+            arrays['left_child'] = np.where(leaf, -1, local[self.left[nodes]])
+            arrays['right_child'] = np.where(leaf, -1, local[self.right[nodes]])
+            arrays['feature'] = np.where(leaf, -2, self.feature[nodes])
+            arrays['threshold'] = np.where(leaf, -2.0, self.threshold[nodes])
+            arrays['n_node_samples'] = 1
+            arrays['weighted_n_node_samples'] = 1.0
+            # apply() sends NaN left (NaN > t is False)
+            arrays['missing_go_to_left'] = 1
+            values = np.ascontiguousarray(self.value[nodes], dtype=np.float64)
+            tree = Tree(max(self.n_features_in_, 1), n_classes, 1)
+            tree.__setstate__({'max_depth': int(depth[nodes].max()), 'node_count': len(nodes),
+                               'nodes': arrays, 'values': values[:, None, :]})
+            compiled.append((tree, nodes, values))
+        self._compiled = compiled
+        return compiled
+
+    def apply(self, X):
+        """Leaf node index reached in every tree, shape (n_rows, n_trees)"""
+        # sklearn compares float32 inputs against float64 thresholds; do the same
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        trees = self._compiled_trees() if len(X) >= COMPILED_MIN_ROWS else None
+        if trees:
+            return np.stack([nodes[tree.apply(X)] for tree, nodes, _ in trees], axis=1)
+        n_rows, n_features = X.shape
+        n_trees = len(self.roots)
+        X_flat = X.ravel()
+        children, is_leaf = self._children, self._is_leaf
+
+        nodes = np.tile(self.roots, n_rows)
+        row_offsets = np.repeat(np.arange(n_rows, dtype=np.int64) * n_features, n_trees)
+        # Advance one level per step, only for (row, tree) pairs not yet at a leaf
+        active = np.flatnonzero(~is_leaf[nodes])
+        while len(active):
+            current = nodes[active]
+            goes_right = X_flat[row_offsets[active] + self.feature[current]] > self.threshold[current]
+            nxt = children[2 * current + goes_right]
+            nodes[active] = nxt
+            active = active[~is_leaf[nxt]]
+        return nodes.reshape(n_rows, n_trees)
+
+    def predict_proba(self, X, chunk_size=4096):
+        """Average of per-tree leaf class distributions, like RandomForestClassifier"""
+        X = np.asarray(X)
+        trees = self._compiled_trees() if len(X) >= COMPILED_MIN_ROWS else None
+        if trees:
+            X = np.ascontiguousarray(X, dtype=np.float32)
+            n_jobs = (os.cpu_count() or 1) if self.n_jobs is None or self.n_jobs < 0 else self.n_jobs
+            n_jobs = max(1, min(n_jobs, len(trees)))
+            if n_jobs == 1:
+                return self._sum_leaf_values(trees, X, chunk_size) / len(trees)
+            # Tree.apply releases the GIL, so threads over disjoint sets of trees run in parallel
+            with ThreadPoolExecutor(n_jobs, thread_name_prefix="flat-forest") as pool:
+                parts = pool.map(lambda i: self._sum_leaf_values(trees[i::n_jobs], X, chunk_size), range(n_jobs))
+                return sum(parts) / len(trees)
+        out = np.empty((len(X), self.value.shape[1]))
+        for start in range(0, len(X), chunk_size):
+            leaves = self.apply(X[start:start + chunk_size])
+            out[start:start + chunk_size] = self.value[leaves].mean(axis=1)
+        return out
+
+    def _sum_leaf_values(self, trees, X, chunk_size):
+        # Summed tree by tree into a cache-sized block, so no (rows, trees, classes) array is built
+        out = np.zeros((len(X), self.value.shape[1]))
+        for start in range(0, len(X), chunk_size):
+            block = out[start:start + chunk_size]
+            leaf_values = np.empty_like(block)
+            for tree, _, values in trees:
+                np.take(values, tree.apply(X[start:start + chunk_size]), axis=0, out=leaf_values)
+                block += leaf_values
+        return out
+
+    def predict(self, X):
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+    def arrays(self):
+        """Arrays and scalars that fully describe the forest"""
+        return {
+            'feature': self.feature,
+            'threshold': self.threshold,
+            'left': self.left,
+            'right': self.right,
+            'value': self.value,
+            'roots': self.roots,
+            'max_depth': np.array(self.max_depth),
+            'classes': self.classes_,
+        }
+
+    def save(self, path=FLAT_MODEL_PATH):
+        np.savez(path, **self.arrays())
+
+    @classmethod
+    def load(cls, path=FLAT_MODEL_PATH):
+        with np.load(path, allow_pickle=False) as data:
+            return cls(**{name: data[name] for name in data.files})
+
+def verify_equivalence(forest, flat, X, atol=1e-9):
+    """Largest absolute difference between sklearn and flat-forest probabilities"""
+    expected = forest.predict_proba(X)
+    actual = flat.predict_proba(X)
+    max_diff = float(np.abs(expected - actual).max()) if len(X) else 0.0
+    return max_diff, max_diff <= atol
+
+def export_raw_input_model(forest, scaler, X_raw, path=RAW_MODEL_PATH):
+    """Save a scaler-folded flat forest if it matches the original on X_raw; returns success"""
+    X_raw = np.asarray(X_raw, dtype=np.float64)
+    raw = FlatForest.from_sklearn(forest).fold_scaler(scaler.mean_, scaler.scale_)
+    expected = forest.predict_proba((X_raw - scaler.mean_) / scaler.scale_)
+    max_diff = float(np.abs(expected - raw.predict_proba(X_raw)).max()) if len(X_raw) else 0.0
+    if max_diff > 1e-9:
+        print(f"⚠️ Raw-input model differs by {max_diff:.2e} on the training set; not exported")
+        return False
+    raw.save(path)
+    print(f"✅ Raw-input model verified on {len(X_raw)} rows and saved to {path}")
+    return True
+
+def main():
+    import joblib
+    import pandas as pd
+
+    from model_artifacts import MODEL_PATH, SCALER_PATH, FEATURES_PATH
+    from prediction_log import CSV_READ_OPTIONS
+
+    parser = argparse.ArgumentParser(description="Export the RandomForest to the flat-array inference engine")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--output", default=FLAT_MODEL_PATH)
+    parser.add_argument("--verify-data", default="enhanced_disaster_dataset.csv",
+                        help="Dataset used to check the export against predict_proba")
+    parser.add_argument("--fold-scaler", action="store_true",
+                        help=f"Also write {RAW_MODEL_PATH}, which takes unscaled features")
+    args = parser.parse_args()
+
+    forest = joblib.load(args.model)
+    flat = FlatForest.from_sklearn(forest)
+    flat.save(args.output)
+    print(f"✅ Exported {flat.n_estimators} trees ({len(flat.feature)} nodes) to {args.output}")
+
+    try:
+        df = pd.read_csv(args.verify_data, **CSV_READ_OPTIONS)
+    except FileNotFoundError:
+        print(f"⚠️ {args.verify_data} not found; skipping verification")
+        return
+    scaler = joblib.load(SCALER_PATH)
+    features = joblib.load(FEATURES_PATH)
+    X = scaler.transform(df[features])
+
+    max_diff, ok = verify_equivalence(forest, flat, X)
+    print(f"{'✅' if ok else '❌'} Max probability difference on {len(X)} rows: {max_diff:.2e}")
+    if args.fold_scaler:
+        ok = export_raw_input_model(forest, scaler, df[features]) and ok
+
+    for name, model in [("sklearn", forest), ("flat", flat)]:
+        model.predict_proba(X[:1])
+        start = time.perf_counter()
+        for row in X[:200]:
+            model.predict_proba(row[None, :])
+        single = (time.perf_counter() - start) / 200 * 1000
+        start = time.perf_counter()
+        model.predict_proba(X)
+        batch = (time.perf_counter() - start) * 1000
+        print(f"⚡ {name:8s} single row: {single:.2f} ms | {len(X)} rows: {batch:.1f} ms")
+
+    if not ok:
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+# tune.py
+import argparse
+import itertools
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import accuracy_score
+from sklearn.model_selection import train_test_split
+
+from dataset_cache import StageCache
+from predict import iter_input_chunks
+from train_model import FOREST_PARAMS, DisasterDataCollector, prepare_data, train_model
+from tree_engine import FlatForest
+
+# Candidate values for the forest settings train_model hard-codes
+SEARCH_SPACE = {
+    'n_estimators': [50, 100, 200, 300],
+    'max_depth': [8, 12, 15, 20, None],
+    'min_samples_split': [2, 5, 10],
+    'min_samples_leaf': [1, 2, 4],
+    'max_features': ['sqrt', 0.5],
+}
+
+# Training arrays shared with worker processes once, instead of pickled per trial
+_data = {}
+
+def _init_worker(X_train, X_test, y_train, y_test):
+    _data.update(X_train=X_train, X_test=X_test, y_train=y_train, y_test=y_test)
+
+def sample_configs(n_configs, seed=42, space=SEARCH_SPACE):
+    """Distinct random configurations from the search space"""
+    grid = [dict(zip(space, values)) for values in itertools.product(*space.values())]
+    rng = np.random.default_rng(seed)
+    picks = rng.choice(len(grid), size=min(n_configs, len(grid)), replace=False)
+    return [grid[i] for i in picks]
+
+def run_trial(params, n_samples, n_jobs, seed=42):
+    """Fit one configuration on a stratified subsample and measure accuracy and latency"""
+    X_train, y_train = _data['X_train'], _data['y_train']
+    X_test, y_test = _data['X_test'], _data['y_test']
+    if n_samples < len(y_train):
+        idx, _ = train_test_split(np.arange(len(y_train)), train_size=n_samples,
+                                  random_state=seed, stratify=y_train)
+        X_train, y_train = X_train[idx], y_train[idx]
+
+    clf = RandomForestClassifier(**dict(FOREST_PARAMS, **params, n_jobs=n_jobs))
+    start = time.perf_counter()
+    clf.fit(X_train, y_train)
+    fit_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    accuracy = accuracy_score(y_test, clf.predict(X_test))
+    batch_us = (time.perf_counter() - start) / len(y_test) * 1e6
+
+    # Single-row latency through the flat forest the app and server actually use
+    flat = FlatForest.from_sklearn(clf)
+    timings = []
+    for row in X_test[:200]:
+        start = time.perf_counter()
+        flat.predict_proba(row[None, :])
+        timings.append((time.perf_counter() - start) * 1000)
+
+    return dict(params, n_samples=len(y_train), accuracy=accuracy, fit_s=fit_s,
+                batch_us_per_row=batch_us, p50_ms=float(np.percentile(timings, 50)),
+                p99_ms=float(np.percentile(timings, 99)), nodes=len(flat.feature))
+
+def rank_trials(results, accuracy_floor=None):
+    """Best first: the fastest trials meeting the floor, then the rest by accuracy"""
+    if accuracy_floor is None:
+        return sorted(results, key=lambda r: (-r['accuracy'], r['p50_ms']))
+    return sorted(results, key=lambda r: (
+        r['accuracy'] < accuracy_floor,
+        r['p50_ms'] if r['accuracy'] >= accuracy_floor else -r['accuracy'],
+    ))
+
+def successive_halving(configs, n_train, workers, n_jobs, min_samples=1000, eta=3, accuracy_floor=None):
+    """Evaluate configs on growing training subsamples, keeping the best 1/eta each rung"""
+    n_rungs = max(1, math.floor(math.log(max(n_train / min_samples, 1), eta)) + 1)
+    results = []
+    survivors = configs
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=tuple(_data[k] for k in ('X_train', 'X_test', 'y_train', 'y_test'))) as pool:
+        for rung in range(n_rungs):
+            n_samples = n_train if rung == n_rungs - 1 else min(n_train, min_samples * eta ** rung)
+            print(f"🔄 Rung {rung + 1}/{n_rungs}: {len(survivors)} configs on {n_samples} samples")
+            rung_results = list(pool.map(run_trial, survivors, [n_samples] * len(survivors),
+                                         [n_jobs] * len(survivors)))
+            for result in rung_results:
+                result['rung'] = rung + 1
+            results.extend(rung_results)
+            ranked = rank_trials(rung_results, accuracy_floor)
+            keep = max(1, len(ranked) // eta)
+            survivors = [{k: r[k] for k in SEARCH_SPACE} for r in ranked[:keep]]
+    return results
+
+def load_training_frame(data_path=None):
+    """Dataset to tune on: a CSV/Parquet file or the seeded training build"""
+    if data_path:
+        return pd.concat(iter_input_chunks(data_path, 100_000), ignore_index=True)
+    return DisasterDataCollector(seed=42, stage_cache=StageCache()).build_dataset()
+
+def main():
+    parser = argparse.ArgumentParser(description="Successive-halving search over the random forest settings")
+    parser.add_argument("--data", help="CSV/Parquet dataset (default: build the training dataset)")
+    parser.add_argument("--configs", type=int, default=27, help="Number of random configurations to start with")
+    parser.add_argument("--eta", type=int, default=3, help="Keep 1/eta of the configs at each rung")
+    parser.add_argument("--min-samples", type=int, default=500, help="Training rows at the first rung")
+    parser.add_argument("--workers", type=int, default=None, help="Trials run at once (default: CPUs / 2)")
+    parser.add_argument("--accuracy-floor", type=float, help="Prefer the fastest config at or above this accuracy")
+    parser.add_argument("--output", default="tune_results.csv")
+    parser.add_argument("--train-best", action="store_true", help="Retrain and save the model with the winner")
+    args = parser.parse_args()
+
+    # Split the CPUs between concurrent trials so n_jobs=-1 forests don't oversubscribe them
+    cpus = os.cpu_count() or 1
+    workers = args.workers or max(1, cpus // 2)
+    n_jobs = max(1, cpus // workers)
+
+    df = load_training_frame(args.data)
+    X_train, X_test, y_train, y_test, _, scaler = prepare_data(df)
+    _init_worker(scaler.transform(X_train), scaler.transform(X_test), np.asarray(y_train), np.asarray(y_test))
+
+    print(f"⚡ {workers} parallel trials with n_jobs={n_jobs} each")
+    start = time.perf_counter()
+    results = successive_halving(sample_configs(args.configs), len(y_train), workers, n_jobs,
+                                 args.min_samples, args.eta, args.accuracy_floor)
+    print(f"✅ {len(results)} trials in {time.perf_counter() - start:.1f}s")
+
+    report = pd.DataFrame(results)
+    report.to_csv(args.output, index=False)
+    final = report[report['rung'] == report['rung'].max()]
+    columns = list(SEARCH_SPACE) + ['accuracy', 'fit_s', 'p50_ms', 'p99_ms', 'batch_us_per_row', 'nodes']
+    print("\n📋 Final rung (accuracy vs latency):")
+    print(pd.DataFrame(rank_trials(final.to_dict('records'), args.accuracy_floor))[columns].to_string(index=False))
+    print(f"📁 All trials saved to {args.output}")
+
+    best = rank_trials(final.to_dict('records'), args.accuracy_floor)[0]
+    if args.accuracy_floor is not None and best['accuracy'] < args.accuracy_floor:
+        print(f"⚠️ No configuration reached accuracy {args.accuracy_floor}; best was {best['accuracy']:.4f}")
+    best_params = {k: (None if pd.isna(best[k]) else best[k]) for k in SEARCH_SPACE}
+    best_params['n_estimators'] = int(best_params['n_estimators'])
+    for key in ('max_depth', 'min_samples_split', 'min_samples_leaf'):
+        if best_params[key] is not None:
+            best_params[key] = int(best_params[key])
+    print(f"💡 Best: {best_params} (accuracy {best['accuracy']:.4f}, p50 {best['p50_ms']:.3f} ms)")
+
+    if args.train_best:
+        train_model(dict(FOREST_PARAMS, **best_params))
+
+if __name__ == "__main__":
+    main()